@@ -6,22 +6,16 @@
 import streamlit as st
 from dotenv import load_dotenv
 from styles.layout_config import apply_layout
-from llm.anthropic_client import call_claude
-from logic.severity_score import assess_severity
-from utils.weather import get_weather
-from logic.risk_detection import detect_risks
-from utils.slack import send_slack_message
-from utils.history import log_risk_entry
-import pandas as pd
-import json
-from io import BytesIO
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from logic.summarizer import summarize_risk
-from logic.planner import decide_action, explain_action
-from logic.cost_analysis import estimate_costs, recommend_cheapest_action, explain_cost_decision
-from logic.messenger import generate_update_message
+from utils.metrics import metrics
+from utils.app_cache import load_shipments, scored_shipments, analyzed_shipments, session_memo, session_value, clear_app_caches
 import json
+import time
+
+# Heavier modules (pandas, plotly, reportlab, the Claude client, the HTTP integrations) are
+# imported inside the section that uses them, so About and Instructions render without them.
+
+# Shipment manifest shown in the Dashboard, Risk Watch and Planner sections
+SHIPMENTS_PATH = "data/sample_shipments.json"
 
 
 # Load environment variables from .env file
@@ -42,6 +36,16 @@ section = st.sidebar.radio("Go to", [
     "ℹ️ About"
 ])
 
+# Optional panel with latency, call counts, cache hits and token usage per instrumented operation
+show_performance = st.sidebar.checkbox("⏱️ Performance panel")
+
+# Cached data is reloaded automatically when the manifest changes; this forces a full refresh
+if st.sidebar.button("🔄 Reload data"):
+    clear_app_caches()
+
+# Time spent rendering the selected section is recorded as "render.<section>"
+render_started = time.perf_counter()
+
 # Main app title
 st.title("🚚 SupplyShield 2.0 – Smart Shipment Guardian")
 
@@ -50,10 +54,7 @@ if section == "📊 Dashboard":
     import json
     import pandas as pd
     import plotly.express as px
-    from utils.weather import get_weather
-    from logic.severity_score import assess_severity
-    from logic.cost_analysis import estimate_costs
-    from logic.risk_detection import detect_risks
+    from utils.weather import get_weather_bulk
 
     # Custom CSS for shipment cards and styling
     st.markdown("""
@@ -82,49 +83,24 @@ if section == "📊 Dashboard":
     st.subheader("📍 Shipment Map & Conditions")
     st.caption("Track shipment positions, risk alerts, and weather changes.")
 
-    # Load sample shipment data from JSON file
-    with open("data/sample_shipments.json", "r") as f:
-        shipments = json.load(f)
-
-    # Initialize lists for map and chart data
+    # Located shipments scored and costed in one columnar pass, cached until the manifest changes
+    df_ships = scored_shipments(SHIPMENTS_PATH)
     map_rows = []
     chart_rows = []
 
-    # Process each shipment for map and chart visualization
-    for ship in shipments:
-        loc = ship.get("location")
-        if loc and "lat" in loc and "lon" in loc:
-            # Detect risks and determine risk level based on notes
-            risks = detect_risks(ship)
-            notes = ship.get("notes", "").lower()
-            risk_level = "Low"
-            if risks:
-                risk_level = "High" if any(w in notes for w in ["typhoon", "strike", "fire"]) else "Medium"
-
-            # Calculate severity and associated costs
-            severity = assess_severity(ship)
-            costs = estimate_costs(severity)
-
-            # Append data for map visualization
-            map_rows.append({
-                "lat": loc["lat"],
-                "lon": loc["lon"],
-                "id": ship["id"],
-                "route": ship["route"],
-                "status": ship["status"],
-                "risk_level": risk_level,
-                "notes": ship["notes"]
-            })
-
-            # Append data for cost and severity charts
-            chart_rows.append({
-                "ID": ship["id"],
-                "Route": ship["route"],
-                "Severity": severity,
-                "Penalty": costs["penalty"],
-                "Expedite": costs["expedite"],
-                "Reroute": costs["reroute"]
-            })
+    if not df_ships.empty:
+        # Data for map visualization
+        map_rows = df_ships[["lat", "lon", "id", "route", "status", "risk_level", "notes"]].to_dict("records")
+
+        # Data for cost and severity charts
+        chart_rows = pd.DataFrame({
+            "ID": df_ships["id"],
+            "Route": df_ships["route"],
+            "Severity": df_ships["severity"],
+            "Penalty": df_ships["penalty"],
+            "Expedite": df_ships["expedite"],
+            "Reroute": df_ships["reroute"]
+        }).to_dict("records")
 
     # Display warning if no valid location data is found
     if not map_rows:
@@ -137,6 +113,9 @@ if section == "📊 Dashboard":
         # Display detailed shipment information, weather, and risks
         st.markdown("## 📦 Shipment Info + Weather + Risk")
 
+        # Fetch weather for every shipment concurrently before rendering the cards
+        weather_by_coord = get_weather_bulk((row["lat"], row["lon"]) for row in map_rows)
+
         for row in map_rows:
             # Set status and risk badges for visual clarity
             status_icon = "🟢" if row["status"].lower() == "on schedule" else "🔴"
@@ -156,7 +135,7 @@ if section == "📊 Dashboard":
             """, unsafe_allow_html=True)
 
             # Fetch and display weather data for shipment location
-            weather = get_weather(row["lat"], row["lon"])
+            weather = weather_by_coord[(row["lat"], row["lon"])]
             if "error" in weather:
                 st.markdown(f"<div class='weather-info'>⚠️ Weather unavailable: {weather['error']}</div>", unsafe_allow_html=True)
             else:
@@ -245,12 +224,9 @@ elif section == "📜 Instructions":
 
 # Risk Watch Section: Scans shipments for risks and displays summaries
 elif section == "🚨 Risk Watch":
+    from logic.pipeline import build_pipeline
     st.subheader("🔍 Scan & Detect Supply Chain Risks")
 
-    # Load sample shipment data
-    with open("data/sample_shipments.json", "r") as f:
-        shipments = json.load(f)
-
     # Handle user-input shipment from Reports & Input tab
     input_data = st.session_state.get("input_mode", {})
     if input_data and input_data.get("jump_to") == "risk":
@@ -261,11 +237,11 @@ elif section == "🚨 Risk Watch":
             "route": input_data["route"],
             "notes": input_data["notes"]
         }
-        risks = detect_risks(shipment)
+        analysis = build_pipeline(include_plan=False).run(shipment)
 
         # Display risk analysis for input shipment
-        if risks:
-            summary = summarize_risk(shipment["notes"])
+        if analysis.risks:
+            summary = analysis.summary
             st.error("⚠️ Risk Detected!")
             st.markdown(f"**📌 Shipment**: `{shipment['id']}`")
             st.markdown(f"**📒 Summary**: _{summary}_")
@@ -276,23 +252,8 @@ elif section == "🚨 Risk Watch":
         st.markdown("---")
         st.session_state.input_mode["jump_to"] = None  # Clear jump_to flag
 
-    # Scan all shipments for risks
-    risky_shipments = []
-
-    for ship in shipments:
-        risks = detect_risks(ship)
-        if risks:
-            # Summarize and assess severity for risky shipments
-            summary = summarize_risk(ship["notes"])
-            severity = assess_severity(ship)
-            risky_shipments.append({
-                "id": ship["id"],
-                "route": ship["route"],
-                "notes": ship["notes"],
-                "summary": summary,
-                "risks": risks,
-                "severity": severity
-            })
+    # Scan all shipments for risks; summaries for risky shipments are generated concurrently
+    risky_shipments = [r for r in analyzed_shipments(SHIPMENTS_PATH, include_plan=False) if r["risks"]]
 
     # Display results for risky shipments
     if not risky_shipments:
@@ -315,6 +276,13 @@ elif section == "🚨 Risk Watch":
 
 # Planner Section: Generates contingency plans for risky shipments
 elif section == "📦 Planner":
+    from logic.pipeline import build_pipeline
+    from logic.messenger import generate_update_message
+    from logic.summarizer import summarize_risk
+    from logic.planner import explain_action
+    from logic.cost_analysis import explain_cost_decision
+    from utils.history import log_risk_entry
+    from utils.slack import queue_slack_message
     st.subheader("📦 Contingency Planning Engine")
 
     # Handle user-input shipment from Reports & Input tab
@@ -323,74 +291,43 @@ elif section == "📦 Planner":
         st.info(f"📦 Contingency Planning for `{input_data['id']}` – {input_data['route']}")
         
         shipment = {"id": input_data["id"], "route": input_data["route"], "notes": input_data["notes"]}
-        summary = summarize_risk(shipment["notes"])
-        severity = assess_severity(shipment)
-        action = decide_action(severity)
-        reason = explain_action(shipment["notes"], severity, action)
-        costs = estimate_costs(severity)
-        recommended = recommend_cheapest_action(costs)
-        cost_reason = explain_cost_decision(costs, recommended)
+        # Full plan even when no risk keyword matched. The rule-based part renders at once and
+        # Claude's texts stream in as they are generated
+        analysis = build_pipeline(use_llm=False, gate=False).run(shipment)
+        severity, action, recommended = analysis.severity, analysis.action, analysis.recommended
 
         # Display contingency plan details
         st.markdown(f"**📌 Severity**: `{severity}`")
-        st.markdown(f"**📒 Summary**: _{summary}_")
+        st.markdown("**📒 Summary**:")
+        st.write_stream(summarize_risk(shipment["notes"], stream=True))
         st.markdown(f"**🧠 Recommended Action**: `{action.upper()}`")
-        st.markdown(f"**📊 Reason**: {reason}")
+        st.markdown("**📊 Reason**:")
+        st.write_stream(explain_action(shipment["notes"], severity, action, stream=True))
         st.markdown(f"**💰 Cost Decision**: `{recommended.upper()}`")
-        st.markdown(f"**🤖 Claude Reasoning**: {cost_reason}")
+        st.markdown("**🤖 Claude Reasoning**:")
+        st.write_stream(explain_cost_decision(analysis.costs, recommended, stream=True))
         
         st.markdown("---")
         st.session_state.input_mode["jump_to"] = None  # Clear jump_to flag
 
         st.markdown("---")
 
-    # Load sample shipment data
-    with open("data/sample_shipments.json", "r") as f:
-        shipments = json.load(f)
-
-    risky_shipments = []
-
-    # Process each shipment for contingency planning
-    for ship in shipments:
-        risks = detect_risks(ship)
-        if risks:
-            # Generate risk summary, severity, and action plan
-            summary = summarize_risk(ship["notes"])
-            severity = assess_severity(ship)
-            action = decide_action(severity)
-            explanation = explain_action(ship["notes"], severity, action)
-
-            # Perform cost analysis and recommend cheapest action
-            costs = estimate_costs(severity)
-            recommended = recommend_cheapest_action(costs)
-            cost_reason = explain_cost_decision(costs, recommended)
-
-            # Store shipment planning results
-            shipment_result = {
-                "id": ship["id"],
-                "route": ship["route"],
-                "severity": severity,
-                "summary": summary,
-                "action": action,
-                "reason": explanation,
-                "costs": costs,
-                "recommended": recommended,
-                "cost_reason": cost_reason
-            }
-
-            risky_shipments.append(shipment_result)
-
-            # Log risk entry to history
-            log_risk_entry({
-                "id": ship["id"],
-                "route": ship["route"],
-                "severity": severity,
-                "summary": summary,
-                "action": action,
-                "costs": costs,
-                "recommended": recommended,
-                "cost_reason": cost_reason
-            })
+    # Plan every risky shipment; the Claude calls run concurrently across shipments and the
+    # results are cached until the manifest changes
+    risky_shipments = [r for r in analyzed_shipments(SHIPMENTS_PATH) if r["risks"]]
+
+    for r in risky_shipments:
+        # Log risk entry to history
+        log_risk_entry({
+            "id": r["id"],
+            "route": r["route"],
+            "severity": r["severity"],
+            "summary": r["summary"],
+            "action": r["action"],
+            "costs": r["costs"],
+            "recommended": r["recommended"],
+            "cost_reason": r["cost_reason"]
+        })
 
     # Display contingency plans for risky shipments
     if not risky_shipments:
@@ -427,30 +364,40 @@ elif section == "📦 Planner":
                 message_placeholder = st.empty()
                 slack_status = st.empty()
 
+                message = session_value(("message", r["id"], tone))
                 if st.button(f"📝 Generate Message for {r['id']}", key=f"generate-{r['id']}"):
-                    # Generate message based on selected tone
-                    message = generate_update_message(
-                        shipment_id=r["id"],
-                        route=r["route"],
-                        severity=r["severity"],
-                        summary=r["summary"],
-                        action=r["action"],
-                        tone=tone
-                    )
+                    # Generate message based on selected tone, streamed as it is written (kept for this session)
+                    def stream_message():
+                        with message_placeholder.container():
+                            return st.write_stream(generate_update_message(
+                                shipment_id=r["id"],
+                                route=r["route"],
+                                severity=r["severity"],
+                                summary=r["summary"],
+                                action=r["action"],
+                                tone=tone,
+                                stream=True
+                            ))
+                    message = session_memo(("message", r["id"], tone), stream_message)
+
+                if message:
                     message_placeholder.code(message, language="markdown")
 
                     if st.button(f"📬 Send to Slack", key=f"send-{r['id']}"):
                         # Send message to Slack and display status
-                        sent = send_slack_message(message)
-                        if sent:
-                            slack_status.success("✅ Message sent to Slack successfully!")
+                        ticket = queue_slack_message(message)
+                        if ticket.status == "failed":
+                            slack_status.error(f"❌ Failed to send message to Slack: {ticket.detail}")
                         else:
-                            slack_status.error("❌ Failed to send message to Slack. Check webhook and logs.")
+                            slack_status.success("📨 Message queued for Slack delivery.")
 
             st.markdown("---")
 
 # Reports & Input Section: Allows users to input shipment data and generate reports
 elif section == "🧾 Reports & Input":
+    from logic.pipeline import build_pipeline
+    from utils.history import log_risk_entry
+    from utils.reports import build_csv_report, build_pdf_report
     st.subheader("📥 Add Shipment & Export Report")
 
     # Initialize session state for sample selection
@@ -460,16 +407,15 @@ elif section == "🧾 Reports & Input":
     # Allow user to select a sample shipment
     st.markdown("### 📋 Select a Sample (Optional)")
     try:
-        with open("data/sample_input_shipments.json", "r") as f:
-            sample_data = json.load(f)
-            options = [f"{s['id']} | {s['route']}" for s in sample_data]
-            selected = st.selectbox("Choose one shipment", ["-- None --"] + options)
-
-            if selected != "-- None --":
-                idx = options.index(selected)
-                st.session_state.selected_sample = sample_data[idx]
-            else:
-                st.session_state.selected_sample = None
+        sample_data = load_shipments("data/sample_input_shipments.json")
+        options = [f"{s['id']} | {s['route']}" for s in sample_data]
+        selected = st.selectbox("Choose one shipment", ["-- None --"] + options)
+
+        if selected != "-- None --":
+            idx = options.index(selected)
+            st.session_state.selected_sample = sample_data[idx]
+        else:
+            st.session_state.selected_sample = None
     except Exception as e:
         st.error(f"Failed to load sample data: {e}")
 
@@ -485,37 +431,15 @@ elif section == "🧾 Reports & Input":
     # Analyze shipment when button is clicked
     if st.button("🚨 Analyze Shipment"):
         if shipment_id and route and notes:
-            # Perform risk analysis and generate contingency plan
-            summary = summarize_risk(notes)
-            severity = assess_severity({"notes": notes})
-            action = decide_action(severity)
-            reason = explain_action(notes, severity, action)
-            costs = estimate_costs(severity)
-            recommended = recommend_cheapest_action(costs)
-            cost_reason = explain_cost_decision(costs, recommended)
-            message = generate_update_message(
-                shipment_id=shipment_id,
-                route=route,
-                severity=severity,
-                summary=summary,
-                action=action,
-                tone="Formal"
+            # Perform risk analysis, contingency plan and update message in one pipeline run
+            analysis = build_pipeline(include_message=True, gate=False).run(
+                {"id": shipment_id, "route": route, "notes": notes}
             )
+            severity, action, costs, recommended = analysis.severity, analysis.action, analysis.costs, analysis.recommended
+            summary, reason, cost_reason, message = analysis.summary, analysis.reason, analysis.cost_reason, analysis.message
 
             # Store analysis results
-            result = {
-                "id": shipment_id,
-                "route": route,
-                "notes": notes,
-                "summary": summary,
-                "severity": severity,
-                "action": action,
-                "reason": reason,
-                "costs": costs,
-                "recommended": recommended,
-                "cost_reason": cost_reason,
-                "message": message
-            }
+            result = analysis.to_dict()
 
             # Display analysis results
             st.success(f"✅ Risk analysis complete for `{shipment_id}`")
@@ -526,14 +450,14 @@ elif section == "🧾 Reports & Input":
             st.code(message, language="markdown")
 
             # Option to send analysis to Slack
-            from utils.slack import send_slack_message
+            from utils.slack import queue_slack_message
             with st.expander("📬 Send to Slack"):
                 if st.button("Send Claude Message to Slack"):
-                    success, feedback = send_slack_message(message)
-                    if success:
-                        st.success(feedback)
+                    ticket = queue_slack_message(message)
+                    if ticket.status == "failed":
+                        st.error(ticket.detail)
                     else:
-                        st.error(feedback)
+                        st.success("📨 Message queued for Slack delivery.")
 
             # Save analysis to history
             log_risk_entry(result)
@@ -554,58 +478,15 @@ elif section == "🧾 Reports & Input":
                 st.warning(f"⚠️ Failed to write to input sample file: {e}")
 
             # Generate and offer CSV export
-            df_report = pd.DataFrame([{
-                "Shipment": shipment_id,
-                "Route": route,
-                "Severity": severity,
-                "Action": action,
-                "Summary": summary,
-                "Penalty Cost": costs["penalty"],
-                "Expedite Cost": costs["expedite"],
-                "Reroute Cost": costs["reroute"],
-                "Recommended": recommended,
-                "Claude Message": message
-            }])
             st.markdown("### 📤 Export Report")
 
-            csv = df_report.to_csv(index=False).encode("utf-8")
+            csv = build_csv_report(result)
             st.download_button("⬇️ Download CSV", data=csv, file_name=f"{shipment_id}_report.csv", mime="text/csv")
 
             # Generate and offer PDF export
-            pdf_buffer = BytesIO()
-            c = canvas.Canvas(pdf_buffer, pagesize=A4)
-            width, height = A4
-
-            c.setFont("Helvetica-Bold", 14)
-            c.drawCentredString(width / 2, height - 50, f"Shipment Risk Report – {shipment_id}")
-
-            c.setFont("Helvetica", 11)
-            y = height - 100
-            lines = [
-                f"Shipment: {shipment_id}",
-                f"Route: {route}",
-                f"Severity: {severity}",
-                f"Summary: {summary}",
-                f"Action: {action}",
-                f"Reason: {reason}",
-                f"Cost Decision: {cost_reason}",
-                "",
-                "Claude Message:",
-                message
-            ]
-            for line in lines:
-                for wrapped_line in line.split("\n"):
-                    c.drawString(40, y, wrapped_line[:120])
-                    y -= 18
-                    if y < 50:
-                        c.showPage()
-                        y = height - 50
-            c.save()
-            pdf_buffer.seek(0)
-
             st.download_button(
                 label="⬇️ Download PDF",
-                data=pdf_buffer,
+                data=build_pdf_report(result),
                 file_name=f"{shipment_id}_report.pdf",
                 mime="application/pdf"
             )
@@ -634,15 +515,16 @@ elif section == "🧾 Reports & Input":
 
 # Chat with Me Section: Provides an interactive chat interface with Claude
 elif section == "💬 Chat with Me":
+    from llm.anthropic_client import stream_claude
     st.subheader("💬 Ask Claude Anything")
 
     st.markdown("Use Claude to ask supply chain, disruption, planning, or LLM-related questions.")
 
     user_input = st.text_input("What would you like to ask?", placeholder="e.g., What’s the best way to reroute from Karachi to Lahore?")
     if st.button("Ask Claude"):
-        response = call_claude(user_input)
         st.markdown("#### 🤖 Claude Says:")
-        st.success(response)
+        # The reply is rendered as it streams in
+        st.write_stream(stream_claude(user_input))
 
 
 
@@ -671,6 +553,57 @@ elif section == "ℹ️ About":
     **📘 Built for supply chain teams, field managers, AI researchers, and educators.**
     """)
 
+metrics.record(f"render.{section}", time.perf_counter() - render_started)
+
+# Performance Panel: p50/p95 latency, call counts, cache hits and token usage per operation
+if show_performance:
+    import pandas as pd
+    from llm.token_budget import token_ledger
+    from llm.single_flight import single_flight
+    st.markdown("## ⏱️ Performance")
+    snapshot = metrics.snapshot()
+    if not snapshot:
+        st.info("No operations recorded yet.")
+    else:
+        df_perf = pd.DataFrame.from_dict(snapshot, orient="index")
+        df_perf.index.name = "operation"
+        st.dataframe(df_perf[[
+            "calls", "errors", "cache_hits", "hit_rate", "p50_ms", "p95_ms", "max_ms",
+            "total_s", "input_tokens", "output_tokens", "cost_usd"
+        ]], use_container_width=True)
+
+        # Claude totals over both the blocking and the streaming calls
+        llm_ops = [snapshot[name] for name in ("llm.call_claude", "llm.stream_claude") if name in snapshot]
+        if llm_ops:
+            calls = sum(op["calls"] for op in llm_ops)
+            cache_hits = sum(op["cache_hits"] for op in llm_ops)
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Claude calls", calls, f"{cache_hits / calls:.0%} cached")
+            col2.metric("Tokens (in / out)", f"{sum(op['input_tokens'] for op in llm_ops)} / {sum(op['output_tokens'] for op in llm_ops)}")
+            col3.metric("Estimated cost", f"${sum(op['cost_usd'] for op in llm_ops):.4f}")
+            first_token = snapshot.get("llm.first_token")
+            if first_token:
+                col4.metric("First token (p50 / p95)", f"{first_token['p50_ms']:.0f} / {first_token['p95_ms']:.0f} ms")
+            flights = single_flight.stats()
+            if flights["coalesced"]:
+                st.caption(
+                    f"🔗 {flights['coalesced']} identical concurrent call(s) shared an in-flight request "
+                    f"({flights['coalescing_ratio']:.0%} of upstream requests saved, up to {flights['max_waiters']} waiting at once)."
+                )
+
+        # Output budget vs. tokens actually generated, per prompt type
+        token_usage = token_ledger.snapshot()
+        if token_usage:
+            st.markdown("#### 🎯 Token budgets")
+            df_tokens = pd.DataFrame.from_dict(token_usage, orient="index")
+            df_tokens.index.name = "prompt type"
+            st.dataframe(df_tokens, use_container_width=True)
+            if token_ledger.trimmed_notes:
+                st.caption(f"{token_ledger.trimmed_notes} long note(s) trimmed to fit the input budget.")
+
+        operation = st.selectbox("Latency histogram", list(snapshot))
+        st.bar_chart(pd.Series(metrics.histogram(operation), name="calls"))
+
 # Footer with developer information
 st.markdown("""<hr style='margin-top: 3rem; margin-bottom: 0.5rem'>""", unsafe_allow_html=True)
 st.markdown("""
@@ -0,0 +1,440 @@
+# benchmarks/run.py
+# Reproducible benchmark suite, runnable fully offline:
+#
+#   python -m benchmarks.run                                  # default sizes, every benchmark
+#   python -m benchmarks.run --sizes 1000,100000,1000000 --only detection,severity,costing
+#   python -m benchmarks.run -o bench.json --compare baseline.json --max-regression 1.2
+#
+# Claude, weather, news and Slack are replaced by the stand-ins in benchmarks.stubs. Results are
+# written as JSON (one record per benchmark and size) so runs can be compared for regressions.
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_REPEATS = 3
+
+BENCHMARKS = []
+
+
+def benchmark(name, max_size=None):
+    """
+    Registers a benchmark. The decorated function takes (size, env) and returns a zero-argument
+    callable that performs one timed run (setup happens outside the timing).
+
+    Args:
+        name (str): Dotted name; the part before the first dot is the group used by --only.
+        max_size (int): Largest size the benchmark runs at (slow scalar or I/O paths are capped).
+    """
+    def register(setup):
+        BENCHMARKS.append((name, max_size, setup))
+        return setup
+    return register
+
+
+# --- Detection and severity -------------------------------------------------------------------
+
+@benchmark("detection.scalar", max_size=200000)
+def _detection_scalar(size, env):
+    from logic.risk_keywords import scan_risks
+    notes = env.frame(size)["notes"].tolist()
+    return lambda: [scan_risks(note) for note in notes]
+
+
+@benchmark("detection.frame")
+def _detection_frame(size, env):
+    from logic.frame_scoring import keyword_mask
+    from logic.risk_keywords import get_matcher
+    notes = env.frame(size)["notes"]
+    return lambda: keyword_mask(notes, get_matcher())
+
+
+@benchmark("severity.scalar", max_size=200000)
+def _severity_scalar(size, env):
+    from logic.severity_score import assess_severity
+    ships = env.frame(size)[["notes", "status"]].to_dict("records")
+    return lambda: [assess_severity(ship) for ship in ships]
+
+
+@benchmark("severity.frame")
+def _severity_frame(size, env):
+    from logic.frame_scoring import score_frame
+    df = env.frame(size)
+    return lambda: score_frame(df)
+
+
+# --- Costing ----------------------------------------------------------------------------------
+
+@benchmark("costing.scalar", max_size=200000)
+def _costing_scalar(size, env):
+    from logic.cost_analysis import estimate_costs, recommend_cheapest_action
+    rows = env.scored(size)[["severity", "route"]].to_dict("records")
+    return lambda: [recommend_cheapest_action(estimate_costs(r["severity"], route=r["route"])) for r in rows]
+
+
+@benchmark("costing.batch")
+def _costing_batch(size, env):
+    from logic.cost_analysis import estimate_costs_batch, recommend_cheapest_action_batch
+    df = env.scored(size)
+    return lambda: recommend_cheapest_action_batch(estimate_costs_batch(df["severity"], routes=df["route"]))
+
+
+# --- Risk log I/O -----------------------------------------------------------------------------
+
+def _log_entries(size, env):
+    df = env.scored(size)
+    return [{"id": r["id"], "route": r["route"], "severity": r["severity"], "action": "reroute",
+             "timestamp": f"2025-01-01T00:00:{i % 60:02d}"} for i, r in enumerate(df.to_dict("records"))]
+
+
+@benchmark("history.jsonl_append", max_size=100000)
+def _history_jsonl_append(size, env):
+    from utils.history_backends import JsonlBackend
+    entries = _log_entries(size, env)
+
+    def run():
+        backend = JsonlBackend(env.fresh_path("risk_log.jsonl"))
+        for entry in entries:
+            backend.append(entry)
+    return run
+
+
+@benchmark("history.jsonl_query", max_size=1000000)
+def _history_jsonl_query(size, env):
+    from utils.history_backends import JsonlBackend
+    backend = JsonlBackend(env.fresh_path("risk_log.jsonl"))
+    with open(backend.path, "w", encoding="utf-8") as f:
+        for entry in _log_entries(size, env):
+            f.write(json.dumps(entry) + "\n")
+    return lambda: backend.query({"severity": "High"}, limit=100, newest_first=True)
+
+
+@benchmark("history.sqlite_append", max_size=1000000)
+def _history_sqlite_append(size, env):
+    from utils.history_backends import SqliteBackend
+    entries = _log_entries(size, env)
+    return lambda: SqliteBackend(env.fresh_path("risk_log.sqlite")).append_many(entries)
+
+
+@benchmark("history.sqlite_query", max_size=1000000)
+def _history_sqlite_query(size, env):
+    from utils.history_backends import SqliteBackend
+    backend = SqliteBackend(env.fresh_path("risk_log.sqlite"))
+    backend.append_many(_log_entries(size, env))
+    return lambda: backend.query({"severity": "High"}, limit=100, newest_first=True)
+
+
+# --- Manifest ingestion and pipeline ----------------------------------------------------------
+
+@benchmark("manifest.stream_json")
+def _manifest_stream(size, env):
+    from benchmarks.synthetic import write_manifest
+    from utils.manifest import iter_manifest
+    path = write_manifest(env.fresh_path("manifest.json"), size)
+
+    def run():
+        for _ in iter_manifest(path):
+            pass
+    return run
+
+
+@benchmark("pipeline.rules", max_size=200000)
+def _pipeline_rules(size, env):
+    from benchmarks.synthetic import generate_shipments
+    from logic.batch import analyze_shipments
+    ships = list(generate_shipments(size))
+    return lambda: analyze_shipments(ships, use_llm=False)
+
+
+@benchmark("pipeline.llm", max_size=10000)
+def _pipeline_llm(size, env):
+    from benchmarks.synthetic import generate_shipments
+    from logic.batch import analyze_shipments
+    ships = list(generate_shipments(size))
+    return lambda: analyze_shipments(ships, max_concurrency=env.args.workers, include_message=True)
+
+
+@benchmark("pipeline.incremental", max_size=10000)
+def _pipeline_incremental(size, env):
+    # Second run over a feed where 5% of shipments changed
+    from benchmarks.synthetic import generate_shipments
+    from logic.batch import analyze_shipments
+    from logic.result_store import ResultStore
+    ships = list(generate_shipments(size))
+    changed = [dict(s, notes=s["notes"] + " (updated)") if i % 20 == 0 else s for i, s in enumerate(ships)]
+
+    def run():
+        store = ResultStore(env.fresh_path("results.sqlite"))
+        analyze_shipments(ships, max_concurrency=env.args.workers, incremental=True, store=store)
+        start = time.perf_counter()
+        analyze_shipments(changed, max_concurrency=env.args.workers, incremental=True, store=store)
+        return time.perf_counter() - start
+    return run
+
+
+def _claude_prompts(size):
+    from benchmarks.synthetic import generate_shipments
+    return [f"Explain the risk for {ship['id']}: {ship['notes']}" for ship in generate_shipments(size)]
+
+
+@benchmark("llm.full_reply", max_size=10000)
+def _llm_full_reply(size, env):
+    # Time until the complete reply is available (call_claude), across concurrent callers
+    from concurrent.futures import ThreadPoolExecutor
+    from llm.anthropic_client import call_claude
+    prompts = _claude_prompts(size)
+
+    def run():
+        with ThreadPoolExecutor(env.args.workers) as pool:
+            list(pool.map(lambda p: call_claude(p, use_cache=False), prompts))
+    return run
+
+
+@benchmark("llm.first_token", max_size=10000)
+def _llm_first_token(size, env):
+    # Time until the first streamed chunk arrives (stream_claude), i.e. what a reader waits for
+    from concurrent.futures import ThreadPoolExecutor
+    from contextlib import closing
+    from llm.anthropic_client import stream_claude
+    prompts = _claude_prompts(size)
+
+    def first_chunk(prompt):
+        with closing(stream_claude(prompt, use_cache=False)) as chunks:
+            return next(chunks)
+
+    def run():
+        with ThreadPoolExecutor(env.args.workers) as pool:
+            list(pool.map(first_chunk, prompts))
+    return run
+
+
+@benchmark("llm.coalesced", max_size=10000)
+def _llm_coalesced(size, env):
+    # Open-storm: every caller asks one of a few identical prompts at once, cache disabled, so
+    # only single-flight coalescing keeps the upstream request count down
+    from concurrent.futures import ThreadPoolExecutor
+    from llm.anthropic_client import call_claude
+    distinct = _claude_prompts(10)
+    prompts = [distinct[i % len(distinct)] for i in range(size)]
+
+    def run():
+        with ThreadPoolExecutor(max(env.args.workers, 32)) as pool:
+            list(pool.map(lambda p: call_claude(p, use_cache=False), prompts))
+    return run
+
+
+# --- Integrations -----------------------------------------------------------------------------
+
+@benchmark("weather.bulk", max_size=10000)
+def _weather_bulk(size, env):
+    from utils import weather
+    df = env.frame(size)
+    coords = list(zip(df["lat"], df["lon"]))
+
+    def run():
+        weather.weather_cache.clear()
+        weather.get_weather_bulk(coords)
+    return run
+
+
+@benchmark("news.many", max_size=10000)
+def _news_many(size, env):
+    from utils import news
+    routes = env.frame(size)["route"].tolist()
+
+    def run():
+        news.news_cache.clear()
+        news.fetch_news_many(routes)
+    return run
+
+
+# --- Report export ----------------------------------------------------------------------------
+
+def _report_results(size):
+    from benchmarks.stubs import FakeAnthropic
+    from benchmarks.synthetic import generate_shipments
+    text = FakeAnthropic.reply_for("report")
+    return [dict(ship, severity="High", action="reroute", recommended="penalty", summary=text, reason=text,
+                 cost_reason=text, message=text, costs={"penalty": 1000, "reroute": 1800, "expedite": 1200})
+            for ship in generate_shipments(size)]
+
+
+@benchmark("report.csv", max_size=100000)
+def _report_csv(size, env):
+    from utils.reports import build_csv_report
+    results = _report_results(size)
+    return lambda: [build_csv_report(result) for result in results]
+
+
+@benchmark("report.pdf", max_size=10000)
+def _report_pdf(size, env):
+    import reportlab  # noqa: F401 -- imported lazily by build_pdf_report; fail (and skip) at setup instead
+    from utils.reports import build_pdf_report
+    results = _report_results(size)
+    return lambda: [build_pdf_report(result) for result in results]
+
+
+# --- Runner -----------------------------------------------------------------------------------
+
+class BenchEnv:
+    """
+    Shared inputs for the benchmarks of one run: cached synthetic frames and a scratch directory.
+    """
+
+    def __init__(self, args, workdir):
+        self.args = args
+        self.workdir = workdir
+        self._frames = {}
+        self._scored = {}
+        self._counter = 0
+
+    def frame(self, size):
+        from benchmarks.synthetic import generate_frame
+        if size not in self._frames:
+            self._frames[size] = generate_frame(size, seed=self.args.seed)
+        return self._frames[size]
+
+    def scored(self, size):
+        from logic.frame_scoring import score_frame
+        if size not in self._scored:
+            self._scored[size] = score_frame(self.frame(size))
+        return self._scored[size]
+
+    def fresh_path(self, name):
+        self._counter += 1
+        return os.path.join(self.workdir, f"{self._counter}-{name}")
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmarks(args) -> dict:
+    from benchmarks.stubs import offline_environment
+
+    groups = set(args.only.split(",")) if args.only else None
+    records = []
+    with offline_environment(llm_latency=args.llm_latency, http_latency=args.http_latency,
+                             error_rate=args.error_rate, seed=args.seed), \
+            tempfile.TemporaryDirectory(prefix="supplyshield-bench-") as workdir:
+        env = BenchEnv(args, workdir)
+        for name, max_size, setup in BENCHMARKS:
+            if groups and name.split(".")[0] not in groups and name not in groups:
+                continue
+            for size in args.sizes:
+                if max_size is not None and size > max_size:
+                    records.append({"name": name, "size": size, "skipped": f"above max_size {max_size}"})
+                    continue
+                try:
+                    run = setup(size, env)
+                except ImportError as e:  # optional dependency not installed, e.g. reportlab
+                    records.append({"name": name, "size": size, "skipped": f"missing dependency {e.name}"})
+                    print(f"{name:<24} {size:>9,}  skipped (missing {e.name})", file=sys.stderr)
+                    continue
+                times = []
+                for _ in range(args.repeats):
+                    start = time.perf_counter()
+                    measured = run()
+                    elapsed = time.perf_counter() - start
+                    # A benchmark may return the duration of its measured part (e.g. after a warm-up)
+                    times.append(measured if isinstance(measured, float) else elapsed)
+                median = statistics.median(times)
+                record = {
+                    "name": name,
+                    "size": size,
+                    "repeats": len(times),
+                    "min_s": round(min(times), 6),
+                    "median_s": round(median, 6),
+                    "mean_s": round(statistics.mean(times), 6),
+                    "items_per_s": round(size / median, 1) if median > 0 else None,
+                }
+                records.append(record)
+                print(f"{name:<24} {size:>9,}  median {median * 1000:10.2f} ms  "
+                      f"({record['items_per_s'] or 0:,.0f}/s)", file=sys.stderr)
+
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": args.seed,
+            "repeats": args.repeats,
+            "llm_latency": args.llm_latency,
+            "http_latency": args.http_latency,
+            "error_rate": args.error_rate,
+            "workers": args.workers,
+        },
+        "results": records,
+    }
+
+
+def compare(current, baseline, max_regression):
+    """
+    Prints median-time ratios against a baseline run and returns the benchmarks slower than
+    `max_regression` times their baseline.
+    """
+    base = {(r["name"], r["size"]): r for r in baseline["results"] if "median_s" in r}
+    regressions = []
+    for record in current["results"]:
+        previous = base.get((record["name"], record["size"]))
+        if "median_s" not in record or previous is None or not previous["median_s"]:
+            continue
+        ratio = record["median_s"] / previous["median_s"]
+        flag = "  REGRESSION" if ratio > max_regression else ""
+        print(f"{record['name']:<24} {record['size']:>9,}  {ratio:6.2f}x{flag}", file=sys.stderr)
+        if flag:
+            regressions.append({**record, "baseline_median_s": previous["median_s"], "ratio": round(ratio, 3)})
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description="Offline benchmark suite.")
+    parser.add_argument("--sizes", type=lambda s: [int(x) for x in s.split(",")], default=list(DEFAULT_SIZES),
+                        help="Comma-separated row counts (default: 1000,10000,100000)")
+    parser.add_argument("--only", help="Comma-separated groups or names, e.g. detection,pipeline.llm")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="Timed runs per benchmark and size")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for synthetic data and simulated failures")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent Claude calls in pipeline benchmarks")
+    parser.add_argument("--llm-latency", type=float, default=0.02, help="Simulated Claude latency in seconds")
+    parser.add_argument("--http-latency", type=float, default=0.0, help="Simulated weather/news/Slack latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Simulated failure rate of every service")
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="Results file (JSON)")
+    parser.add_argument("--compare", help="Baseline results file to compare against")
+    parser.add_argument("--max-regression", type=float, default=1.25,
+                        help="Slowdown ratio versus the baseline that fails the run (default: 1.25)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    results = run_benchmarks(args)
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        results["regressions"] = compare(results, baseline, args.max_regression)
+        exit_code = 1 if results["regressions"] else 0
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
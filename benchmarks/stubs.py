@@ -0,0 +1,276 @@
+# benchmarks/stubs.py
+# Offline stand-ins for every external service, with configurable latency and error rates:
+#   - FakeAnthropic: drop-in for anthropic.Anthropic, injected with llm.anthropic_client.set_client
+#   - StubAPIServer: local HTTP server answering the OpenWeatherMap and GNews endpoints
+#   - utils.slack_stub.StubSlackWebhook: local Slack webhook
+# offline_environment() wires all of them in (plus throwaway caches and storage) for a benchmark run.
+
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import urlsplit, parse_qs
+
+from utils.slack_stub import StubSlackWebhook
+
+
+class FakeAnthropic:
+    """
+    Imitates anthropic.Anthropic for call_claude and stream_claude: messages.create(...) sleeps for
+    the configured latency, fails at the configured rate and returns a reply with token usage;
+    messages.stream(...) delivers the same reply word by word over the same total latency.
+
+    Args:
+        latency (float): Seconds per call.
+        jitter (float): Extra uniform random delay of up to this many seconds.
+        error_rate (float): Probability that a call raises.
+        seed (int): Random seed for jitter and errors.
+        first_token (float): Seconds before a stream's first chunk; defaults to a tenth of the latency.
+    """
+
+    def __init__(self, latency=0.05, jitter=0.0, error_rate=0.0, seed=0, first_token=None):
+        self.latency = latency
+        self.first_token = latency / 10 if first_token is None else first_token
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.messages = self
+
+    def with_options(self, **kwargs):
+        return self
+
+    def _draw(self):
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            failed = self._rng.random() < self.error_rate
+        return delay, failed
+
+    def _wait(self):
+        delay, failed = self._draw()
+        time.sleep(delay)
+        if failed:
+            raise RuntimeError("Simulated Claude API error")
+
+    @staticmethod
+    def reply_for(prompt):
+        # Structured prompts get a valid JSON reply so the combined path is exercised
+        if "Reply with a single JSON object" in prompt:
+            return json.dumps({
+                "summary": "Simulated one-sentence summary.",
+                "reason": "Simulated action rationale.",
+                "cost_reason": "Simulated cost rationale.",
+            })
+        return f"Simulated reply to: {prompt.strip()[:80]}"
+
+    def reply(self, prompt, max_tokens=None):
+        # Reply text and stop reason; replies longer than max_tokens (at ~4 characters per token)
+        # are cut off as the API does
+        text = self.reply_for(prompt)
+        if max_tokens and len(text) > max_tokens * 4:
+            return text[:max_tokens * 4], "max_tokens"
+        return text, "end_turn"
+
+    def message(self, prompt, text, stop_reason):
+        return SimpleNamespace(
+            content=[SimpleNamespace(type="text", text=text)],
+            stop_reason=stop_reason,
+            usage=SimpleNamespace(input_tokens=max(1, len(prompt) // 4), output_tokens=max(1, len(text) // 4)),
+        )
+
+    def create(self, model=None, max_tokens=None, system=None, messages=None, **kwargs):
+        self._wait()
+        prompt = messages[-1]["content"] if messages else ""
+        return self.message(prompt, *self.reply(prompt, max_tokens))
+
+    def stream(self, model=None, max_tokens=None, system=None, messages=None, **kwargs):
+        prompt = messages[-1]["content"] if messages else ""
+        return _FakeStream(self, prompt, max_tokens)
+
+
+class _FakeStream:
+    """
+    Context manager returned by FakeAnthropic.stream, shaped like the SDK's MessageStream:
+    text_stream yields word chunks, get_final_message() returns the message with usage.
+    """
+
+    def __init__(self, fake, prompt, max_tokens=None):
+        self._fake = fake
+        self._prompt = prompt
+        self._text, self._stop_reason = fake.reply(prompt, max_tokens)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @property
+    def text_stream(self):
+        delay, failed = self._fake._draw()
+        first = min(self._fake.first_token, delay)
+        time.sleep(first)
+        if failed:
+            raise RuntimeError("Simulated Claude API error")
+        words = self._text.split(" ")
+        pause = (delay - first) / max(1, len(words) - 1)
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(pause)
+            yield word if i == 0 else " " + word
+
+    def get_final_message(self):
+        return self._fake.message(self._prompt, self._text, self._stop_reason)
+
+
+class StubAPIServer:
+    """
+    Local HTTP server serving "/weather" (OpenWeatherMap shape) and "/news" (GNews shape).
+
+    Args:
+        latency (float): Seconds added to every response.
+        error_rate (float): Probability of answering 500 instead.
+        seed (int): Random seed for errors.
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, seed=0, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                status, body = stub._respond(self.path)
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _respond(self, path):
+        with self._lock:
+            self.requests += 1
+            failed = self._rng.random() < self.error_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if failed:
+            return 500, {"message": "Simulated upstream error"}
+
+        parts = urlsplit(path)
+        query = parse_qs(parts.query)
+        if parts.path == "/weather":
+            lat = float(query.get("lat", ["0"])[0])
+            return 200, {
+                "weather": [{"description": "thunderstorm" if lat > 30 else "clear sky"}],
+                "main": {"temp": 20 + lat / 10},
+                "wind": {"speed": 5.5},
+            }
+        if parts.path == "/news":
+            terms = query.get("q", [""])[0]
+            count = int(query.get("max", ["3"])[0])
+            return 200, {"articles": [
+                {"title": f"{terms} update {i}", "url": f"https://news.example/{terms}/{i}"} for i in range(count)
+            ]}
+        return 404, {"message": "Not found"}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+@contextmanager
+def offline_environment(llm_latency=0.05, http_latency=0.0, error_rate=0.0, seed=0):
+    """
+    Points every integration at local stand-ins for the duration of the block.
+
+    Installs a FakeAnthropic client, serves weather and news from a StubAPIServer and Slack from a
+    StubSlackWebhook, and swaps the response cache, result store, caches and risk log for throwaway
+    ones in a temporary directory. Everything is restored on exit.
+
+    Yields:
+        SimpleNamespace: client, api (StubAPIServer), slack (StubSlackWebhook) and workdir.
+    """
+    from llm import anthropic_client
+    from llm.response_cache import ResponseCache
+    from logic import result_store as result_store_module
+    from logic import batch
+    from utils import history, news, slack, weather
+    from utils.history_backends import JsonlBackend
+
+    workdir = tempfile.mkdtemp(prefix="supplyshield-bench-")
+    fake = FakeAnthropic(latency=llm_latency, error_rate=error_rate, seed=seed)
+    saved = {
+        (anthropic_client, "client"): anthropic_client.client,
+        (anthropic_client, "response_cache"): anthropic_client.response_cache,
+        (batch, "result_store"): batch.result_store,
+        (weather, "WEATHER_API_URL"): weather.WEATHER_API_URL,
+        (weather, "API_KEY"): weather.API_KEY,
+        (news, "GNEWS_API_URL"): news.GNEWS_API_URL,
+        (news, "GNEWS_API_KEY"): news.GNEWS_API_KEY,
+        (slack, "SLACK_WEBHOOK_URL"): slack.SLACK_WEBHOOK_URL,
+        (slack, "slack_queue"): slack.slack_queue,
+    }
+    backend = history.get_backend()
+
+    with StubAPIServer(latency=http_latency, error_rate=error_rate, seed=seed) as api, StubSlackWebhook() as hook:
+        try:
+            anthropic_client.set_client(fake)
+            anthropic_client.response_cache = ResponseCache(os.path.join(workdir, "llm_cache.sqlite"))
+            anthropic_client.response_cache.enabled = False
+            batch.result_store = result_store_module.ResultStore(os.path.join(workdir, "results.sqlite"))
+            weather.WEATHER_API_URL = f"{api.url}/weather"
+            weather.API_KEY = "offline"
+            weather.weather_cache.clear()
+            news.GNEWS_API_URL = f"{api.url}/news"
+            news.GNEWS_API_KEY = "offline"
+            news.news_cache.clear()
+            slack.SLACK_WEBHOOK_URL = hook.url
+            slack.slack_queue = slack.SlackDeliveryQueue(hook.url, rate=1000, digest_window=0)
+            history.set_backend(JsonlBackend(os.path.join(workdir, "risk_log.jsonl")))
+            yield SimpleNamespace(client=fake, api=api, slack=hook, workdir=workdir)
+        finally:
+            slack.slack_queue.close(timeout=5)
+            for (module, name), value in saved.items():
+                setattr(module, name, value)
+            history.set_backend(backend)
+            weather.weather_cache.clear()
+            news.news_cache.clear()
+            shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,2 @@
+# conftest.py
+# Makes the top-level packages (logic, utils, llm, benchmarks) importable from tests/.
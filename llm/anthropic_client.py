@@ -1,24 +1,194 @@
 # llm/anthropic_client.py
-from anthropic import Anthropic
-import streamlit as st
-# Load API key securely from env
+import threading
+import time
+from typing import Iterator
+from llm.response_cache import response_cache, make_cache_key
+from llm.token_budget import budget_for, count_tokens, token_ledger
+from llm.single_flight import single_flight
+from utils.metrics import metrics
+from utils.config import get_secret
 import os
-client = Anthropic(
-    base_url="https://api.aimlapi.com/",
-    # auth_token=os.getenv("AIML_API_KEY"),
-    auth_token=st.secrets["AIML_API_KEY"],
-)
 
-def call_claude(prompt: str, system_prompt: str = "You are an AI assistant who knows everything.") -> str:
+# The Anthropic SDK is imported and the client built on the first call, so importing this module
+# (and every logic module that uses it) stays cheap; set_client() replaces it.
+client = None
+_client_lock = threading.Lock()
+
+MODEL = "claude-3-7-sonnet-20250219"
+MAX_TOKENS = 3048  # Budget for calls without a prompt type (see llm.token_budget for the others)
+ERROR_PREFIX = "[Error from Claude]"
+SYSTEM_PROMPT = "You are an AI assistant who knows everything."
+
+# Price per million tokens, used to estimate the cost of each call in the metrics
+INPUT_COST_PER_MTOK = float(os.getenv("CLAUDE_INPUT_COST_PER_MTOK", "3.0"))
+OUTPUT_COST_PER_MTOK = float(os.getenv("CLAUDE_OUTPUT_COST_PER_MTOK", "15.0"))
+
+def set_client(new_client):
+    """
+    Replaces the Anthropic client used by call_claude (e.g. with an offline fake for benchmarks).
+    The replacement needs messages.create(...) and with_options(...) like anthropic.Anthropic.
+    """
+    global client
+    client = new_client
+
+
+def get_client():
+    """
+    Returns the shared client, building it on first use with the AIML_API_KEY secret
+    (st.secrets or the environment) and the CLAUDE_BASE_URL endpoint.
+    """
+    global client
+    with _client_lock:
+        if client is None:
+            from anthropic import Anthropic
+            client = Anthropic(
+                base_url=os.getenv("CLAUDE_BASE_URL", "https://api.aimlapi.com/"),
+                auth_token=get_secret("AIML_API_KEY"),
+            )
+        return client
+
+
+def _budget(span, prompt_type, max_tokens):
+    # Output budget for this call; the prompt type and budget also go to the trace
+    max_tokens = max_tokens or budget_for(prompt_type, MAX_TOKENS)
+    span.attrs.update(prompt_type=prompt_type or "chat", max_tokens=max_tokens)
+    return max_tokens
+
+
+def _record_usage(span, message, system_prompt, prompt):
+    # Token counts and estimated cost of one response, from the SDK's usage block, and the
+    # budgeted vs. actual tokens in the token ledger
+    usage = getattr(message, "usage", None)
+    if usage is not None:
+        span.input_tokens = getattr(usage, "input_tokens", 0) or 0
+        span.output_tokens = getattr(usage, "output_tokens", 0) or 0
+        span.cost_usd = (span.input_tokens * INPUT_COST_PER_MTOK + span.output_tokens * OUTPUT_COST_PER_MTOK) / 1e6
+    input_estimate = count_tokens(system_prompt) + count_tokens(prompt)
+    hit_limit = getattr(message, "stop_reason", None) == "max_tokens"
+    span.attrs.update(input_estimate=input_estimate, hit_limit=hit_limit)
+    token_ledger.record(span.attrs["prompt_type"], span.attrs["max_tokens"], input_estimate,
+                        span.input_tokens, span.output_tokens, hit_limit)
+
+
+def _create(span, prompt, system_prompt, max_tokens, timeout):
+    # One upstream messages.create call; returns the reply text or an ERROR_PREFIX string
     try:
-        message = client.messages.create(
-            model="claude-3-7-sonnet-20250219",
-            max_tokens=3048,
+        api = get_client()
+        # A per-call timeout disables SDK retries so the caller's deadline is honoured
+        if timeout:
+            api = api.with_options(timeout=timeout, max_retries=0)
+        message = api.messages.create(
+            model=MODEL,
+            max_tokens=max_tokens,
             system=system_prompt,
             messages=[
                 {"role": "user", "content": prompt}
             ]
         )
-        return message.content[0].text  # Handles response list structure
+        text = message.content[0].text  # Handles response list structure
+    except Exception as e:
+        return f"{ERROR_PREFIX}: {str(e)}"
+    _record_usage(span, message, system_prompt, prompt)
+    return text
+
+
+def call_claude(prompt: str, system_prompt: str = SYSTEM_PROMPT, use_cache: bool = True, timeout: float = None,
+                prompt_type: str = None, max_tokens: int = None) -> str:
+    with metrics.timer("llm.call_claude") as span:
+        # max_tokens comes from the prompt type's budget unless given explicitly
+        max_tokens = _budget(span, prompt_type, max_tokens)
+        # Serve repeated prompts from the response cache; pass use_cache=False to bypass it
+        key = make_cache_key(MODEL, system_prompt, prompt, max_tokens)
+        if use_cache:
+            cached = response_cache.get(key)
+            if cached is not None:
+                span.cache_hit = True
+                return cached
+        # Identical calls already in flight are joined instead of sent again (see llm.single_flight);
+        # only the caller that made the request is charged its tokens
+        try:
+            text, shared = single_flight.do(
+                key, lambda: _create(span, prompt, system_prompt, max_tokens, timeout), timeout=timeout
+            )
+        except TimeoutError as e:
+            span.ok = False
+            return f"{ERROR_PREFIX}: {str(e)}"
+        if shared:
+            span.attrs["coalesced"] = True
+        if text.startswith(ERROR_PREFIX):
+            span.ok = False
+            return text
+        # The caller that made the request stores the reply once for everyone it was shared with
+        if use_cache and not shared:
+            response_cache.set(key, text)
+        return text
+
+
+def stream_claude(prompt: str, system_prompt: str = SYSTEM_PROMPT, use_cache: bool = True, timeout: float = None,
+                  prompt_type: str = None, max_tokens: int = None) -> Iterator[str]:
+    """
+    Streaming variant of call_claude: yields the reply in text chunks as the SDK receives them.
+
+    Shares call_claude's cache, so a cached reply (from either function) is replayed as a single
+    chunk, and a completed stream is cached for both. Errors are yielded as an ERROR_PREFIX chunk,
+    as call_claude returns them. Time to first chunk is recorded as "llm.first_token". A stream the
+    consumer closes early is recorded as cancelled rather than failed, and is not cached.
+
+    Args:
+        prompt (str): User prompt.
+        system_prompt (str): System prompt.
+        use_cache (bool): Replay and store replies in the response cache.
+        timeout (float): Per-call timeout in seconds; disables SDK retries when set.
+        prompt_type (str): Budget to use from llm.token_budget, e.g. "summary".
+        max_tokens (int): Explicit output budget, overriding the prompt type's.
+    """
+    with metrics.timer("llm.stream_claude") as span:
+        try:
+            yield from _stream(span, prompt, system_prompt, use_cache, timeout, prompt_type, max_tokens)
+        except GeneratorExit:
+            # The consumer stopped reading (e.g. a Streamlit rerun closed the generator); the
+            # stream is closed, nothing is cached and the call does not count as failed
+            span.attrs["cancelled"] = True
+
+
+def _stream(span, prompt, system_prompt, use_cache, timeout, prompt_type, max_tokens):
+    # Body of stream_claude, run inside its metrics span
+    started = time.perf_counter()
+    max_tokens = _budget(span, prompt_type, max_tokens)
+    key = make_cache_key(MODEL, system_prompt, prompt, max_tokens)
+    if use_cache:
+        cached = response_cache.get(key)
+        if cached is not None:
+            span.cache_hit = True
+            metrics.record("llm.first_token", time.perf_counter() - started, cache_hit=True)
+            yield cached
+            return
+
+    chunks = []
+    try:
+        api = get_client()
+        if timeout:
+            api = api.with_options(timeout=timeout, max_retries=0)
+        with api.messages.stream(
+            model=MODEL,
+            max_tokens=max_tokens,
+            system=system_prompt,
+            messages=[
+                {"role": "user", "content": prompt}
+            ]
+        ) as stream:
+            for text in stream.text_stream:
+                if not chunks:
+                    metrics.record("llm.first_token", time.perf_counter() - started)
+                chunks.append(text)
+                yield text
+            message = stream.get_final_message()
     except Exception as e:
-        return f"[Error from Claude]: {str(e)}"
+        span.ok = False
+        # Keep what was already shown and append the error, like call_claude's error string
+        separator = "\n\n" if chunks else ""
+        yield f"{separator}{ERROR_PREFIX}: {str(e)}"
+        return
+    _record_usage(span, message, system_prompt, prompt)
+    if use_cache:
+        response_cache.set(key, "".join(chunks))
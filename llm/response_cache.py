@@ -0,0 +1,141 @@
+# llm/response_cache.py
+# Disk-backed, content-addressed cache for Claude responses.
+# Entries are keyed by a hash of (model, system prompt, prompt, max_tokens) and stored in SQLite,
+# with a TTL and a size-bounded LRU eviction policy so repeated Streamlit reruns become local lookups.
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Location and limits of the cache (overridable through environment variables)
+CACHE_PATH = os.getenv("CLAUDE_CACHE_PATH", "data/llm_cache.sqlite")
+CACHE_TTL_SECONDS = int(os.getenv("CLAUDE_CACHE_TTL", str(24 * 3600)))
+CACHE_MAX_ENTRIES = int(os.getenv("CLAUDE_CACHE_MAX_ENTRIES", "5000"))
+
+# Set CLAUDE_CACHE_DISABLED=1 to always go to the API
+CACHE_DISABLED = os.getenv("CLAUDE_CACHE_DISABLED", "").lower() in ("1", "true", "yes")
+
+
+def make_cache_key(model: str, system_prompt: str, prompt: str, max_tokens: int) -> str:
+    """
+    Builds a stable content hash for one Claude request.
+    """
+    raw = json.dumps([model, system_prompt, prompt, max_tokens], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite-backed response cache with TTL expiry, LRU eviction and hit/miss counters.
+
+    Args:
+        path (str): Location of the SQLite file.
+        ttl (int): Seconds an entry stays valid. 0 disables expiry.
+        max_entries (int): Upper bound on stored entries; least recently used are evicted first.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = not CACHE_DISABLED
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        # Open lazily so importing the module never touches the disk
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses (accessed_at)")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key: str):
+        """
+        Returns the cached text for a key, or None on a miss or expired entry.
+        """
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, created_at = row
+            if self.ttl and now - created_at > self.ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                conn.commit()
+                self.misses += 1
+                return None
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: str):
+        """
+        Stores a response and evicts the least recently used entries beyond max_entries.
+        """
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            if self.max_entries:
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    " SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+            conn.commit()
+
+    def clear(self):
+        """
+        Removes every cached response and resets the counters.
+        """
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters and the current number of stored entries.
+        """
+        with self._lock:
+            size = self._connect().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": size,
+            "enabled": self.enabled,
+        }
+
+
+# Process-wide cache shared by every call_claude invocation
+response_cache = ResponseCache()
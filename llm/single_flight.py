@@ -0,0 +1,108 @@
+# llm/single_flight.py
+# Request coalescing ("single flight") for identical concurrent Claude calls.
+# The first caller for a key makes the upstream request; callers arriving with the same key while
+# it is in flight wait for it and share its result instead of paying for their own. Nothing is
+# kept once the request completes: repeats after that are the response cache's job.
+
+import os
+import threading
+
+# Set CLAUDE_SINGLE_FLIGHT_DISABLED=1 to send every call upstream
+SINGLE_FLIGHT_DISABLED = os.getenv("CLAUDE_SINGLE_FLIGHT_DISABLED", "").lower() in ("1", "true", "yes")
+
+
+class _Call:
+    """
+    One in-flight request and the callers waiting for it.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time and hands its result to every concurrent caller.
+
+    Counters: "leaders" made a request, "coalesced" shared someone else's; coalescing_ratio is
+    coalesced / (leaders + coalesced), i.e. the share of calls that never went upstream.
+    """
+
+    def __init__(self):
+        self.enabled = not SINGLE_FLIGHT_DISABLED
+        self.leaders = 0
+        self.coalesced = 0
+        self.max_waiters = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, timeout=None):
+        """
+        Returns (func() or the in-flight call's result, shared). An exception raised by func is
+        raised in every caller sharing it.
+
+        Args:
+            key: Identity of the request (e.g. the response cache key).
+            func: Zero-argument callable making the request.
+            timeout (float): Longest a waiter waits for the in-flight call; TimeoutError after.
+        """
+        if not self.enabled:
+            return func(), False
+
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+                leader = True
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+                self.max_waiters = max(self.max_waiters, call.waiters)
+                leader = False
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise TimeoutError("Timed out waiting for an identical in-flight request")
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+    def stats(self) -> dict:
+        """
+        Counters plus the calls in flight and the callers currently waiting on them.
+        """
+        with self._lock:
+            total = self.leaders + self.coalesced
+            return {
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "coalescing_ratio": round(self.coalesced / total, 4) if total else 0.0,
+                "in_flight": len(self._calls),
+                "waiting": sum(call.waiters for call in self._calls.values()),
+                "max_waiters": self.max_waiters,
+            }
+
+    def reset(self):
+        with self._lock:
+            self.leaders = 0
+            self.coalesced = 0
+            self.max_waiters = 0
+
+
+# Shared by call_claude
+single_flight = SingleFlight()
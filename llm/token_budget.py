@@ -0,0 +1,161 @@
+# llm/token_budget.py
+# Per-prompt-type token budgets for Claude calls.
+#   - Output: each prompt type requests only as many tokens as its answer needs (a one-sentence
+#     summary does not need 3048), which shortens generation and caps the bill.
+#   - Input: shipment notes are measured and trimmed to MAX_NOTE_TOKENS before being sent.
+#   - Accounting: token_ledger keeps budgeted vs. actual tokens per prompt type.
+# Token counts use tiktoken when it is installed; it is Claude's tokenizer only approximately,
+# so counts are estimates either way. Without it, a characters-per-token estimate is used.
+
+import os
+import threading
+
+# Output budget (max_tokens) per prompt type; override one with CLAUDE_MAX_TOKENS_<TYPE>,
+# e.g. CLAUDE_MAX_TOKENS_SUMMARY=150
+DEFAULT_BUDGETS = {
+    "summary": 120,          # one sentence
+    "explain_action": 400,   # 4-6 lines
+    "explain_cost": 400,     # 4-6 lines
+    "message": 500,          # 4-6 sentences
+    "combined": 1000,        # JSON with the summary and both explanations
+    "chat": 3048,            # open-ended questions
+}
+
+
+def load_budgets(environ=None) -> dict:
+    """
+    DEFAULT_BUDGETS with any CLAUDE_MAX_TOKENS_<TYPE> overrides from `environ` (os.environ by default).
+    """
+    environ = os.environ if environ is None else environ
+    return {
+        name: int(environ.get(f"CLAUDE_MAX_TOKENS_{name.upper()}", tokens))
+        for name, tokens in DEFAULT_BUDGETS.items()
+    }
+
+
+BUDGETS = load_budgets()
+
+# Longest note sent to Claude; longer notes keep their beginning and end
+MAX_NOTE_TOKENS = int(os.getenv("CLAUDE_MAX_NOTE_TOKENS", "600"))
+
+# Fallback estimate when tiktoken is not installed
+CHARS_PER_TOKEN = 4
+
+TRIM_MARKER = " […] "
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    # Loaded on first use; False when tiktoken (or its encoding data) is unavailable
+    global _encoding
+    with _encoding_lock:
+        if _encoding is None:
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                _encoding = False
+        return _encoding
+
+
+def budget_for(prompt_type: str, default: int = None) -> int:
+    """
+    max_tokens for a prompt type, or `default` for types without a budget.
+    """
+    return BUDGETS.get(prompt_type, default)
+
+
+def count_tokens(text: str) -> int:
+    """
+    Estimated token count of `text` (tiktoken when available, characters / 4 otherwise).
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def trim_to_tokens(text: str, max_tokens: int = MAX_NOTE_TOKENS) -> str:
+    """
+    Returns `text` unchanged when it fits in `max_tokens`, otherwise its first two thirds and last
+    third of the budget joined by TRIM_MARKER (the end of a note often carries the latest update).
+    """
+    if not text or count_tokens(text) <= max_tokens:
+        return text
+    head_tokens = max_tokens * 2 // 3
+    tail_tokens = max(0, max_tokens - head_tokens - 3)  # room for the marker
+    encoding = _get_encoding()
+    if encoding:
+        tokens = encoding.encode(text, disallowed_special=())
+        head = encoding.decode(tokens[:head_tokens])
+        tail = encoding.decode(tokens[len(tokens) - tail_tokens:]) if tail_tokens else ""
+    else:
+        head = text[:head_tokens * CHARS_PER_TOKEN]
+        tail = text[len(text) - tail_tokens * CHARS_PER_TOKEN:] if tail_tokens else ""
+    token_ledger.note_trimmed()
+    return head.rstrip() + TRIM_MARKER + tail.lstrip()
+
+
+class TokenLedger:
+    """
+    Running budgeted vs. actual token totals per prompt type.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._types = {}
+        self.trimmed_notes = 0
+
+    def note_trimmed(self):
+        with self._lock:
+            self.trimmed_notes += 1
+
+    def record(self, prompt_type, max_tokens, input_estimate, input_tokens=0, output_tokens=0, hit_limit=False):
+        """
+        Records one completed call.
+
+        Args:
+            prompt_type (str): Prompt type ("chat" when none was given).
+            max_tokens (int): Output budget requested.
+            input_estimate (int): Estimated prompt tokens before sending.
+            input_tokens (int), output_tokens (int): Usage reported by the API.
+            hit_limit (bool): True when the reply stopped at max_tokens.
+        """
+        with self._lock:
+            entry = self._types.setdefault(prompt_type, {
+                "calls": 0, "budgeted_tokens": 0, "output_tokens": 0, "input_estimate": 0,
+                "input_tokens": 0, "max_output_tokens": 0, "hit_limit": 0,
+            })
+            entry["calls"] += 1
+            entry["budgeted_tokens"] += max_tokens
+            entry["output_tokens"] += output_tokens
+            entry["input_estimate"] += input_estimate
+            entry["input_tokens"] += input_tokens
+            entry["max_output_tokens"] = max(entry["max_output_tokens"], output_tokens)
+            entry["hit_limit"] += int(hit_limit)
+
+    def snapshot(self) -> dict:
+        """
+        Totals per prompt type, plus "utilization" (output / budgeted tokens).
+        """
+        with self._lock:
+            snapshot = {}
+            for prompt_type, entry in self._types.items():
+                snapshot[prompt_type] = dict(entry)
+                snapshot[prompt_type]["utilization"] = (
+                    round(entry["output_tokens"] / entry["budgeted_tokens"], 3) if entry["budgeted_tokens"] else None
+                )
+            return snapshot
+
+    def reset(self):
+        with self._lock:
+            self._types.clear()
+            self.trimmed_notes = 0
+
+
+# Shared ledger used by call_claude and stream_claude
+token_ledger = TokenLedger()
@@ -0,0 +1,131 @@
+# logic/batch.py
+# Concurrent analysis of many shipments at once.
+# A thin layer over logic.pipeline: the independent Claude prompts of every risky shipment are
+# fanned out over a bounded thread pool, so page latency follows the slowest call instead of the
+# sum of all calls. Adds incremental re-analysis and chunked streaming on top.
+
+import copy
+import hashlib
+import json
+from dataclasses import asdict
+
+from logic.cost_analysis import get_cost_model
+from logic.pipeline import build_pipeline, DEFAULT_MAX_CONCURRENCY, DEFAULT_CALL_TIMEOUT
+from logic.result_store import result_store, shipment_fingerprint
+from logic.risk_keywords import get_matcher
+from llm.anthropic_client import ERROR_PREFIX, MODEL, SYSTEM_PROMPT
+from llm.token_budget import BUDGETS, MAX_NOTE_TOKENS
+from utils.manifest import iter_chunks, DEFAULT_CHUNK_SIZE
+
+
+def analysis_version(use_llm=True) -> str:
+    """
+    Short hash of what results depend on besides the shipment: the risk taxonomy and its compiled
+    pattern and the cost model, plus the Claude model, system prompt and token budgets when Claude
+    is used.
+    """
+    matcher = get_matcher()
+    parts = [matcher.taxonomy, matcher.pattern, asdict(get_cost_model())]
+    if use_llm:
+        parts += [MODEL, SYSTEM_PROMPT, BUDGETS, MAX_NOTE_TOKENS]
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:12]
+
+
+def analysis_profile(use_llm=True, include_plan=True, combined=True, include_message=False, tone="Formal") -> str:
+    """
+    Names the analysis options and the version of the inputs a result depends on (see
+    analysis_version), so stored results are only reused like for like.
+    """
+    if not use_llm:
+        return f"rules@{analysis_version(False)}"
+    profile = "plan" if include_plan else "summary"
+    if include_plan and combined:
+        profile += "+combined"
+    if include_message:
+        profile += f"+message:{tone}"
+    return f"{profile}@{analysis_version(True)}"
+
+
+def result_has_error(result) -> bool:
+    """
+    True when a result carries a failed Claude call; such results are not stored, so they are retried.
+    """
+    return any(isinstance(value, str) and value.startswith(ERROR_PREFIX) for value in result.values())
+
+
+def _analyze_incremental(shipments, store, options):
+    profile = analysis_profile(**{k: options[k] for k in ("use_llm", "include_plan", "combined", "include_message", "tone")})
+    keys = [str(ship["id"]) if ship.get("id") is not None else None for ship in shipments]
+    fingerprints = [shipment_fingerprint(ship) for ship in shipments]
+    stored = store.fetch(((k, fp) for k, fp in zip(keys, fingerprints) if k is not None), profile)
+
+    # Looked up by (id, fingerprint): shipments repeating an id with different content must not
+    # get each other's result, and repeats of the same shipment each get their own copy
+    results = [copy.deepcopy(stored.get((k, fp))) if k is not None else None for k, fp in zip(keys, fingerprints)]
+    changed = [i for i, result in enumerate(results) if result is None]
+    fresh = analyze_shipments([shipments[i] for i in changed], **options)
+    for i, result in zip(changed, fresh):
+        results[i] = result
+
+    # Timings describe this run only, so they are not stored with the result
+    store.save(((keys[i], fingerprints[i], {k: v for k, v in result.items() if k != "timings"})
+                for i, result in zip(changed, fresh)
+                if keys[i] is not None and not result_has_error(result)), profile)
+    return results
+
+
+def analyze_shipments(shipments, max_concurrency=DEFAULT_MAX_CONCURRENCY, timeout=DEFAULT_CALL_TIMEOUT, include_plan=True, combined=True,
+                      use_llm=True, include_message=False, tone="Formal", incremental=False, store=None,
+                      include_timings=False):
+    """
+    Analyzes a batch of shipments, running the Claude calls for risky shipments in parallel.
+
+    Args:
+        shipments (iterable): Shipment dicts with at least "id", "route" and "notes".
+        max_concurrency (int): Maximum number of Claude calls in flight at once.
+        timeout (float): Per-call timeout in seconds; a timed out call yields an error string.
+        include_plan (bool): When False only the risk summary is generated (Risk Watch view).
+        combined (bool): With include_plan, ask for all three texts in one structured call per
+            shipment instead of three separate prompts.
+        use_llm (bool): When False only the rule-based fields are computed (no Claude calls).
+        include_message (bool): Also draft the update message for each risky shipment.
+        tone (str): Tone of the update message.
+        incremental (bool): Reuse stored results for shipments whose fingerprint (notes, status,
+            route, location) is unchanged since they were last analyzed with the same options, and
+            only recompute the rest.
+        store (ResultStore): Result store for incremental mode. Defaults to the shared result_store.
+        include_timings (bool): Add a "timings" dict (pipeline stage -> seconds) to every freshly
+            computed result; see logic.pipeline.stage_timings to aggregate them.
+
+    Returns:
+        list: One result dict per input shipment, in input order. Risk-free shipments carry
+        "risks": None and no LLM fields. Risky shipments add "action", "costs", "recommended" and,
+        with use_llm, "summary", plus "reason" and "cost_reason" with include_plan and "message"
+        with include_message.
+    """
+    if incremental:
+        options = dict(max_concurrency=max_concurrency, timeout=timeout, include_plan=include_plan, combined=combined,
+                       use_llm=use_llm, include_message=include_message, tone=tone, include_timings=include_timings)
+        return _analyze_incremental(list(shipments), store or result_store, options)
+
+    pipeline = build_pipeline(use_llm=use_llm, include_plan=include_plan, combined=combined,
+                              include_message=include_message, max_concurrency=max_concurrency,
+                              timeout=timeout, tone=tone)
+    return [analysis.to_dict(include_timings=include_timings) for analysis in pipeline.run_many(shipments)]
+
+
+def iter_analyze_shipments(shipments, chunk_size=DEFAULT_CHUNK_SIZE, **kwargs):
+    """
+    Streaming form of analyze_shipments for manifests too large to hold in memory.
+
+    Args:
+        shipments (iterable): Shipments, typically a utils.manifest.iter_manifest generator.
+        chunk_size (int): Shipments analyzed (and Claude calls fanned out) per chunk.
+        **kwargs: Passed to analyze_shipments.
+
+    Yields:
+        dict: One result per shipment, in input order. Only one chunk is held in memory at a time.
+    """
+    for chunk in iter_chunks(shipments, chunk_size):
+        yield from analyze_shipments(chunk, **kwargs)
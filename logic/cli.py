@@ -0,0 +1,194 @@
+# logic/cli.py
+# Headless batch analysis of a shipment manifest.
+# Runs the detect -> severity -> plan -> cost -> message pipeline without a browser session:
+#
+#   python -m logic.cli data/sample_shipments.json -o results.jsonl --workers 16
+#   python -m logic.cli manifest.csv --format csv --no-llm
+#
+# Writes a results file and a timing summary (<output>.timing.json, also printed to stderr).
+# The manifest is streamed in chunks and results are written as they are produced, so memory use
+# stays flat regardless of the manifest size.
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from logic.batch import iter_analyze_shipments, DEFAULT_CALL_TIMEOUT
+from logic.pipeline import StageTimings
+from logic.result_store import ResultStore, STORE_PATH
+from llm.token_budget import token_ledger
+from llm.single_flight import single_flight
+from utils.manifest import iter_manifest, DEFAULT_CHUNK_SIZE
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; peak memory is then left out of the summary
+    resource = None
+
+FORMATS = ("json", "jsonl", "csv")
+
+# Column order for CSV output
+CSV_FIELDS = ["id", "route", "status", "severity", "risks", "action", "recommended",
+              "penalty", "reroute", "expedite", "summary", "reason", "cost_reason", "message"]
+
+
+def _flatten(result):
+    row = {field: result.get(field) for field in CSV_FIELDS}
+    row["risks"] = ";".join(result.get("risks") or [])
+    for name, value in (result.get("costs") or {}).items():
+        row[name] = value
+    return row
+
+
+def write_results(results, path, fmt, timing=None):
+    """
+    Writes results to `path` as they arrive from the iterable and returns how many were written.
+    Time spent writing is added to timing["write_s"] when a timing dict is given.
+    """
+    count = 0
+    spent = 0.0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = None
+        if fmt == "csv":
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+        elif fmt == "json":
+            f.write("[")
+        for result in results:
+            start = time.perf_counter()
+            if fmt == "json":
+                f.write(("," if count else "") + "\n" + json.dumps(result, indent=2, ensure_ascii=False))
+            elif fmt == "jsonl":
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+            else:
+                writer.writerow(_flatten(result))
+            count += 1
+            spent += time.perf_counter() - start
+        if fmt == "json":
+            f.write("\n]\n" if count else "]\n")
+    if timing is not None:
+        timing["write_s"] = timing.get("write_s", 0.0) + spent
+    return count
+
+
+_END = object()
+
+
+def _timed(items, timing, key):
+    # Passes items through, adding the time spent producing them to timing[key]
+    items = iter(items)
+    while True:
+        start = time.perf_counter()
+        item = next(items, _END)
+        timing[key] = timing.get(key, 0.0) + time.perf_counter() - start
+        if item is _END:
+            return
+        yield item
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m logic.cli", description="Batch shipment risk analysis.")
+    parser.add_argument("manifest", help="Shipment manifest (.json, .jsonl/.ndjson or .csv)")
+    parser.add_argument("-o", "--output", help="Results file (default: <manifest>.results.<format>)")
+    parser.add_argument("-f", "--format", choices=FORMATS, default="jsonl", help="Results format (default: jsonl)")
+    parser.add_argument("-w", "--workers", type=int, default=8, help="Concurrent Claude calls (default: 8)")
+    parser.add_argument("--no-llm", action="store_true", help="Rule-based analysis only; no Claude calls")
+    parser.add_argument("--messages", action="store_true", help="Also draft an update message per risky shipment")
+    parser.add_argument("--tone", default="Formal", help="Tone of the update messages (default: Formal)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_CALL_TIMEOUT, help="Per-call Claude timeout in seconds")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"Shipments read and analyzed per chunk (default: {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument("--skip-invalid", action="store_true",
+                        help="Skip shipments that fail validation instead of stopping")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Reuse stored results for shipments unchanged since the last run")
+    parser.add_argument("--store", default=STORE_PATH, help=f"Result store for --incremental (default: {STORE_PATH})")
+    parser.add_argument("--timing", help="Timing summary file (default: <output>.timing.json)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    output = args.output or f"{os.path.splitext(args.manifest)[0]}.results.{args.format}"
+    timing_path = args.timing or f"{output}.timing.json"
+
+    invalid = 0
+    risky = 0
+    spent = {}
+    stages = StageTimings()
+
+    def on_invalid(error):
+        nonlocal invalid
+        invalid += 1
+        print(f"Skipping invalid shipment: {error}", file=sys.stderr)
+
+    def tally(results):
+        nonlocal risky
+        for result in results:
+            risky += bool(result["risks"])
+            stages.add(result.pop("timings", None))
+            yield result
+
+    store = ResultStore(args.store) if args.incremental else None
+
+    started = time.perf_counter()
+    shipments = _timed(iter_manifest(args.manifest, on_invalid=on_invalid if args.skip_invalid else None),
+                       spent, "load_s")
+    results = iter_analyze_shipments(
+        shipments,
+        chunk_size=args.chunk_size,
+        max_concurrency=args.workers,
+        timeout=args.timeout,
+        use_llm=not args.no_llm,
+        include_message=args.messages,
+        tone=args.tone,
+        incremental=args.incremental,
+        store=store,
+        include_timings=True,
+    )
+    count = write_results(tally(results), output, args.format, timing=spent)
+    total = time.perf_counter() - started
+
+    timing = {
+        "manifest": args.manifest,
+        "output": output,
+        "shipments": count,
+        "risky": risky,
+        "invalid": invalid,
+        "llm": not args.no_llm,
+        "workers": args.workers,
+        "chunk_size": args.chunk_size,
+        "incremental": args.incremental,
+        "load_s": round(spent.get("load_s", 0.0), 4),
+        "analyze_s": round(total - spent.get("load_s", 0.0) - spent.get("write_s", 0.0), 4),
+        "write_s": round(spent.get("write_s", 0.0), 4),
+        "total_s": round(total, 4),
+        "shipments_per_s": round(count / total, 1) if total > 0 else None,
+    }
+    timing["stages"] = stages.summary()
+    if store is not None:
+        timing["reused"] = store.hits
+        timing["recomputed"] = store.misses
+    tokens = token_ledger.snapshot()
+    if tokens:
+        # Budgeted vs. actual Claude tokens per prompt type
+        timing["tokens"] = tokens
+        timing["trimmed_notes"] = token_ledger.trimmed_notes
+        # Identical concurrent prompts (e.g. repeated notes) that shared one request
+        timing["coalescing"] = single_flight.stats()
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        timing["peak_rss_mb"] = round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    with open(timing_path, "w", encoding="utf-8") as f:
+        json.dump(timing, f, indent=2)
+
+    print(json.dumps(timing, indent=2), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
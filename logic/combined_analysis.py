@@ -0,0 +1,95 @@
+# logic/combined_analysis.py
+# One structured Claude call per shipment instead of three separate prompts.
+# The summary, action rationale and cost rationale are requested together as JSON so the
+# shared note context is sent once; if the reply cannot be parsed we fall back to the
+# individual prompt helpers.
+
+import json
+
+from llm.anthropic_client import call_claude, ERROR_PREFIX
+from llm.token_budget import trim_to_tokens
+from logic.summarizer import summarize_risk
+from logic.planner import explain_action
+from logic.cost_analysis import explain_cost_decision
+
+# Fields every combined reply must contain
+REQUIRED_FIELDS = ("summary", "reason", "cost_reason")
+
+_decoder = json.JSONDecoder()
+
+
+def build_combined_prompt(note: str, severity: str, action: str, costs: dict, recommended: str) -> str:
+    note = trim_to_tokens(note)
+    return f"""
+You are a supply chain strategist and logistics analyst.
+
+A shipment risk note has been detected:
+\"\"\"{note}\"\"\"
+
+Severity: {severity}
+Recommended Action: {action.upper()}
+
+Estimated costs for the response options:
+- Penalty: ${costs['penalty']}
+- Reroute: ${costs['reroute']}
+- Expedite: ${costs['expedite']}
+The system recommends the cheapest option: **{recommended.upper()}**.
+
+Reply with a single JSON object and nothing else, using exactly these keys:
+- "summary": the risk note summarized in one sentence.
+- "reason": 4-6 lines on why the recommended action is optimal, considering cost, timing and safety.
+- "cost_reason": a 4-6 line justification of which cost option is most cost-effective and why.
+"""
+
+
+def parse_combined_response(text: str):
+    """
+    Extracts and validates the JSON object from a combined reply.
+
+    Returns:
+        dict | None: The three fields as strings, or None if the reply is unusable.
+    """
+    if not text or text.startswith(ERROR_PREFIX):
+        return None
+    # The first complete JSON object in the reply; prose or code fences around it are ignored
+    data = None
+    start = text.find("{")
+    while start != -1:
+        try:
+            data, _ = _decoder.raw_decode(text, start)
+            break
+        except json.JSONDecodeError:
+            start = text.find("{", start + 1)
+    if not isinstance(data, dict):
+        return None
+
+    fields = {}
+    for name in REQUIRED_FIELDS:
+        value = data.get(name)
+        if not isinstance(value, str) or not value.strip():
+            return None
+        fields[name] = value.strip()
+    return fields
+
+
+def analyze_risk_note(note: str, severity: str, action: str, costs: dict, recommended: str, timeout: float = None) -> dict:
+    """
+    Produces the summary, action rationale and cost rationale for one shipment.
+
+    A single structured call is tried first; on a parse or validation failure the
+    per-function prompts (summarize_risk, explain_action, explain_cost_decision) are used.
+
+    Returns:
+        dict: {"summary", "reason", "cost_reason"} strings.
+    """
+    reply = call_claude(build_combined_prompt(note, severity, action, costs, recommended), timeout=timeout,
+                        prompt_type="combined")
+    fields = parse_combined_response(reply)
+    if fields is not None:
+        return fields
+
+    return {
+        "summary": summarize_risk(note, timeout=timeout),
+        "reason": explain_action(note, severity, action, timeout=timeout),
+        "cost_reason": explain_cost_decision(costs, recommended, timeout=timeout),
+    }
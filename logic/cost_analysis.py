@@ -1,25 +1,180 @@
-from llm.anthropic_client import call_claude
+import json
+import os
+from dataclasses import dataclass, field
 
-def estimate_costs(severity: str, delay_days: int = 2):
+from llm.anthropic_client import call_claude, stream_claude
+
+# Response options, in the column order used by the batch cost matrix
+ACTIONS = ("penalty", "reroute", "expedite")
+
+# numpy is imported inside the functions that need it, so importing this module (and the pipeline)
+# stays cheap for workers that never cost a shipment.
+
+# Optional JSON file describing the cost model (see load_cost_model)
+COST_MODEL_PATH = os.getenv("COST_MODEL_PATH", "")
+
+
+@dataclass
+class RouteRates:
+    """
+    Cost rates for one route, lane or origin hub.
+    """
+    delay_rate: float = 500       # $ per delay day
+    reroute: float = 1800         # Fixed cost
+    expedite: float = 1200        # Fixed cost
+    cargo_value: float = 0        # Value exposed to the SLA penalty curve
+
+
+@dataclass
+class CostModel:
+    """
+    Parameterized cost model.
+
+    Rates are resolved per shipment from the exact route first, then from its lane (the origin and
+    destination pair, e.g. "Shanghai → LA", compared case- and spacing-insensitively), then from its
+    origin hub (the part of the route before "→"), then from the defaults. The SLA curve is a list
+    of (delay days, fraction of cargo value) points, interpolated linearly and added to the penalty.
+    """
+    default: RouteRates = field(default_factory=RouteRates)
+    routes: dict = field(default_factory=dict)
+    lanes: dict = field(default_factory=dict)
+    origins: dict = field(default_factory=dict)
+    sla_curve: list = field(default_factory=lambda: [(0, 0.0)])
+
+    def __post_init__(self):
+        # Normalized lookup tables for lanes and origin hubs
+        self._lanes = {_route_parts(lane): rates for lane, rates in self.lanes.items()}
+        self._origins = {_route_parts(origin)[0]: rates for origin, rates in self.origins.items()}
+
+    def rates_for(self, route=None) -> RouteRates:
+        if route:
+            if route in self.routes:
+                return self.routes[route]
+            origin, destination = _route_parts(route)
+            if (origin, destination) in self._lanes:
+                return self._lanes[(origin, destination)]
+            if origin in self._origins:
+                return self._origins[origin]
+        return self.default
+
+    def sla_fraction(self, delay_days):
+        import numpy as np
+
+        days, fractions = zip(*sorted(self.sla_curve))
+        return np.interp(delay_days, days, fractions)
+
+
+def _route_parts(route: str) -> tuple:
+    # (origin, destination) of an "Origin → Destination" route, lowercased with spacing collapsed
+    origin, _, destination = route.replace("->", "→").partition("→")
+    return " ".join(origin.lower().split()), " ".join(destination.lower().split())
+
+
+def load_cost_model(path: str) -> CostModel:
+    """
+    Loads a cost model from JSON:
+    {"default": {...rates}, "routes": {"A → B": {...}}, "lanes": {"A → B": {...}}, "origins": {"A": {...}},
+     "sla_curve": [[days, fraction], ...]}
+    A "lanes" key without a destination is read as an origin hub, as earlier versions of the file did.
+    """
+    with open(path, "r") as f:
+        raw = json.load(f)
+    lanes, origins = {}, {k: RouteRates(**v) for k, v in raw.get("origins", {}).items()}
+    for key, rates in raw.get("lanes", {}).items():
+        (lanes if _route_parts(key)[1] else origins)[key] = RouteRates(**rates)
+    return CostModel(
+        default=RouteRates(**raw.get("default", {})),
+        routes={k: RouteRates(**v) for k, v in raw.get("routes", {}).items()},
+        lanes=lanes,
+        origins=origins,
+        sla_curve=[tuple(p) for p in raw.get("sla_curve", [(0, 0.0)])],
+    )
+
+
+_model = load_cost_model(COST_MODEL_PATH) if COST_MODEL_PATH else CostModel()
+
+
+def get_cost_model() -> CostModel:
+    return _model
+
+
+def set_cost_model(model: CostModel):
+    global _model
+    _model = model
+
+
+def estimate_costs(severity: str, delay_days: int = 2, route: str = None, model: CostModel = None):
     """
     Simulate basic cost formulas (adjust as needed).
     """
+    model = model or _model
+    rates = model.rates_for(route)
     costs = {
-        "penalty": delay_days * 500,         # $500 per delay day
-        "reroute": 1800,                      # Fixed cost
-        "expedite": 1200                      # Fixed cost
+        "penalty": delay_days * rates.delay_rate,
+        "reroute": rates.reroute,
+        "expedite": rates.expedite
     }
+    if rates.cargo_value:
+        costs["penalty"] += float(rates.cargo_value * model.sla_fraction(delay_days))
 
     if severity == "Low":
         costs["penalty"] = 0
 
     return costs
 
+
+def estimate_costs_batch(severity_array, delay_days_array=2, routes=None, model: CostModel = None) -> "np.ndarray":
+    """
+    Vectorized estimate_costs over many shipments.
+
+    Args:
+        severity_array (array-like): Severity label per shipment.
+        delay_days_array (array-like | int): Delay days per shipment, or one value for all.
+        routes (array-like): Optional route per shipment for route, lane or origin specific rates.
+        model (CostModel): Defaults to the shared cost model.
+
+    Returns:
+        np.ndarray: Cost matrix of shape (n, 3), columns in ACTIONS order.
+    """
+    import numpy as np
+
+    model = model or _model
+    severity = np.asarray(severity_array, dtype=object)
+    n = len(severity)
+    delay_days = np.broadcast_to(np.asarray(delay_days_array, dtype=float), (n,))
+
+    # Resolve rates once per distinct route, then fan them out to every shipment
+    if routes is None:
+        codes = np.zeros(n, dtype=int)
+        table = [model.default]
+    else:
+        distinct, codes = np.unique(np.asarray(routes, dtype=object).astype(str), return_inverse=True)
+        table = [model.rates_for(r) for r in distinct]
+    rate_matrix = np.array([[r.delay_rate, r.reroute, r.expedite, r.cargo_value] for r in table], dtype=float)
+    rates = rate_matrix[codes.ravel()]
+
+    penalty = delay_days * rates[:, 0] + rates[:, 3] * model.sla_fraction(delay_days)
+    penalty = np.where(severity == "Low", 0.0, penalty)
+    return np.column_stack([penalty, rates[:, 1], rates[:, 2]])
+
+
 def recommend_cheapest_action(costs: dict) -> str:
     best = min(costs, key=costs.get)
     return best
 
-def explain_cost_decision(costs: dict, recommended: str):
+
+def recommend_cheapest_action_batch(cost_matrix) -> "np.ndarray":
+    """
+    Vectorized recommend_cheapest_action: argmin over each row of a (n, 3) cost matrix.
+    Ties resolve to the first action in ACTIONS order, as with the scalar version.
+    """
+    import numpy as np
+
+    return np.array(ACTIONS, dtype=object)[np.argmin(np.asarray(cost_matrix), axis=1)]
+
+
+def explain_cost_decision(costs: dict, recommended: str, timeout: float = None, stream: bool = False):
+    # stream=True returns an iterator of text chunks (see stream_claude) instead of the full text
     prompt = f"""
 You are a logistics analyst. Below are the estimated costs for different options in response to a shipment disruption:
 
@@ -31,4 +186,6 @@ Which option is most cost-effective and why? The system recommends: **{recommend
 
 Write a 4–6 line justification.
 """
-    return call_claude(prompt)
+    if stream:
+        return stream_claude(prompt, timeout=timeout, prompt_type="explain_cost")
+    return call_claude(prompt, timeout=timeout, prompt_type="explain_cost")
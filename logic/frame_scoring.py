@@ -0,0 +1,72 @@
+# logic/frame_scoring.py
+# Columnar risk/severity scoring over a pandas DataFrame of shipments.
+# Distinct notes are scanned once with the same single-pass matcher as the scalar functions
+# (RiskMatcher.scan) and the results are fanned back out to every shipment; the severity rules are
+# applied as NumPy masks. This gives the same results as detect_risks and assess_severity without
+# scanning each shipment's note separately.
+
+import numpy as np
+import pandas as pd
+
+from logic.risk_keywords import get_matcher
+
+
+def _scan_distinct(notes: pd.Series, matcher):
+    # Manifests repeat the same notes a lot; scan each distinct note only once.
+    # Returns (codes, scans): the distinct-note index of every row and one RiskScan per distinct note
+    notes = notes.fillna("").astype(str)
+    codes, uniques = pd.factorize(notes)
+    return codes, [matcher.scan(note) for note in uniques]
+
+
+def keyword_mask(notes: pd.Series, matcher=None) -> np.ndarray:
+    """
+    Builds a boolean (shipment x keyword) matrix of matched keywords.
+
+    Args:
+        notes (pd.Series): Free-text notes, one per shipment.
+        matcher (RiskMatcher): Defaults to the shared taxonomy matcher.
+
+    Returns:
+        np.ndarray: Shape (len(notes), len(taxonomy)), columns in taxonomy order.
+    """
+    matcher = matcher or get_matcher()
+    codes, scans = _scan_distinct(notes, matcher)
+    unique_mask = np.zeros((len(scans), len(matcher.taxonomy)), dtype=bool)
+    for i, scan in enumerate(scans):
+        for match in scan.matches:
+            unique_mask[i, matcher.order[match.keyword]] = True
+    return unique_mask[codes]
+
+
+def score_frame(df: pd.DataFrame, matcher=None) -> pd.DataFrame:
+    """
+    Scores every shipment in a DataFrame at once.
+
+    Args:
+        df (pd.DataFrame): Must have a "notes" column; "status" is optional.
+        matcher (RiskMatcher): Defaults to the shared taxonomy matcher.
+
+    Returns:
+        pd.DataFrame: A copy of `df` with "risks" (list of keywords or None), "severity"
+        and "risk_level" columns, matching detect_risks/assess_severity row by row.
+    """
+    matcher = matcher or get_matcher()
+    out = df.copy()
+    codes, scans = _scan_distinct(out["notes"], matcher)
+    max_weight = np.array([scan.max_weight for scan in scans], dtype=int)[codes]
+
+    # Severity from the heaviest keyword, bumped from Medium to High for delayed shipments
+    severity = np.select([max_weight >= 3, max_weight == 2], ["High", "Medium"], default="Low").astype(object)
+    if "status" in out:
+        delayed = out["status"].fillna("").astype(str).str.lower().str.contains("delayed", regex=False).to_numpy()
+        severity[delayed & (severity == "Medium")] = "High"
+
+    # Keyword lists are built once per distinct note; every row gets its own copy
+    unique_risks = [scan.keywords or None for scan in scans]
+    risks = [None if unique_risks[c] is None else list(unique_risks[c]) for c in codes]
+
+    out["risks"] = pd.Series(risks, index=out.index, dtype=object)
+    out["severity"] = severity
+    out["risk_level"] = np.select([max_weight >= 3, max_weight >= 1], ["High", "Medium"], default="Low")
+    return out
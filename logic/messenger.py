@@ -1,6 +1,7 @@
-from llm.anthropic_client import call_claude
+from llm.anthropic_client import call_claude, stream_claude
 
-def generate_update_message(shipment_id, route, severity, summary, action, tone="Formal"):
+def generate_update_message(shipment_id, route, severity, summary, action, tone="Formal", timeout=None, stream=False):
+    # stream=True returns an iterator of text chunks (see stream_claude) instead of the full text
     prompt = f"""
 Write a {tone.lower()} message to the logistics team or client based on the following shipment risk details:
 
@@ -12,4 +13,6 @@ Write a {tone.lower()} message to the logistics team or client based on the foll
 
 Structure the message in 4–6 sentences. Be clear, professional, and informative. If urgent, highlight next steps.
 """
-    return call_claude(prompt)
+    if stream:
+        return stream_claude(prompt, timeout=timeout, prompt_type="message")
+    return call_claude(prompt, timeout=timeout, prompt_type="message")
@@ -0,0 +1,312 @@
+# logic/pipeline.py
+# The shipment analysis pipeline: detect -> severity -> decide -> cost -> summarize/explain -> message.
+# Each stage declares the fields it reads and writes; the pipeline orders stages into waves from
+# those dependencies, runs cheap rule-based stages inline and fans the Claude stages of every
+# shipment in a wave out over one thread pool, and records how long each stage took.
+# The dashboard, the batch API, the CLI and the single-shipment views all run through here.
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
+from typing import Callable, Optional
+
+from logic.risk_keywords import scan_risks
+from logic.severity_score import severity_from_scan
+from logic.summarizer import summarize_risk
+from logic.planner import decide_action, explain_action
+from logic.cost_analysis import estimate_costs, recommend_cheapest_action, explain_cost_decision
+from logic.combined_analysis import analyze_risk_note
+from logic.messenger import generate_update_message
+from utils.metrics import metrics
+
+# Defaults for pipeline runs
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_CALL_TIMEOUT = 60
+
+# Fields a shipment brings into the pipeline
+INPUT_FIELDS = ("id", "route", "status", "notes", "location")
+
+
+@dataclass
+class Stage:
+    """
+    One step of the analysis.
+
+    Attributes:
+        name (str): Stage name, used for skipping and timing.
+        func (callable): func(context, options) -> dict of the fields it produces.
+        requires (tuple): Fields the stage reads (shipment fields or outputs of other stages).
+        provides (tuple): Fields the stage writes.
+        gated (bool): Only run for shipments with detected risks (unless the pipeline disables gating).
+        parallel (bool): Run on the thread pool (Claude calls) rather than inline.
+    """
+    name: str
+    func: Callable
+    requires: tuple = ()
+    provides: tuple = ()
+    gated: bool = True
+    parallel: bool = False
+
+
+@dataclass
+class ShipmentAnalysis:
+    """
+    Result of running the pipeline on one shipment. Fields of stages that did not run stay None.
+    `timings` maps stage name -> seconds spent in that stage.
+    """
+    id: Optional[str] = None
+    route: Optional[str] = None
+    status: str = ""
+    notes: str = ""
+    risks: Optional[list] = None
+    severity: Optional[str] = None
+    action: Optional[str] = None
+    costs: Optional[dict] = None
+    recommended: Optional[str] = None
+    summary: Optional[str] = None
+    reason: Optional[str] = None
+    cost_reason: Optional[str] = None
+    message: Optional[str] = None
+    timings: dict = field(default_factory=dict)
+
+    # Fields always present in to_dict(), even when None
+    BASE_FIELDS = ("id", "route", "status", "notes", "risks", "severity")
+
+    def to_dict(self, include_timings=False) -> dict:
+        """
+        Plain dict in the shape of the batch API: base fields always, stage outputs when produced.
+        """
+        result = {}
+        for f in fields(self):
+            if f.name == "timings":
+                continue
+            value = getattr(self, f.name)
+            if f.name in self.BASE_FIELDS or value is not None:
+                result[f.name] = value
+        if include_timings:
+            result["timings"] = dict(self.timings)
+        return result
+
+
+def _detect(ctx, options):
+    scan = scan_risks(ctx.get("notes") or "")
+    return {"_scan": scan, "risks": scan.keywords or None}
+
+
+def _severity(ctx, options):
+    return {"severity": severity_from_scan(ctx["_scan"], ctx.get("status") or "")}
+
+
+def _decide(ctx, options):
+    return {"action": decide_action(ctx["severity"])}
+
+
+def _cost(ctx, options):
+    costs = estimate_costs(ctx["severity"], route=ctx.get("route"))
+    return {"costs": costs, "recommended": recommend_cheapest_action(costs)}
+
+
+def _summarize(ctx, options):
+    return {"summary": summarize_risk(ctx["notes"], timeout=options["timeout"])}
+
+
+def _explain(ctx, options):
+    return {"reason": explain_action(ctx["notes"], ctx["severity"], ctx["action"], timeout=options["timeout"])}
+
+
+def _explain_cost(ctx, options):
+    return {"cost_reason": explain_cost_decision(ctx["costs"], ctx["recommended"], timeout=options["timeout"])}
+
+
+def _narrate(ctx, options):
+    return analyze_risk_note(ctx["notes"], ctx["severity"], ctx["action"], ctx["costs"], ctx["recommended"],
+                             timeout=options["timeout"])
+
+
+def _message(ctx, options):
+    return {"message": generate_update_message(ctx.get("id"), ctx.get("route"), ctx["severity"], ctx["summary"],
+                                               ctx["action"], tone=options["tone"], timeout=options["timeout"])}
+
+
+# Built-in stages
+DETECT = Stage("detect", _detect, requires=("notes",), provides=("risks",), gated=False)
+SEVERITY = Stage("severity", _severity, requires=("risks", "status"), provides=("severity",), gated=False)
+DECIDE = Stage("decide", _decide, requires=("severity",), provides=("action",))
+COST = Stage("cost", _cost, requires=("severity", "route"), provides=("costs", "recommended"))
+SUMMARIZE = Stage("summarize", _summarize, requires=("notes", "risks"), provides=("summary",), parallel=True)
+EXPLAIN = Stage("explain", _explain, requires=("notes", "severity", "action"), provides=("reason",), parallel=True)
+EXPLAIN_COST = Stage("explain_cost", _explain_cost, requires=("costs", "recommended"), provides=("cost_reason",),
+                     parallel=True)
+# One structured Claude call standing in for summarize, explain and explain_cost
+NARRATE = Stage("narrate", _narrate, requires=("notes", "severity", "action", "costs", "recommended"),
+                provides=("summary", "reason", "cost_reason"), parallel=True)
+MESSAGE = Stage("message", _message, requires=("id", "route", "severity", "summary", "action"),
+                provides=("message",), parallel=True)
+
+RULE_STAGES = (DETECT, SEVERITY, DECIDE, COST)
+
+
+class Pipeline:
+    """
+    Ordered set of stages run over one or many shipments.
+
+    Args:
+        stages (iterable): Stage declarations. Their order only matters between stages that provide
+            the same field (the later one wins).
+        skip (iterable): Names of stages to leave out.
+        parallel (bool): Run parallel stages on a thread pool; when False everything runs inline.
+        max_concurrency (int): Maximum number of parallel stage calls in flight at once.
+        timeout (float): Per-call Claude timeout in seconds, passed to every stage.
+        tone (str): Tone of the update message.
+        gate (bool): Skip gated stages for shipments without detected risks.
+
+    Raises:
+        ValueError: If a stage requires a field no earlier wave provides (e.g. a needed stage was skipped).
+    """
+
+    def __init__(self, stages, skip=(), parallel=True, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 timeout=DEFAULT_CALL_TIMEOUT, tone="Formal", gate=True):
+        skip = set(skip)
+        self.stages = [stage for stage in stages if stage.name not in skip]
+        self.parallel = parallel
+        self.max_concurrency = max_concurrency
+        self.options = {"timeout": timeout, "tone": tone}
+        self.gate = gate
+        self.waves = self._plan()
+
+    def _plan(self):
+        # Wave of a stage = one past the latest wave providing any field it requires
+        level_of_field = {name: -1 for name in INPUT_FIELDS}
+        waves = []
+        remaining = list(self.stages)
+        while remaining:
+            ready = [s for s in remaining if all(r in level_of_field for r in s.requires)]
+            if not ready:
+                missing = sorted({r for s in remaining for r in s.requires if r not in level_of_field})
+                raise ValueError(f"No stage provides {missing} (needed by "
+                                 f"{', '.join(s.name for s in remaining)})")
+            waves.append(ready)
+            for stage in ready:
+                for name in stage.provides:
+                    level_of_field[name] = len(waves) - 1
+                remaining.remove(stage)
+        return waves
+
+    @property
+    def stage_names(self) -> list:
+        return [stage.name for wave in self.waves for stage in wave]
+
+    def _run_stage(self, stage, ctx):
+        start = time.perf_counter()
+        output = stage.func(ctx, self.options)
+        seconds = time.perf_counter() - start
+        metrics.record(f"pipeline.{stage.name}", seconds)
+        return output, seconds
+
+    def run_many(self, shipments) -> list:
+        """
+        Runs the pipeline over many shipments.
+
+        Returns:
+            list: One ShipmentAnalysis per input shipment, in input order.
+        """
+        contexts = [{name: ship.get(name) for name in INPUT_FIELDS} for ship in shipments]
+        for ctx in contexts:
+            ctx["notes"] = ctx["notes"] or ""
+            ctx["status"] = ctx["status"] or ""
+        timings = [{} for _ in contexts]
+
+        pooled = self.parallel and any(stage.parallel for stage in self.stages)
+        pool = ThreadPoolExecutor(max_workers=max(1, self.max_concurrency)) if pooled else None
+        try:
+            for wave in self.waves:
+                pending = []
+                for ctx, timing in zip(contexts, timings):
+                    for stage in wave:
+                        if stage.gated and self.gate and not ctx.get("risks"):
+                            continue
+                        if pool is not None and stage.parallel:
+                            pending.append((ctx, timing, stage.name, pool.submit(self._run_stage, stage, ctx)))
+                        else:
+                            output, seconds = self._run_stage(stage, ctx)
+                            ctx.update(output)
+                            timing[stage.name] = seconds
+                # Collect in submission order; stages of a wave never read each other's output
+                for ctx, timing, name, future in pending:
+                    output, seconds = future.result()
+                    ctx.update(output)
+                    timing[name] = seconds
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        names = {f.name for f in fields(ShipmentAnalysis)} - {"timings"}
+        return [ShipmentAnalysis(**{k: v for k, v in ctx.items() if k in names}, timings=timing)
+                for ctx, timing in zip(contexts, timings)]
+
+    def run(self, shipment) -> ShipmentAnalysis:
+        """
+        Runs the pipeline on a single shipment (its Claude stages still run concurrently).
+        """
+        return self.run_many([shipment])[0]
+
+
+def build_pipeline(use_llm=True, include_plan=True, combined=True, include_message=False, **kwargs) -> Pipeline:
+    """
+    Assembles the standard pipeline.
+
+    Args:
+        use_llm (bool): Include the Claude stages; when False only detection, severity and costing run.
+        include_plan (bool): Include the action and cost explanations; when False only the summary.
+        combined (bool): With include_plan, produce summary and both explanations in one structured call.
+        include_message (bool): Also draft the update message.
+        **kwargs: Passed to Pipeline (skip, parallel, max_concurrency, timeout, tone, gate).
+    """
+    stages = list(RULE_STAGES)
+    if use_llm:
+        if include_plan and combined:
+            stages.append(NARRATE)
+        else:
+            stages.append(SUMMARIZE)
+            if include_plan:
+                stages += [EXPLAIN, EXPLAIN_COST]
+        if include_message:
+            stages.append(MESSAGE)
+    return Pipeline(stages, **kwargs)
+
+
+class StageTimings:
+    """
+    Running per-stage timing totals over many results, without keeping the results.
+    """
+
+    def __init__(self):
+        self.totals = {}
+
+    def add(self, timings):
+        """
+        Adds one result's timings (stage name -> seconds).
+        """
+        for name, seconds in (timings or {}).items():
+            runs, total = self.totals.get(name, (0, 0.0))
+            self.totals[name] = (runs + 1, total + seconds)
+
+    def summary(self) -> dict:
+        """
+        Returns stage -> {"runs", "total_s", "mean_ms"}.
+        """
+        return {
+            name: {"runs": runs, "total_s": round(total, 4), "mean_ms": round(total / runs * 1000, 2)}
+            for name, (runs, total) in self.totals.items()
+        }
+
+
+def stage_timings(analyses) -> dict:
+    """
+    Aggregates per-stage timings over many results (see StageTimings.summary).
+    Accepts ShipmentAnalysis objects or dicts carrying a "timings" entry.
+    """
+    timings = StageTimings()
+    for analysis in analyses:
+        timings.add(analysis.timings if isinstance(analysis, ShipmentAnalysis) else analysis.get("timings"))
+    return timings.summary()
@@ -1,4 +1,5 @@
-from llm.anthropic_client import call_claude
+from llm.anthropic_client import call_claude, stream_claude
+from llm.token_budget import trim_to_tokens
 
 def decide_action(severity: str) -> str:
     """
@@ -11,10 +12,12 @@ def decide_action(severity: str) -> str:
     else:
         return "monitor"
 
-def explain_action(note: str, severity: str, action: str) -> str:
+def explain_action(note: str, severity: str, action: str, timeout: float = None, stream: bool = False) -> str:
     """
     Prompt Claude to explain why the action was chosen.
+    With stream=True, returns an iterator of text chunks (see stream_claude) instead.
     """
+    note = trim_to_tokens(note)
     prompt = f"""
 You are a supply chain strategist.
 
@@ -26,4 +29,6 @@ Recommended Action: {action.upper()}
 
 Please explain in 4-6 lines why this action is optimal. Be professional and consider cost, timing, and safety.
 """
-    return call_claude(prompt)
+    if stream:
+        return stream_claude(prompt, timeout=timeout, prompt_type="explain_action")
+    return call_claude(prompt, timeout=timeout, prompt_type="explain_action")
@@ -0,0 +1,163 @@
+# logic/result_store.py
+# Persistent store of per-shipment analysis results, keyed on shipment content fingerprints.
+# A shipment whose notes, status, route and location are unchanged since the last run gets its
+# stored result back instead of being re-scored and re-sent to Claude.
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Location of the store (overridable through environment variables)
+STORE_PATH = os.getenv("RESULT_STORE_PATH", "data/analysis_results.sqlite")
+
+# Set RESULT_STORE_DISABLED=1 to always recompute every shipment
+STORE_DISABLED = os.getenv("RESULT_STORE_DISABLED", "").lower() in ("1", "true", "yes")
+
+# SQLite's default limit on host parameters per statement is 999
+_LOOKUP_BATCH = 500
+
+
+def shipment_fingerprint(ship: dict) -> str:
+    """
+    Hash of the fields that drive the analysis: notes, status, route and location.
+    """
+    location = ship.get("location") or {}
+    raw = json.dumps(
+        [ship.get("notes") or "", ship.get("status") or "", ship.get("route") or "",
+         location.get("lat"), location.get("lon")],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResultStore:
+    """
+    SQLite-backed store of the latest analysis result per (shipment id, analysis profile).
+
+    The profile names the analysis options a result was produced with (e.g. summary only versus
+    full plan), so a result is only reused for the same kind of analysis.
+
+    Args:
+        path (str): Location of the SQLite file.
+    """
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self.enabled = not STORE_DISABLED
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        # Open lazily so importing the module never touches the disk
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " shipment_id TEXT NOT NULL,"
+                " profile TEXT NOT NULL,"
+                " fingerprint TEXT NOT NULL,"
+                " result TEXT NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " PRIMARY KEY (shipment_id, profile))"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def fetch(self, items, profile: str) -> dict:
+        """
+        Looks up stored results whose fingerprint still matches.
+
+        Args:
+            items (iterable): (shipment_id, fingerprint) pairs.
+            profile (str): Analysis profile the results must have been produced with.
+
+        Returns:
+            dict: (shipment_id, fingerprint) -> stored result, only for pairs whose fingerprint is
+            the stored one. Shipments sharing an id but not their content never get each other's result.
+        """
+        wanted = set(items)
+        if not self.enabled or not wanted:
+            self.misses += len(wanted)
+            return {}
+
+        found = {}
+        ids = sorted({shipment_id for shipment_id, _ in wanted})
+        with self._lock:
+            conn = self._connect()
+            for start in range(0, len(ids), _LOOKUP_BATCH):
+                batch = ids[start:start + _LOOKUP_BATCH]
+                rows = conn.execute(
+                    f"SELECT shipment_id, fingerprint, result FROM results"
+                    f" WHERE profile = ? AND shipment_id IN ({','.join('?' * len(batch))})",
+                    [profile, *batch],
+                ).fetchall()
+                for shipment_id, fingerprint, result in rows:
+                    if (shipment_id, fingerprint) in wanted:
+                        found[(shipment_id, fingerprint)] = json.loads(result)
+            self.hits += len(found)
+            self.misses += len(wanted) - len(found)
+        return found
+
+    def save(self, rows, profile: str):
+        """
+        Stores results, replacing the previous result of each shipment. Only one result is kept
+        per shipment id, so when a manifest repeats an id with different content the last one wins.
+
+        Args:
+            rows (iterable): (shipment_id, fingerprint, result dict) triples.
+            profile (str): Analysis profile the results were produced with.
+        """
+        if not self.enabled:
+            return
+        now = time.time()
+        records = [(shipment_id, profile, fingerprint, json.dumps(result, ensure_ascii=False), now)
+                   for shipment_id, fingerprint, result in rows]
+        if not records:
+            return
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO results (shipment_id, profile, fingerprint, result, updated_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                records,
+            )
+            conn.commit()
+
+    def clear(self):
+        """
+        Removes every stored result and resets the counters.
+        """
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM results")
+            conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        Returns reuse counters and the current number of stored results.
+        """
+        with self._lock:
+            size = self._connect().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "reused": self.hits,
+            "recomputed": self.misses,
+            "reuse_rate": self.hits / lookups if lookups else 0.0,
+            "entries": size,
+            "enabled": self.enabled,
+        }
+
+
+# Process-wide store shared by every incremental analysis
+result_store = ResultStore()
@@ -1,5 +1,5 @@
+from logic.risk_keywords import scan_risks
+
 def detect_risks(shipment):
-    risk_keywords = ["strike", "storm", "typhoon", "delay", "flood", "fire", "hurricane", "protest"]
-    notes = shipment.get("notes", "").lower()
-    risks = [word for word in risk_keywords if word in notes]
+    risks = scan_risks(shipment.get("notes", "")).keywords
     return risks if risks else None
@@ -0,0 +1,145 @@
+# logic/risk_keywords.py
+# Shared risk keyword taxonomy and single-pass matcher.
+# Every keyword maps to a category and a severity weight. The whole taxonomy is compiled once into
+# a single alternation regex with word boundaries, so one pass over a note yields every match,
+# its category and weight ("fire" matches "fires" but no longer "firewall").
+
+import json
+import os
+import re
+from dataclasses import dataclass, field
+
+# keyword -> (category, severity weight). Weight 3 = High, 2 = Medium, 1 = Low.
+DEFAULT_TAXONOMY = {
+    "strike": ("labor", 3),
+    "storm": ("weather", 2),
+    "typhoon": ("weather", 3),
+    "delay": ("schedule", 2),
+    "flood": ("weather", 2),
+    "fire": ("incident", 3),
+    "hurricane": ("weather", 3),
+    "protest": ("civil unrest", 1),
+}
+
+# Optional JSON file overriding the default taxonomy: {"keyword": ["category", weight], ...}
+TAXONOMY_PATH = os.getenv("RISK_TAXONOMY_PATH", "")
+
+WEIGHT_TO_SEVERITY = {3: "High", 2: "Medium", 1: "Low"}
+
+# Inflections accepted after a keyword (storms, delayed, flooding, fired, ...)
+_SUFFIXES = r"(?:s|es|d|ed|ing)?"
+
+
+def _inflections(keyword: str) -> str:
+    # Regex for a keyword and its common inflections, including the spelling changes the plain
+    # suffixes miss: a dropped final "e" (striking), a doubled final consonant (stopped) and
+    # "y" -> "i" (supplies)
+    k = re.escape(keyword)
+    forms = [k + _SUFFIXES]
+    last = keyword[-1:]
+    if last == "e" and len(keyword) > 2:
+        forms.append(re.escape(keyword[:-1]) + "(?:ing|ed)")
+    elif last == "y" and len(keyword) > 2:
+        forms.append(re.escape(keyword[:-1]) + "i(?:es|ed)")
+    elif last.isalpha() and last not in "aeiouwxy":
+        forms.append(k + re.escape(last) + "(?:ing|ed)")
+    return "|".join(forms)
+
+
+@dataclass
+class RiskMatch:
+    keyword: str
+    category: str
+    weight: int
+    start: int
+    end: int
+
+
+@dataclass
+class RiskScan:
+    """
+    Result of one pass over a note: every match plus derived keyword/category/weight views.
+    """
+    matches: list = field(default_factory=list)
+    order: dict = field(default_factory=dict)
+
+    @property
+    def keywords(self) -> list:
+        # Unique matched keywords in taxonomy order
+        return sorted({m.keyword for m in self.matches}, key=self.order.get)
+
+    @property
+    def categories(self) -> list:
+        return sorted({m.category for m in self.matches})
+
+    @property
+    def max_weight(self) -> int:
+        return max((m.weight for m in self.matches), default=0)
+
+    @property
+    def risk_level(self) -> str:
+        """
+        Dashboard risk level: Low without matches, High for any weight-3 keyword, otherwise Medium.
+        """
+        if not self.matches:
+            return "Low"
+        return "High" if self.max_weight >= 3 else "Medium"
+
+
+class RiskMatcher:
+    """
+    Compiles a keyword taxonomy into one case-insensitive, word-bounded regex.
+
+    Args:
+        taxonomy (dict): keyword -> (category, weight).
+    """
+
+    def __init__(self, taxonomy=None):
+        self.taxonomy = {k.lower(): (c, int(w)) for k, (c, w) in (taxonomy or DEFAULT_TAXONOMY).items()}
+        self.order = {k: i for i, k in enumerate(self.taxonomy)}
+        # Longest keywords first so overlapping terms prefer the most specific match; each keyword
+        # gets its own named group, so an inflected form still maps back to its keyword
+        keywords = sorted(self.taxonomy, key=len, reverse=True)
+        self._groups = {f"k{i}": k for i, k in enumerate(keywords)}
+        alternatives = "|".join(f"(?P<{g}>{_inflections(k)})" for g, k in self._groups.items())
+        self.pattern = rf"\b(?:{alternatives})\b"
+        self.regex = re.compile(self.pattern, re.IGNORECASE)
+
+    def scan(self, text: str) -> RiskScan:
+        """
+        Scans a note once and returns every keyword match with its category and weight.
+        """
+        matches = []
+        for m in self.regex.finditer(text or ""):
+            keyword = self._groups[m.lastgroup]
+            category, weight = self.taxonomy[keyword]
+            matches.append(RiskMatch(keyword, category, weight, m.start(), m.end()))
+        return RiskScan(matches=matches, order=self.order)
+
+
+def load_taxonomy(path: str) -> dict:
+    """
+    Loads a taxonomy from a JSON file of the form {"keyword": ["category", weight]}.
+    """
+    with open(path, "r") as f:
+        raw = json.load(f)
+    return {keyword: (entry[0], entry[1]) for keyword, entry in raw.items()}
+
+
+_matcher = RiskMatcher(load_taxonomy(TAXONOMY_PATH) if TAXONOMY_PATH else DEFAULT_TAXONOMY)
+
+
+def get_matcher() -> RiskMatcher:
+    return _matcher
+
+
+def set_taxonomy(taxonomy: dict):
+    """
+    Replaces the shared taxonomy; the new matcher is compiled once and used by every caller.
+    """
+    global _matcher
+    _matcher = RiskMatcher(taxonomy)
+
+
+def scan_risks(text: str) -> RiskScan:
+    return _matcher.scan(text)
@@ -1,17 +1,16 @@
 # logic/severity_score.py
+from logic.risk_keywords import scan_risks, WEIGHT_TO_SEVERITY
 
-def assess_severity(shipment):
-    note = shipment.get("notes", "").lower()
-    status = shipment.get("status", "").lower()
-
-    # Rule-based severity mapping
+def severity_from_scan(scan, status: str = "") -> str:
+    # Severity follows the heaviest matched keyword; "Low" when nothing weighs in
     severity = "Low"
-    if any(word in note for word in ["strike", "typhoon", "hurricane", "fire"]):
-        severity = "High"
-    elif any(word in note for word in ["delay", "storm", "flood"]):
-        severity = "Medium"
+    if scan.max_weight >= 2:
+        severity = WEIGHT_TO_SEVERITY[min(scan.max_weight, 3)]
 
-    if "delayed" in status:
+    if "delayed" in (status or "").lower():
         severity = "High" if severity == "Medium" else severity
 
     return severity
+
+def assess_severity(shipment):
+    return severity_from_scan(scan_risks(shipment.get("notes", "")), shipment.get("status", ""))
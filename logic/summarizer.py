@@ -1,5 +1,10 @@
-from llm.anthropic_client import call_claude
+from llm.anthropic_client import call_claude, stream_claude
+from llm.token_budget import trim_to_tokens
 
-def summarize_risk(note_text):
-    prompt = f"Summarize this shipment risk note in one sentence:\n\n{note_text}"
-    return call_claude(prompt)
+def summarize_risk(note_text, timeout=None, stream=False):
+    # stream=True returns an iterator of text chunks (see stream_claude) instead of the full text
+    # Long notes are trimmed to the note token budget before being sent
+    prompt = f"Summarize this shipment risk note in one sentence:\n\n{trim_to_tokens(note_text)}"
+    if stream:
+        return stream_claude(prompt, timeout=timeout, prompt_type="summary")
+    return call_claude(prompt, timeout=timeout, prompt_type="summary")
@@ -0,0 +1,19 @@
+# tests/conftest.py
+# Shared fixtures: an offline Claude client with a throwaway response cache.
+
+import pytest
+
+from benchmarks.stubs import FakeAnthropic
+from llm import anthropic_client
+from llm.response_cache import ResponseCache
+
+
+@pytest.fixture
+def fake_claude(monkeypatch, tmp_path):
+    """
+    Installs a zero-latency FakeAnthropic client and an empty response cache for one test.
+    """
+    fake = FakeAnthropic(latency=0)
+    monkeypatch.setattr(anthropic_client, "client", fake)
+    monkeypatch.setattr(anthropic_client, "response_cache", ResponseCache(str(tmp_path / "llm_cache.sqlite")))
+    return fake
@@ -0,0 +1,54 @@
+# tests/test_combined_analysis.py
+# Structured summary/action/cost reply: JSON extraction, validation and the per-prompt fallback.
+
+import json
+
+import pytest
+
+from llm.anthropic_client import ERROR_PREFIX
+from logic.combined_analysis import analyze_risk_note, parse_combined_response
+
+FIELDS = {"summary": "Port strike delays cargo.", "reason": "Reroute avoids the strike.", "cost_reason": "Penalty is cheapest."}
+COSTS = {"penalty": 1000, "reroute": 1800, "expedite": 1200}
+
+
+@pytest.mark.parametrize("reply", [
+    json.dumps(FIELDS),
+    f"Here is the analysis:\n```json\n{json.dumps(FIELDS, indent=2)}\n```\nLet me know if you need more.",
+    json.dumps({**FIELDS, "summary": "  Port strike delays cargo.  ", "extra": 1}),
+    f"{json.dumps(FIELDS)}\nNote: costs use the {{route}} rates.",
+])
+def test_json_is_extracted_from_the_reply(reply):
+    assert parse_combined_response(reply) == FIELDS
+
+
+@pytest.mark.parametrize("reply", [
+    "",
+    None,
+    f"{ERROR_PREFIX}: timeout",
+    "No JSON here",
+    '{"summary": "cut off mid-',
+    "{not json} and nothing after",
+    json.dumps({"summary": FIELDS["summary"], "reason": FIELDS["reason"]}),
+    json.dumps({**FIELDS, "cost_reason": ""}),
+    json.dumps({**FIELDS, "reason": ["not", "a", "string"]}),
+])
+def test_malformed_or_partial_replies_are_rejected(reply):
+    assert parse_combined_response(reply) is None
+
+
+def test_one_call_when_the_reply_is_valid(fake_claude):
+    fields = analyze_risk_note("Port strike at the terminal", "High", "reroute", COSTS, "penalty")
+
+    assert fake_claude.calls == 1
+    assert set(fields) == {"summary", "reason", "cost_reason"}
+
+
+def test_partial_reply_falls_back_to_the_individual_prompts(fake_claude):
+    partial = json.dumps({"summary": FIELDS["summary"]})
+    fake_claude.reply_for = lambda prompt: partial if "single JSON object" in prompt else "Fallback text"
+
+    fields = analyze_risk_note("Port strike at the terminal", "High", "reroute", COSTS, "penalty")
+
+    assert fake_claude.calls == 4
+    assert fields == {"summary": "Fallback text", "reason": "Fallback text", "cost_reason": "Fallback text"}
@@ -0,0 +1,58 @@
+# tests/test_cost_analysis.py
+# Cost model: batch and scalar costing agree, including tie-breaking and rate resolution.
+
+import json
+
+import numpy as np
+import pytest
+
+from logic.cost_analysis import (
+    ACTIONS, CostModel, RouteRates, estimate_costs, estimate_costs_batch, load_cost_model,
+    recommend_cheapest_action, recommend_cheapest_action_batch,
+)
+
+MODEL = CostModel(
+    default=RouteRates(),
+    routes={"Shanghai → LA": RouteRates(delay_rate=900)},
+    lanes={"Shanghai → Rotterdam": RouteRates(delay_rate=300, reroute=2500)},
+    origins={"Shanghai": RouteRates(delay_rate=700, cargo_value=10000)},
+    sla_curve=[(0, 0.0), (5, 0.2)],
+)
+ROUTES = ["Shanghai → LA", "shanghai  -> ROTTERDAM", "Shanghai → Busan", "Karachi → Lahore", ""]
+# delay_rate 600 x 2 days ties the penalty with reroute and expedite; Low severity zeroes it
+TIED = CostModel(default=RouteRates(delay_rate=600, reroute=1200, expedite=1200))
+
+
+@pytest.mark.parametrize("model", [MODEL, TIED, CostModel()])
+@pytest.mark.parametrize("delay_days", [0, 2, 7])
+def test_batch_matches_scalar(model, delay_days):
+    severities = [s for s in ("High", "Medium", "Low") for _ in ROUTES]
+    routes = ROUTES * 3
+
+    matrix = estimate_costs_batch(severities, delay_days, routes=routes, model=model)
+    scalar = [estimate_costs(s, delay_days, route=r or None, model=model) for s, r in zip(severities, routes)]
+
+    np.testing.assert_allclose(matrix, [[costs[a] for a in ACTIONS] for costs in scalar])
+    assert list(recommend_cheapest_action_batch(matrix)) == [recommend_cheapest_action(c) for c in scalar]
+
+
+def test_ties_resolve_to_the_first_action():
+    assert recommend_cheapest_action({"penalty": 1200, "reroute": 1200, "expedite": 1200}) == "penalty"
+    assert list(recommend_cheapest_action_batch([[1200, 1200, 1200], [1300, 1000, 1000]])) == ["penalty", "reroute"]
+
+
+def test_rates_resolve_route_then_lane_then_origin():
+    assert MODEL.rates_for("Shanghai → LA").delay_rate == 900
+    assert MODEL.rates_for("SHANGHAI → rotterdam").delay_rate == 300
+    assert MODEL.rates_for("Shanghai → Busan").delay_rate == 700
+    assert MODEL.rates_for("Karachi → Lahore") is MODEL.default
+
+
+def test_origin_only_lanes_load_as_origins(tmp_path):
+    path = tmp_path / "costs.json"
+    path.write_text(json.dumps({"lanes": {"Shanghai": {"delay_rate": 700}, "Shanghai → LA": {"delay_rate": 900}}}))
+    model = load_cost_model(str(path))
+
+    assert set(model.origins) == {"Shanghai"}
+    assert set(model.lanes) == {"Shanghai → LA"}
+    assert model.rates_for("Shanghai → Busan").delay_rate == 700
@@ -0,0 +1,55 @@
+# tests/test_frame_scoring.py
+# The columnar scorer must agree row by row with the scalar detect_risks/assess_severity.
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_frame
+from logic import risk_keywords
+from logic.frame_scoring import keyword_mask, score_frame
+from logic.risk_detection import detect_risks
+from logic.severity_score import assess_severity
+
+
+@pytest.fixture(autouse=True)
+def restore_taxonomy():
+    taxonomy = risk_keywords.get_matcher().taxonomy
+    yield
+    risk_keywords.set_taxonomy(taxonomy)
+
+
+def _assert_matches_scalar(df):
+    scored = score_frame(df)
+    for row, ship in zip(scored.to_dict("records"), df.to_dict("records")):
+        assert row["risks"] == detect_risks(ship)
+        assert row["severity"] == assess_severity(ship)
+
+
+def test_synthetic_frame_matches_scalar():
+    _assert_matches_scalar(generate_frame(2000, seed=3))
+
+
+def test_overlapping_keywords_match_scalar():
+    risk_keywords.set_taxonomy({
+        **risk_keywords.DEFAULT_TAXONOMY,
+        "thunderstorm": ("weather", 3),
+        "port strike": ("labor", 3),
+    })
+    df = pd.DataFrame({
+        "notes": ["Thunderstorm and port strike at the terminal", "Storm warning", "Heavy rain", ""],
+        "status": ["Delayed", "Delayed", "In Transit", ""],
+    })
+    _assert_matches_scalar(df)
+    assert score_frame(df)["risks"].iloc[0] == ["thunderstorm", "port strike"]
+
+
+def test_keyword_mask_columns_follow_taxonomy_order():
+    mask = keyword_mask(pd.Series(["fire and flood", "nothing"]))
+    keywords = list(risk_keywords.get_matcher().taxonomy)
+    assert [keywords[i] for i in mask[0].nonzero()[0]] == ["flood", "fire"]
+    assert not mask[1].any()
+
+
+def test_empty_frame():
+    scored = score_frame(pd.DataFrame({"notes": [], "status": []}))
+    assert scored.empty and list(scored.columns[-3:]) == ["risks", "severity", "risk_level"]
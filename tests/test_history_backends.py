@@ -0,0 +1,78 @@
+# tests/test_history_backends.py
+# JSON Lines risk log: one-time legacy migration and rotation across processes.
+
+import json
+from datetime import datetime, timedelta
+
+from utils.history_archive import RotationPolicy, SegmentArchive
+from utils.history_backends import JsonlBackend
+
+
+def _backend(tmp_path):
+    legacy = tmp_path / "risk_log.json"
+    legacy.write_text(json.dumps([{"id": "LEGACY"}]))
+    return JsonlBackend(
+        str(tmp_path / "risk_log.jsonl"),
+        legacy_path=str(legacy),
+        archive=SegmentArchive(str(tmp_path / "archive")),
+        policy=RotationPolicy(max_bytes=0, max_age_seconds=0, retention_days=0),
+    )
+
+
+def test_legacy_log_is_migrated_once_across_rotations(tmp_path):
+    backend = _backend(tmp_path)
+    for i in range(3):
+        backend.append({"id": f"N{i}"})
+        assert backend.rotate() is not None
+    backend.append({"id": "last"})
+
+    assert [e["id"] for e in backend.iter_entries()] == ["LEGACY", "N0", "N1", "N2", "last"]
+
+
+def test_read_after_rotation_does_not_reimport(tmp_path):
+    backend = _backend(tmp_path)
+    backend.append({"id": "N0"})
+    backend.rotate()
+
+    assert [e["id"] for e in backend.iter_entries()] == ["LEGACY", "N0"]
+    assert [e["id"] for e in backend.iter_entries()] == ["LEGACY", "N0"]
+
+
+def test_existing_live_log_without_marker_counts_as_migrated(tmp_path):
+    # Logs created before the marker file existed
+    backend = _backend(tmp_path)
+    (tmp_path / "risk_log.jsonl").write_text(json.dumps({"id": "LEGACY"}) + "\n")
+
+    assert backend.migrate_legacy() == 0
+    backend.rotate()
+    assert [e["id"] for e in backend.iter_entries()] == ["LEGACY"]
+
+
+def test_rotation_without_pyarrow_uses_gzip_segments(tmp_path, monkeypatch):
+    from utils import history_archive
+    monkeypatch.setattr(history_archive, "_pyarrow", (None, None))
+    backend = _backend(tmp_path)
+    backend.append({"id": "N0"})
+    segment = backend.rotate()
+
+    assert segment.endswith(".jsonl.gz")
+    assert [e["id"] for e in backend.iter_entries()] == ["LEGACY", "N0"]
+
+
+def test_age_rotation_notices_a_rotation_by_another_process(tmp_path):
+    # Two backends on one log stand in for two processes
+    path = str(tmp_path / "risk_log.jsonl")
+    archive = SegmentArchive(str(tmp_path / "archive"))
+    policy = RotationPolicy(max_bytes=0, max_age_seconds=3600, retention_days=0)
+    first = JsonlBackend(path, archive=archive, policy=policy)
+    other = JsonlBackend(path, archive=archive, policy=policy)
+    now = datetime.utcnow()
+
+    first.append({"id": "A", "timestamp": now.isoformat()})
+    other.rotate()
+    # The new live file starts with an entry older than the rotation age
+    JsonlBackend(path).append({"id": "B", "timestamp": (now - timedelta(hours=2)).isoformat()})
+    first.append({"id": "C", "timestamp": now.isoformat()})
+
+    assert len(archive.segments()) == 2
+    assert [e["id"] for e in first.iter_entries()] == ["A", "B", "C"]
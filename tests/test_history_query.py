@@ -0,0 +1,79 @@
+# tests/test_history_query.py
+# Risk log queries: the JSON Lines and SQLite backends answer filters, pages and counts alike.
+
+import pytest
+
+from utils.history import copy_risk_history
+from utils.history_backends import QUERY_FIELDS, JsonlBackend, SqliteBackend
+
+ENTRIES = [
+    {"id": f"S{i % 4}", "route": ("Shanghai → LA", "Karachi → Lahore")[i % 2],
+     "severity": ("High", "Medium", "Low")[i % 3], "action": ("reroute", "expedite", "monitor")[i % 3],
+     "timestamp": f"2026-10-{1 + i:02d}T12:00:00"}
+    for i in range(12)
+]
+
+
+def _fill(backend):
+    for entry in ENTRIES:
+        backend.append(dict(entry))
+    return backend
+
+
+@pytest.fixture(params=["jsonl", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "jsonl":
+        return _fill(JsonlBackend(str(tmp_path / "risk_log.jsonl")))
+    return _fill(SqliteBackend(str(tmp_path / "risk_log.sqlite")))
+
+
+def _ids(entries):
+    return [(e["id"], e["timestamp"][:10]) for e in entries]
+
+
+def _expected(predicate, newest_first=True):
+    matches = [e for e in ENTRIES if predicate(e)]
+    return _ids(reversed(matches) if newest_first else matches)
+
+
+@pytest.mark.parametrize("filters, predicate", [
+    ({}, lambda e: True),
+    ({"id": "S1"}, lambda e: e["id"] == "S1"),
+    ({"route": "Karachi → Lahore"}, lambda e: e["route"] == "Karachi → Lahore"),
+    ({"severity": "High", "route": "Shanghai → LA"}, lambda e: e["severity"] == "High" and e["route"] == "Shanghai → LA"),
+    ({"action": "monitor", "id": None}, lambda e: e["action"] == "monitor"),
+])
+def test_filters(backend, filters, predicate):
+    assert _ids(backend.query(filters)) == _expected(predicate)
+    assert _ids(backend.query(filters, newest_first=False)) == _expected(predicate, newest_first=False)
+
+
+def test_time_window_and_pagination(backend):
+    since, until = "2026-10-03", "2026-10-09"
+    window = lambda e: since <= e["timestamp"] < until
+
+    assert _ids(backend.query({}, since=since, until=until)) == _expected(window)
+    assert _ids(backend.query({}, since=since, until=until, limit=2, offset=1)) == _expected(window)[1:3]
+    assert _ids(backend.query({}, limit=3, newest_first=False)) == _expected(lambda e: True, newest_first=False)[:3]
+
+
+def test_aggregate(backend):
+    assert backend.aggregate("severity", {}) == {"High": 4, "Medium": 4, "Low": 4}
+    assert backend.aggregate("route", {"severity": "High"}) == {"Shanghai → LA": 2, "Karachi → Lahore": 2}
+    assert backend.aggregate("id", {}, since="2026-10-11") == {"S2": 1, "S3": 1}
+
+
+def test_copy_between_backends(tmp_path):
+    source = _fill(JsonlBackend(str(tmp_path / "risk_log.jsonl")))
+    target = SqliteBackend(str(tmp_path / "risk_log.sqlite"))
+
+    assert copy_risk_history(source, target) == len(ENTRIES)
+    assert list(target.iter_entries()) == list(source.iter_entries())
+
+
+def test_every_sqlite_filter_column_is_indexed(tmp_path):
+    backend = SqliteBackend(str(tmp_path / "risk_log.sqlite"))
+    conn = backend._connect()
+    indexed = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    for column in (*QUERY_FIELDS.values(), "timestamp"):
+        assert f"idx_risk_log_{column}" in indexed
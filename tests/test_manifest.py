@@ -0,0 +1,59 @@
+# tests/test_manifest.py
+# Incremental JSON array parsing across read boundaries, and shipment validation.
+
+import io
+import json
+
+import pytest
+
+from utils.manifest import ManifestError, iter_json_array, iter_manifest, validate_shipment
+
+DOCUMENT = '[1, 2.5, -3e+2, "a, b]", {"id": "S1", "tags": [1, 2]}, true, null, 0.125E-1]'
+EXPECTED = json.loads(DOCUMENT)
+
+
+def _parse(text, read_size):
+    return list(iter_json_array(io.StringIO(text), read_size=read_size))
+
+
+def test_numbers_split_across_reads():
+    assert _parse("[1, 2.5]", read_size=2) == [1, 2.5]
+    assert _parse("[1e5, 2]", read_size=2) == [1e5, 2]
+
+
+@pytest.mark.parametrize("read_size", range(1, 9))
+def test_every_read_size_gives_the_same_values(read_size):
+    assert _parse(DOCUMENT, read_size) == EXPECTED
+    assert _parse(" \n[ ]\n", read_size) == []
+
+
+@pytest.mark.parametrize("text", ["[1, 2] x", "[1, 2][3]", "[1, 2.x]", "[1 2]", "[1, 2"])
+@pytest.mark.parametrize("read_size", [1, 3, 1024])
+def test_malformed_arrays_are_rejected(text, read_size):
+    with pytest.raises(ManifestError):
+        _parse(text, read_size)
+
+
+def test_numeric_ids_are_coerced():
+    assert validate_shipment({"id": 42, "route": "A-B"})["id"] == "42"
+    for bad in (True, 1.5, None):
+        with pytest.raises(ManifestError):
+            validate_shipment({"id": bad, "route": "A-B"})
+
+
+def test_numeric_ids_in_every_format(tmp_path):
+    ships = [{"id": 7, "route": "A-B"}, {"id": "S2", "route": "C-D"}]
+    (tmp_path / "m.json").write_text(json.dumps(ships))
+    (tmp_path / "m.jsonl").write_text("\n".join(json.dumps(ship) for ship in ships))
+    (tmp_path / "m.csv").write_text("id,route\n7,A-B\nS2,C-D\n")
+    for name in ("m.json", "m.jsonl", "m.csv"):
+        assert [ship["id"] for ship in iter_manifest(str(tmp_path / name))] == ["7", "S2"]
+
+
+def test_invalid_shipments_are_skipped_when_requested(tmp_path):
+    path = tmp_path / "m.json"
+    path.write_text(json.dumps([{"id": 1, "route": "A-B"}, {"route": "C-D"}, {"id": "S3", "route": "E-F"}]))
+    errors = []
+    ships = list(iter_manifest(str(path), on_invalid=errors.append))
+    assert [ship["id"] for ship in ships] == ["1", "S3"]
+    assert [e.position for e in errors] == [2]
@@ -0,0 +1,67 @@
+# tests/test_news.py
+# News lookups: caching of empty results and article dedup across queries.
+
+import pytest
+
+from utils import news
+
+
+class _Response:
+    def __init__(self, articles):
+        self.articles = articles
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"articles": self.articles}
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(news, "GNEWS_API_KEY", "test")
+    news.news_cache.clear()
+    yield
+    news.news_cache.clear()
+
+
+def test_empty_results_are_cached(monkeypatch):
+    calls = []
+    monkeypatch.setattr(news.transport, "get", lambda url: calls.append(url) or _Response([]))
+
+    assert news.fetch_news("Nowhere") == [{"title": "No relevant news found.", "url": "#"}]
+    assert news.fetch_news("nowhere") == [{"title": "No relevant news found.", "url": "#"}]
+    assert len(calls) == 1
+
+
+def test_empty_results_expire_sooner(monkeypatch):
+    calls = []
+    monkeypatch.setattr(news.transport, "get", lambda url: calls.append(url) or _Response([]))
+    monkeypatch.setattr(news, "NEWS_EMPTY_TTL", 0)
+
+    news.fetch_news("Nowhere")
+    news.fetch_news("Nowhere")
+    assert len(calls) == 2
+
+
+def test_query_with_only_repeated_articles_keeps_its_top_article(monkeypatch):
+    shared = [{"title": "Port closed", "url": "https://news.example/port"}]
+    monkeypatch.setattr(news, "fetch_news", lambda query, max_articles=3: list(shared))
+
+    results = news.fetch_news_many(["Shanghai → LA", "Tokyo → NY"])
+
+    assert results["Shanghai → LA"] == shared
+    assert results["Tokyo → NY"] == shared
+
+
+def test_articles_are_not_repeated_across_queries(monkeypatch):
+    articles = {
+        "la shanghai": [{"title": "A", "url": "https://news.example/a"}, {"title": "B", "url": "https://news.example/b"}],
+        "ny tokyo": [{"title": "A", "url": "https://news.example/a"}, {"title": "C", "url": "https://news.example/c"}],
+    }
+    monkeypatch.setattr(news, "fetch_news", lambda query, max_articles=3: list(articles[query]))
+
+    results = news.fetch_news_many(["Shanghai → LA", "Tokyo → NY"])
+
+    assert [a["title"] for a in results["Shanghai → LA"]] == ["A", "B"]
+    assert [a["title"] for a in results["Tokyo → NY"]] == ["C"]
@@ -0,0 +1,87 @@
+# tests/test_pipeline.py
+# Analysis pipeline: wave planning, unmet requirements, risk gating and skipping stages by name.
+
+import pytest
+
+from logic.combined_analysis import analyze_risk_note
+from logic.cost_analysis import estimate_costs, recommend_cheapest_action
+from logic.pipeline import MESSAGE, RULE_STAGES, SUMMARIZE, Pipeline, build_pipeline
+from logic.planner import decide_action
+from logic.risk_detection import detect_risks
+from logic.severity_score import assess_severity
+
+RISKY = {"id": "S1", "route": "Shanghai → LA", "status": "Delayed", "notes": "Storm and port strike"}
+CLEAR = {"id": "S2", "route": "Busan → LA", "status": "In Transit", "notes": "No issues reported"}
+
+
+def _waves(pipeline):
+    return [[stage.name for stage in wave] for wave in pipeline.waves]
+
+
+@pytest.mark.parametrize("options, waves", [
+    ({"use_llm": False}, [["detect"], ["severity"], ["decide", "cost"]]),
+    ({}, [["detect"], ["severity"], ["decide", "cost"], ["narrate"]]),
+    ({"combined": False}, [["detect"], ["severity", "summarize"], ["decide", "cost"], ["explain", "explain_cost"]]),
+    ({"include_plan": False, "include_message": True},
+     [["detect"], ["severity", "summarize"], ["decide", "cost"], ["message"]]),
+    ({"include_message": True}, [["detect"], ["severity"], ["decide", "cost"], ["narrate"], ["message"]]),
+])
+def test_stages_are_planned_into_dependency_waves(options, waves):
+    assert _waves(build_pipeline(**options)) == waves
+
+
+def test_unmet_requirements_are_rejected():
+    with pytest.raises(ValueError, match="summary"):
+        Pipeline([*RULE_STAGES, MESSAGE])
+    with pytest.raises(ValueError, match="summary"):
+        build_pipeline(include_message=True, skip=("narrate",))
+    with pytest.raises(ValueError, match="costs"):
+        build_pipeline(skip=("cost",))
+
+
+def test_stages_are_skipped_by_name():
+    pipeline = build_pipeline(use_llm=False, skip=("decide",))
+    result = pipeline.run(RISKY).to_dict()
+
+    assert pipeline.stage_names == ["detect", "severity", "cost"]
+    assert "action" not in result and result["costs"] is not None
+
+
+def test_gated_stages_only_run_for_risky_shipments(fake_claude):
+    risky, clear = build_pipeline().run_many([RISKY, CLEAR])
+
+    assert set(risky.timings) == {"detect", "severity", "decide", "cost", "narrate"}
+    assert set(clear.timings) == {"detect", "severity"}
+    assert clear.to_dict() == {"id": "S2", "route": "Busan → LA", "status": "In Transit",
+                               "notes": "No issues reported", "risks": None, "severity": "Low"}
+    assert fake_claude.calls == 1
+
+    ungated = build_pipeline(use_llm=False, gate=False).run(CLEAR)
+    assert ungated.action is not None and ungated.costs is not None
+
+
+def test_results_match_the_stage_functions(fake_claude):
+    result = build_pipeline().run(RISKY).to_dict()
+
+    severity = assess_severity(RISKY)
+    costs = estimate_costs(severity, route=RISKY["route"])
+    expected = {
+        **RISKY,
+        "risks": detect_risks(RISKY),
+        "severity": severity,
+        "action": decide_action(severity),
+        "costs": costs,
+        "recommended": recommend_cheapest_action(costs),
+        **analyze_risk_note(RISKY["notes"], severity, decide_action(severity), costs, recommend_cheapest_action(costs)),
+    }
+    assert result == expected
+
+
+def test_inline_and_pooled_runs_agree(fake_claude):
+    shipments = [RISKY, CLEAR, dict(RISKY, id="S3", notes="Typhoon warning")]
+    pooled = build_pipeline(combined=False, include_message=True).run_many(shipments)
+    inline = build_pipeline(combined=False, include_message=True, parallel=False).run_many(shipments)
+
+    assert [a.to_dict() for a in pooled] == [a.to_dict() for a in inline]
+    assert all(a.summary for a in pooled if a.risks)
+    assert SUMMARIZE.name in pooled[0].timings
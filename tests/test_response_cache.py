@@ -0,0 +1,93 @@
+# tests/test_response_cache.py
+# SQLite response cache: TTL expiry, LRU eviction and the call_claude bypasses.
+
+from types import SimpleNamespace
+
+import pytest
+
+from llm import anthropic_client, response_cache as response_cache_module
+from llm.anthropic_client import ERROR_PREFIX, call_claude
+from llm.response_cache import ResponseCache, make_cache_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(response_cache_module, "time", SimpleNamespace(time=lambda: now.value))
+    return now
+
+
+def _cache(tmp_path, **kwargs):
+    return ResponseCache(str(tmp_path / "cache.sqlite"), **kwargs)
+
+
+def test_cache_key_covers_every_request_field():
+    base = make_cache_key("model", "system", "prompt", 100)
+    assert base == make_cache_key("model", "system", "prompt", 100)
+    assert len({base, make_cache_key("other", "system", "prompt", 100), make_cache_key("model", "other", "prompt", 100),
+                make_cache_key("model", "system", "other", 100), make_cache_key("model", "system", "prompt", 200)}) == 5
+
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = _cache(tmp_path, ttl=60)
+    cache.set("k", "reply")
+    clock.value += 59
+    assert cache.get("k") == "reply"
+    clock.value += 2
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_zero_ttl_never_expires(tmp_path, clock):
+    cache = _cache(tmp_path, ttl=0)
+    cache.set("k", "reply")
+    clock.value += 10 ** 9
+    assert cache.get("k") == "reply"
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path, clock):
+    cache = _cache(tmp_path, max_entries=2)
+    cache.set("a", "1")
+    clock.value += 1
+    cache.set("b", "2")
+    clock.value += 1
+    assert cache.get("a") == "1"
+    clock.value += 1
+    cache.set("c", "3")
+
+    assert [cache.get(k) for k in ("a", "b", "c")] == ["1", None, "3"]
+
+
+def test_disabled_cache_stores_nothing(tmp_path, monkeypatch):
+    monkeypatch.setattr(response_cache_module, "CACHE_DISABLED", True)
+    cache = _cache(tmp_path)
+    cache.set("k", "reply")
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_repeated_prompts_are_served_from_the_cache(fake_claude):
+    first = call_claude("Summarize the delay")
+    second = call_claude("Summarize the delay")
+
+    assert second == first
+    assert fake_claude.calls == 1
+    assert anthropic_client.response_cache.hits == 1
+
+
+def test_use_cache_false_bypasses_the_cache(fake_claude):
+    call_claude("Summarize the delay", use_cache=False)
+    call_claude("Summarize the delay", use_cache=False)
+
+    assert fake_claude.calls == 2
+    assert anthropic_client.response_cache.stats()["entries"] == 0
+
+
+def test_error_replies_are_not_cached(fake_claude):
+    fake_claude.error_rate = 1.0
+    assert call_claude("Summarize the delay").startswith(ERROR_PREFIX)
+
+    fake_claude.error_rate = 0.0
+    reply = call_claude("Summarize the delay")
+    assert not reply.startswith(ERROR_PREFIX)
+    assert fake_claude.calls == 2
@@ -0,0 +1,73 @@
+# tests/test_result_store.py
+# Incremental re-analysis: stored results are reused only for unchanged shipments and inputs.
+
+import pytest
+
+from logic import risk_keywords
+from logic.batch import analyze_shipments
+from logic.cost_analysis import CostModel, RouteRates, get_cost_model, set_cost_model
+from logic.result_store import ResultStore
+
+SHIPMENTS = [
+    {"id": "S1", "route": "Karachi → Lahore", "status": "In Transit", "notes": "Protest near the port gate"},
+    {"id": "S2", "route": "Busan → LA", "status": "In Transit", "notes": "No issues reported"},
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultStore(str(tmp_path / "results.sqlite"))
+
+
+@pytest.fixture(autouse=True)
+def restore_models():
+    taxonomy, model = risk_keywords.get_matcher().taxonomy, get_cost_model()
+    yield
+    risk_keywords.set_taxonomy(taxonomy)
+    set_cost_model(model)
+
+
+def _analyze(store):
+    return analyze_shipments(SHIPMENTS, use_llm=False, incremental=True, store=store)
+
+
+def test_unchanged_shipments_are_reused(store):
+    first = _analyze(store)
+    second = _analyze(store)
+
+    assert second == first
+    assert store.hits == 2
+
+
+def test_changed_notes_are_recomputed(store):
+    _analyze(store)
+    changed = [dict(SHIPMENTS[0], notes="Typhoon warning issued"), SHIPMENTS[1]]
+    results = analyze_shipments(changed, use_llm=False, incremental=True, store=store)
+
+    assert results[0]["severity"] == "High"
+    assert store.misses == 3
+
+
+def test_taxonomy_and_cost_model_changes_invalidate_stored_results(store):
+    _analyze(store)
+    risk_keywords.set_taxonomy({**risk_keywords.DEFAULT_TAXONOMY, "protest": ("labor", 3)})
+    set_cost_model(CostModel(default=RouteRates(delay_rate=5000)))
+
+    incremental = _analyze(store)
+    fresh = analyze_shipments(SHIPMENTS, use_llm=False)
+
+    assert incremental == fresh
+    assert incremental[0]["severity"] == "High"
+    assert incremental[0]["costs"]["penalty"] == 10000
+
+
+def test_duplicate_ids_get_their_own_results(store):
+    shipments = [
+        {"id": "S1", "route": "Shanghai → LA", "status": "In Transit", "notes": "Port strike at the terminal"},
+        {"id": "S1", "route": "Tokyo → NY", "status": "In Transit", "notes": "Clear skies"},
+    ]
+    first = analyze_shipments(shipments, use_llm=False, incremental=True, store=store)
+    second = analyze_shipments(shipments, use_llm=False, incremental=True, store=store)
+
+    assert second == first
+    assert [(r["route"], r["risks"]) for r in second] == [("Shanghai → LA", ["strike"]), ("Tokyo → NY", None)]
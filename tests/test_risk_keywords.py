@@ -0,0 +1,54 @@
+# tests/test_risk_keywords.py
+# Single-pass keyword matcher: word boundaries, inflections and severity/risk level rules.
+
+import pytest
+
+from logic.risk_detection import detect_risks
+from logic.risk_keywords import DEFAULT_TAXONOMY, RiskMatcher
+from logic.severity_score import assess_severity
+
+matcher = RiskMatcher(DEFAULT_TAXONOMY)
+
+
+@pytest.mark.parametrize("note", ["Firewall upgrade at the depot", "Stormy weather", "Predelay check", "Restrike"])
+def test_keywords_match_whole_words_only(note):
+    assert matcher.scan(note).matches == []
+
+
+@pytest.mark.parametrize("note, keyword", [
+    ("Dock workers striking since Monday", "strike"),
+    ("Workers struck", None),
+    ("Two storms ahead", "storm"),
+    ("Departure delayed", "delay"),
+    ("Flooding on the highway", "flood"),
+    ("Warehouse fires", "fire"),
+    ("Warehouse fired up", "fire"),
+    ("HURRICANES offshore", "hurricane"),
+])
+def test_inflected_forms_map_to_their_keyword(note, keyword):
+    assert matcher.scan(note).keywords == ([keyword] if keyword else [])
+
+
+def test_spelling_changes_are_matched_for_any_keyword():
+    custom = RiskMatcher({"shortage": ("supply", 2), "stop": ("schedule", 2), "supply": ("supply", 1)})
+    assert custom.scan("Shortages, trucks stopped, supplies late").keywords == ["shortage", "stop", "supply"]
+
+
+def test_longest_keyword_wins_on_overlap():
+    custom = RiskMatcher({"strike": ("labor", 3), "port strike": ("labor", 2)})
+    scan = custom.scan("Port strike at the terminal, then a strike at the plant")
+    assert [m.keyword for m in scan.matches] == ["port strike", "strike"]
+
+
+def test_hurricane_is_high_risk():
+    # Every weight-3 keyword is High on the Dashboard, in line with severity scoring
+    scan = matcher.scan("Hurricane warning")
+    assert scan.risk_level == "High"
+    assert assess_severity({"notes": "Hurricane warning"}) == "High"
+
+
+def test_scalar_functions_share_the_scan():
+    ship = {"notes": "Storm and protest near the port", "status": "Delayed"}
+    assert detect_risks(ship) == ["storm", "protest"]
+    assert assess_severity(ship) == "High"
+    assert detect_risks({"notes": "All clear"}) is None
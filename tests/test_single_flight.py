@@ -0,0 +1,109 @@
+# tests/test_single_flight.py
+# Request coalescing: concurrent identical Claude calls share one upstream request.
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from llm import anthropic_client
+from llm.anthropic_client import call_claude
+from llm.single_flight import SingleFlight
+
+
+@pytest.fixture
+def flight(monkeypatch):
+    flight = SingleFlight()
+    monkeypatch.setattr(anthropic_client, "single_flight", flight)
+    return flight
+
+
+def _run_concurrently(func, n):
+    barrier = threading.Barrier(n)
+
+    def run(_):
+        barrier.wait()
+        return func()
+
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        return list(pool.map(run, range(n)))
+
+
+def test_identical_concurrent_calls_make_one_request(fake_claude, flight):
+    fake_claude.latency = 0.3
+    replies = _run_concurrently(lambda: call_claude("Summarize the delay", use_cache=False), 10)
+
+    assert fake_claude.calls == 1
+    assert len(set(replies)) == 1
+    assert flight.stats()["leaders"] == 1
+    assert flight.stats()["coalesced"] == 9
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_different_prompts_are_not_coalesced(fake_claude, flight):
+    fake_claude.latency = 0.1
+    prompts = iter([f"Prompt {i}" for i in range(4)])
+    lock = threading.Lock()
+
+    def call():
+        with lock:
+            prompt = next(prompts)
+        return call_claude(prompt, use_cache=False)
+
+    _run_concurrently(call, 4)
+    assert fake_claude.calls == 4
+    assert flight.coalesced == 0
+
+
+def test_an_error_is_raised_in_every_caller():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("upstream failed")
+
+    def waiter():
+        started.wait(5)
+        return flight.do("key", lambda: "not called", timeout=5)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, "key", failing)
+        follower = pool.submit(waiter)
+        while flight.stats()["waiting"] == 0:
+            time.sleep(0.001)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(RuntimeError, match="upstream failed"):
+                future.result()
+
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_a_waiter_times_out_without_cancelling_the_request():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return "reply"
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        leader = pool.submit(flight.do, "key", slow)
+        started.wait(5)
+        with pytest.raises(TimeoutError):
+            flight.do("key", lambda: "not called", timeout=0.05)
+        release.set()
+        assert leader.result() == ("reply", False)
+
+
+def test_disabled_single_flight_calls_through():
+    flight = SingleFlight()
+    flight.enabled = False
+    assert flight.do("key", lambda: "reply") == ("reply", False)
+    assert flight.stats()["leaders"] == 0
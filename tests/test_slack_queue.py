@@ -0,0 +1,45 @@
+# tests/test_slack_queue.py
+# Slack delivery queue against the local webhook stub: coalescing, retries and failure timing.
+
+import time
+
+from utils.slack_queue import SlackDeliveryQueue
+from utils.slack_stub import StubSlackWebhook
+
+
+def test_alerts_are_coalesced_into_one_digest():
+    with StubSlackWebhook() as hook:
+        queue = SlackDeliveryQueue(hook.url, rate=100, digest_window=0.2)
+        tickets = [queue.enqueue(f"alert {i}") for i in range(3)]
+        assert all(ticket.wait(5) for ticket in tickets)
+        queue.close(5)
+
+    assert len(hook.received) == 1
+    assert "3 shipment alerts" in hook.received[0]["text"]
+
+
+def test_server_errors_are_retried_until_sent():
+    with StubSlackWebhook() as hook:
+        hook.fail_next(500, times=2)
+        queue = SlackDeliveryQueue(hook.url, rate=100, digest_window=0, max_backoff=0.01)
+        ticket = queue.enqueue("alert")
+        assert ticket.wait(5)
+        queue.close(5)
+
+    assert ticket.attempts == 3
+    assert hook.requests == 3
+
+
+def test_no_backoff_after_the_last_attempt():
+    with StubSlackWebhook() as hook:
+        hook.fail_next(500, times=2)
+        queue = SlackDeliveryQueue(hook.url, rate=100, digest_window=0, max_retries=2, max_backoff=1.0)
+        start = time.monotonic()
+        ticket = queue.enqueue("alert")
+        assert not ticket.wait(10)
+        elapsed = time.monotonic() - start
+        queue.close(5)
+
+    assert ticket.status == "failed"
+    # One 1 s backoff between the two attempts, none after the second
+    assert elapsed < 1.8
@@ -0,0 +1,53 @@
+# tests/test_streaming.py
+# Streamed Claude replies: caching, errors and consumers that stop reading early.
+
+import pytest
+
+from llm import anthropic_client
+from llm.anthropic_client import ERROR_PREFIX, stream_claude
+from utils.metrics import MetricsRegistry
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = MetricsRegistry(trace_path="")
+    monkeypatch.setattr(anthropic_client, "metrics", registry)
+    return registry
+
+
+def _stream_stats(registry):
+    return registry.snapshot("llm.stream_claude")["llm.stream_claude"]
+
+
+def test_completed_stream_is_cached(fake_claude, registry):
+    text = "".join(stream_claude("Explain the delay"))
+
+    assert list(stream_claude("Explain the delay")) == [text]
+    assert fake_claude.calls == 1
+    assert _stream_stats(registry)["errors"] == 0
+
+
+def test_closed_stream_is_not_a_failure(fake_claude, registry):
+    chunks = stream_claude("Explain the delay")
+    next(chunks)
+    chunks.close()
+
+    assert _stream_stats(registry)["errors"] == 0
+    assert anthropic_client.response_cache.stats()["entries"] == 0
+
+
+def test_closed_replay_of_a_cached_reply_is_not_a_failure(fake_claude, registry):
+    "".join(stream_claude("Explain the delay"))
+    replay = stream_claude("Explain the delay")
+    next(replay)
+    replay.close()
+
+    assert _stream_stats(registry)["errors"] == 0
+
+
+def test_upstream_error_is_yielded_and_counted(fake_claude, registry):
+    fake_claude.error_rate = 1.0
+    chunks = list(stream_claude("Explain the delay"))
+
+    assert chunks[-1].startswith(ERROR_PREFIX)
+    assert _stream_stats(registry)["errors"] == 1
@@ -0,0 +1,73 @@
+# tests/test_token_budget.py
+# Token budgets: per-type overrides, token counting with and without tiktoken, and note trimming.
+
+import pytest
+
+from llm import token_budget
+from llm.token_budget import TRIM_MARKER, budget_for, count_tokens, load_budgets, token_ledger, trim_to_tokens
+
+
+class _WordEncoding:
+    # Stands in for a tiktoken encoding: one token per space-separated word
+    def encode(self, text, disallowed_special=()):
+        return text.split(" ")
+
+    def decode(self, tokens):
+        return " ".join(tokens)
+
+
+@pytest.fixture
+def no_tiktoken(monkeypatch):
+    monkeypatch.setattr(token_budget, "_encoding", False)
+
+
+@pytest.fixture
+def word_encoding(monkeypatch):
+    monkeypatch.setattr(token_budget, "_encoding", _WordEncoding())
+
+
+def test_budgets_can_be_overridden_per_type():
+    budgets = load_budgets({"CLAUDE_MAX_TOKENS_SUMMARY": "150", "CLAUDE_MAX_TOKENS_UNKNOWN": "9"})
+
+    assert budgets["summary"] == 150
+    assert budgets["chat"] == token_budget.DEFAULT_BUDGETS["chat"]
+    assert set(budgets) == set(token_budget.DEFAULT_BUDGETS)
+
+
+def test_budget_for_unknown_types_uses_the_default():
+    assert budget_for("summary") == token_budget.BUDGETS["summary"]
+    assert budget_for(None, 3048) == 3048
+
+
+def test_character_estimate_without_tiktoken(no_tiktoken):
+    assert count_tokens("") == 0
+    assert count_tokens("abcd") == 1
+    assert count_tokens("abcde") == 2
+
+
+def test_short_notes_are_not_trimmed(no_tiktoken):
+    assert trim_to_tokens("Port strike", max_tokens=10) == "Port strike"
+
+
+def test_trim_keeps_two_thirds_head_and_the_tail_without_tiktoken(no_tiktoken):
+    note = "".join(chr(ord("a") + i % 26) for i in range(4000))
+    before = token_ledger.trimmed_notes
+
+    trimmed = trim_to_tokens(note, max_tokens=30)
+
+    head, tail = trimmed.split(TRIM_MARKER)
+    assert note.startswith(head) and len(head) == 20 * 4
+    assert note.endswith(tail) and len(tail) == 7 * 4
+    assert count_tokens(trimmed) <= 30
+    assert token_ledger.trimmed_notes == before + 1
+
+
+def test_trim_splits_on_tokens_with_an_encoding(word_encoding):
+    note = " ".join(f"w{i}" for i in range(100))
+
+    trimmed = trim_to_tokens(note, max_tokens=30)
+
+    head, tail = trimmed.split(TRIM_MARKER)
+    assert head.split(" ") == [f"w{i}" for i in range(20)]
+    assert tail.split(" ") == [f"w{i}" for i in range(93, 100)]
+    assert count_tokens(note) == 100
@@ -0,0 +1,99 @@
+# tests/test_transport.py
+# Retry policy of the shared HTTP transport: POSTs are never repeated once the server may have
+# acted on them.
+
+import socket
+import threading
+
+import pytest
+
+from benchmarks.stubs import StubAPIServer
+from utils import transport
+from utils.slack_stub import StubSlackWebhook
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(transport, "_backoff_delay", lambda attempt, response=None: 0)
+
+
+def test_post_is_not_retried_on_server_error():
+    with StubSlackWebhook() as hook:
+        hook.fail_next(500, times=3)
+        response = transport.post(hook.url, json={"text": "alert"}, retries=3)
+
+    assert response.status_code == 500
+    assert hook.requests == 1
+
+
+def test_post_is_retried_on_429():
+    with StubSlackWebhook() as hook:
+        hook.fail_next(429, times=2, retry_after=0)
+        response = transport.post(hook.url, json={"text": "alert"}, retries=3)
+
+    assert response.status_code == 200
+    assert hook.requests == 3
+    assert len(hook.received) == 1
+
+
+def test_get_is_retried_on_server_error():
+    with StubAPIServer(error_rate=1.0) as api:
+        response = transport.get(f"{api.url}/weather?lat=1&lon=2", retries=2)
+
+    assert response.status_code == 500
+    assert api.requests == 3
+
+
+def test_post_is_retried_on_connection_error():
+    # Nothing listens on the port: the request cannot have reached a server
+    with StubSlackWebhook() as hook:
+        url = hook.url
+    calls = []
+    original = transport._host(url).session.request
+
+    def counting(*args, **kwargs):
+        calls.append(1)
+        return original(*args, **kwargs)
+
+    transport._host(url).session.request = counting
+    try:
+        with pytest.raises(transport.requests.exceptions.ConnectionError):
+            transport.post(url, json={"text": "alert"}, retries=2)
+    finally:
+        transport._host(url).session.request = original
+    assert len(calls) == 3
+
+
+def test_post_is_not_retried_when_the_connection_drops_after_sending():
+    # The server reads the whole request, then closes the socket without answering
+    received = []
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+
+    def serve():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            with conn:
+                data = b""
+                while b"\r\n\r\n" not in data:
+                    data += conn.recv(4096)
+                head, body = data.split(b"\r\n\r\n", 1)
+                length = int(next(line.split(b":")[1] for line in head.split(b"\r\n")
+                                  if line.lower().startswith(b"content-length")))
+                while len(body) < length:
+                    body += conn.recv(4096)
+                received.append(body)
+
+    threading.Thread(target=serve, daemon=True).start()
+    url = f"http://127.0.0.1:{server.getsockname()[1]}/hook"
+    try:
+        with pytest.raises(transport.requests.exceptions.ConnectionError):
+            transport.post(url, json={"text": "alert"}, retries=3)
+    finally:
+        server.close()
+
+    assert len(received) == 1
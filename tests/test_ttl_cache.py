@@ -0,0 +1,75 @@
+# tests/test_ttl_cache.py
+# TTL cache: expiry, LRU size bound, and weather served stale when a refresh fails.
+
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.stubs import StubAPIServer
+from utils import transport, ttl_cache, weather
+from utils.ttl_cache import TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=100.0)
+    monkeypatch.setattr(ttl_cache, "time", SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = TTLCache(ttl=10)
+    cache.set("k", "v")
+    clock.value += 10
+    assert cache.get("k") == "v"
+    clock.value += 1
+    assert cache.get("k") is None
+    assert cache.lookup("k") == ("v", False)
+    assert cache.stats()["stale"] == 2
+
+
+def test_per_entry_ttl_and_later_ttl_changes(clock):
+    cache = TTLCache(ttl=10)
+    cache.set("short", "v", ttl=1)
+    cache.set("default", "v")
+    clock.value += 2
+    assert cache.get("short") is None
+    assert cache.get("default") == "v"
+
+    cache.ttl = 1
+    assert cache.get("default") is None
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert [cache.get(k) for k in ("a", "b", "c")] == [1, None, 3]
+    assert cache.stats()["entries"] == 2
+
+
+@pytest.fixture
+def weather_api(monkeypatch):
+    monkeypatch.setattr(transport, "_backoff_delay", lambda attempt, response=None: 0)
+    with StubAPIServer() as api:
+        monkeypatch.setattr(weather, "WEATHER_API_URL", f"{api.url}/weather")
+        monkeypatch.setattr(weather, "API_KEY", "test")
+        weather.weather_cache.clear()
+        yield api
+    weather.weather_cache.clear()
+
+
+def test_stale_weather_is_served_when_the_refresh_fails(weather_api, clock):
+    first = weather.get_weather(31.2, 121.5)
+    assert "error" not in first
+
+    clock.value += weather.weather_cache.ttl + 1
+    weather_api.error_rate = 1.0
+    assert weather.get_weather(31.2, 121.5) == first
+    assert weather.get_weather_bulk([(31.2, 121.5)]) == {(31.2, 121.5): first}
+    # Errors are never cached, and nothing stale exists for a new cell
+    assert "error" in weather.get_weather(-10.0, 20.0)
+    assert weather.weather_cache.lookup(weather.snap_to_grid(-10.0, 20.0)) == (None, False)
@@ -0,0 +1,162 @@
+# utils/app_cache.py
+# Caching layer for the Streamlit app, so widget interactions do not redo file loads, scoring
+# or Claude calls.
+#   - Process-wide (st.cache_data, shared by every session): the shipment manifest, the scored
+#     dashboard frame and batch analyses. Entries are keyed on the size and modification time of
+#     the manifest, risk taxonomy and cost model files, so editing any of them invalidates them.
+#   - Per session (st.session_state): texts a user generated interactively, such as update messages
+#     in a chosen tone.
+# Weather is not cached here: utils.weather already keeps a process-wide, grid-keyed TTL cache
+# that never stores errors.
+
+import os
+
+import streamlit as st
+
+from llm.anthropic_client import ERROR_PREFIX
+from logic.batch import analyze_shipments, result_has_error
+from logic.result_store import result_store
+from logic.cost_analysis import estimate_costs_batch, ACTIONS, COST_MODEL_PATH
+from logic.risk_keywords import TAXONOMY_PATH
+from utils.manifest import load_manifest
+
+# Upper bound on cached variants per function (e.g. different manifests or analysis options)
+APP_CACHE_MAX_ENTRIES = int(os.getenv("APP_CACHE_MAX_ENTRIES", "16"))
+
+# Session state key holding per-session memoized values
+SESSION_KEY = "_app_cache"
+
+
+def file_signature(*paths) -> tuple:
+    """
+    (path, mtime_ns, size) of every given file; missing or unset paths contribute None.
+    Used as part of cache keys so entries are invalidated when an input file changes.
+    """
+    signature = []
+    for path in paths:
+        if not path:
+            continue
+        try:
+            stat = os.stat(path)
+        except OSError:
+            signature.append((path, None, None))
+        else:
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def _signature(path):
+    # Scoring and costing also depend on the optional taxonomy and cost model files
+    return file_signature(path, TAXONOMY_PATH, COST_MODEL_PATH)
+
+
+@st.cache_data(show_spinner=False, max_entries=APP_CACHE_MAX_ENTRIES)
+def _load_shipments(path, signature):
+    return load_manifest(path)
+
+
+def load_shipments(path) -> list:
+    """
+    Loads a shipment manifest once per file version; every session gets its own copy.
+    """
+    return _load_shipments(path, _signature(path))
+
+
+@st.cache_data(show_spinner=False, max_entries=APP_CACHE_MAX_ENTRIES)
+def _scored_shipments(path, signature):
+    # pandas is only needed by the Dashboard, so it is not imported with this module
+    import pandas as pd
+    from logic.frame_scoring import score_frame
+
+    located = [
+        ship for ship in load_manifest(path)
+        if ship.get("location") and "lat" in ship["location"] and "lon" in ship["location"]
+    ]
+    if not located:
+        return pd.DataFrame()
+
+    df = score_frame(pd.DataFrame([{
+        "lat": ship["location"]["lat"],
+        "lon": ship["location"]["lon"],
+        "id": ship["id"],
+        "route": ship["route"],
+        "status": ship.get("status", ""),
+        "notes": ship.get("notes", "")
+    } for ship in located]))
+
+    # Cost every shipment in one array operation
+    cost_matrix = estimate_costs_batch(df["severity"], routes=df["route"])
+    for i, action in enumerate(ACTIONS):
+        df[action] = cost_matrix[:, i]
+    return df
+
+
+def scored_shipments(path) -> "pd.DataFrame":
+    """
+    Located shipments of a manifest with risks, severity, risk_level and one cost column per action.
+    Empty when no shipment has a usable location.
+    """
+    return _scored_shipments(path, _signature(path))
+
+
+class _Uncached(Exception):
+    # Raised out of a cached function to hand back a result without caching it
+    def __init__(self, value):
+        super().__init__("result not cached")
+        self.value = value
+
+
+@st.cache_data(show_spinner=False, max_entries=APP_CACHE_MAX_ENTRIES)
+def _analyzed_shipments(path, signature, include_plan):
+    results = analyze_shipments(load_manifest(path), include_plan=include_plan, incremental=True)
+    if any(result_has_error(result) for result in results):
+        raise _Uncached(results)
+    return results
+
+
+def analyzed_shipments(path, include_plan=True) -> list:
+    """
+    Batch analysis of a manifest (see logic.batch.analyze_shipments), cached per file version.
+    Results containing a failed Claude call are returned but not cached, so the next rerun retries.
+    """
+    try:
+        return _analyzed_shipments(path, _signature(path), include_plan)
+    except _Uncached as e:
+        return e.value
+
+
+def session_memo(key, compute):
+    """
+    Returns the value memoized under `key` for the current session, computing it on first use.
+    Values that carry a failed Claude call are not memoized.
+
+    Args:
+        key (hashable): Identifies the value, e.g. ("message", shipment_id, tone).
+        compute (callable): Produces the value when it is not memoized yet.
+    """
+    memo = st.session_state.setdefault(SESSION_KEY, {})
+    if key not in memo:
+        value = compute()
+        if isinstance(value, str) and value.startswith(ERROR_PREFIX):
+            return value
+        memo[key] = value
+    return memo[key]
+
+
+def session_value(key, default=None):
+    """
+    Returns a memoized session value without computing it.
+    """
+    return st.session_state.get(SESSION_KEY, {}).get(key, default)
+
+
+def clear_app_caches():
+    """
+    Drops every process-wide cached entry, the stored analysis results and the current session's
+    memoized values.
+    """
+    result_store.clear()
+    _load_shipments.clear()
+    _scored_shipments.clear()
+    _analyzed_shipments.clear()
+    st.session_state.pop(SESSION_KEY, None)
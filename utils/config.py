@@ -0,0 +1,44 @@
+# utils/config.py
+# Secret lookup shared by every integration.
+# Secrets are resolved lazily, when a request is about to be made, rather than at import time.
+# They come from Streamlit's secrets (.streamlit/secrets.toml) when the app runs under Streamlit,
+# and fall back to environment variables otherwise, so the logic and utils modules can also be
+# used from the CLI, workers and benchmarks without importing Streamlit at all.
+
+import os
+import sys
+
+
+def get_secret(name: str, default=None):
+    """
+    Returns a secret from st.secrets, or from the environment variable of the same name.
+
+    st.secrets is only consulted when Streamlit is already loaded (i.e. inside the app), so
+    calling this from other processes never pays for importing it.
+
+    Args:
+        name (str): Secret name, e.g. "WEATHER_API_KEY".
+        default: Returned when the secret is set in neither place.
+    """
+    st = sys.modules.get("streamlit")
+    value = None
+    if st is not None:
+        try:
+            value = st.secrets[name]
+        except Exception:  # no secrets file, or key not present
+            value = None
+    if value:
+        return value
+    return os.getenv(name, default)
+
+
+def resolve_secret(override, name: str, default=None):
+    """
+    Returns `override` when it is set, the secret `name` otherwise.
+
+    Modules keep a module-level override (e.g. weather.API_KEY = None) that tests and benchmarks
+    can assign, and call this at request time.
+    """
+    if override:
+        return override
+    return get_secret(name, default)
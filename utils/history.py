@@ -1,62 +1,194 @@
 # utils/history.py
 # Utility module for logging and retrieving risk entries in SupplyShield 2.0.
-# This module manages a JSON-based risk log, storing shipment risk analysis data with timestamps.
+# This module manages the risk log, storing shipment risk analysis data with timestamps, on top of
+# a pluggable storage backend (append-only JSON Lines file or indexed SQLite database).
 # Author: Muhammad Hanzla
 # Contact: khangormani79@gmail.com
 
-import json
 from datetime import datetime
 import os
 
-# Path to the JSON file storing risk log entries
-LOG_PATH = "data/risk_log.json"
+from utils.history_backends import JsonlBackend, SqliteBackend
+from utils.history_archive import RotationPolicy, SegmentArchive
+from utils.metrics import metrics
 
-def log_risk_entry(entry):
+# Path to the JSON Lines file storing risk log entries (one JSON object per line)
+LOG_PATH = "data/risk_log.jsonl"
+
+# Path of the previous JSON array log, migrated once into LOG_PATH
+LEGACY_LOG_PATH = "data/risk_log.json"
+
+# Directory holding rotated, compacted segments of the JSON Lines log
+ARCHIVE_DIR = os.getenv("RISK_LOG_ARCHIVE_DIR", "data/risk_archive")
+
+# Rotation and retention of the JSON Lines log (sizes in bytes, ages in seconds/days; 0 disables)
+ROTATION_POLICY = RotationPolicy(
+    max_bytes=int(os.getenv("RISK_LOG_ROTATE_BYTES", str(5 * 1024 * 1024))),
+    max_age_seconds=int(os.getenv("RISK_LOG_ROTATE_SECONDS", str(24 * 3600))),
+    retention_days=int(os.getenv("RISK_LOG_RETENTION_DAYS", "90")),
+    max_segments=int(os.getenv("RISK_LOG_MAX_SEGMENTS", "0")),
+)
+
+# Path of the SQLite database used by the "sqlite" backend
+DB_PATH = os.getenv("RISK_LOG_DB_PATH", "data/risk_log.sqlite")
+
+# Storage backend: "jsonl" (default) or "sqlite"
+BACKEND = os.getenv("RISK_LOG_BACKEND", "jsonl").lower()
+
+# Set RISK_LOG_FSYNC=1 to force every entry to disk before log_risk_entry returns
+FSYNC = os.getenv("RISK_LOG_FSYNC", "").lower() in ("1", "true", "yes")
+
+
+def make_backend(name: str):
+    """
+    Builds a storage backend by name ("jsonl" or "sqlite").
+    """
+    if name == "sqlite":
+        return SqliteBackend(DB_PATH)
+    if name == "jsonl":
+        return JsonlBackend(LOG_PATH, legacy_path=LEGACY_LOG_PATH, fsync=FSYNC,
+                            archive=SegmentArchive(ARCHIVE_DIR), policy=ROTATION_POLICY)
+    raise ValueError(f"Unknown risk log backend: {name}")
+
+
+_backend = make_backend(BACKEND)
+
+
+def get_backend():
+    return _backend
+
+
+def set_backend(backend):
     """
-    Logs a risk entry to the risk_log.json file with a timestamp.
+    Switches the storage backend used by every function in this module.
 
     Args:
-        entry (dict): A dictionary containing risk analysis data (e.g., shipment ID, severity, action).
+        backend: A backend name ("jsonl", "sqlite") or a backend instance.
+    """
+    global _backend
+    _backend = make_backend(backend) if isinstance(backend, str) else backend
 
-    The function ensures the log directory exists, appends the entry with a UTC timestamp,
-    and writes the updated log back to the file. If the file doesn't exist or is invalid,
-    it initializes an empty log.
+
+def migrate_legacy_log():
     """
-    # Create the directory for the log file if it doesn't exist
-    os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
+    One-time migration of the old JSON array log into the JSON Lines log.
 
-    # Load existing log or initialize an empty list if file is missing or invalid
-    try:
-        with open(LOG_PATH, "r") as f:
-            log = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        log = []
+    Returns:
+        int: Number of migrated entries (0 if there was nothing to migrate).
+    """
+    return JsonlBackend(LOG_PATH, legacy_path=LEGACY_LOG_PATH).migrate_legacy()
+
+
+def copy_risk_history(source, target):
+    """
+    Copies every entry from one backend to another (e.g. JSON Lines into SQLite).
+
+    Returns:
+        int: Number of copied entries.
+    """
+    entries = list(source.iter_entries())
+    if hasattr(target, "append_many"):
+        target.append_many(entries)
+    else:
+        for entry in entries:
+            target.append(entry)
+    return len(entries)
+
+
+@metrics.instrument("history.rotate_risk_log")
+def rotate_risk_log():
+    """
+    Forces a rotation of the live JSON Lines log into the compacted archive.
 
+    Returns:
+        str | None: Path of the archived segment, or None if the backend does not rotate or the log is empty.
+    """
+    rotate = getattr(_backend, "rotate", None)
+    return rotate() if rotate else None
+
+
+@metrics.instrument("history.log_risk_entry")
+def log_risk_entry(entry, fsync=None):
+    """
+    Appends a risk entry to the risk log with a timestamp.
+
+    Args:
+        entry (dict): A dictionary containing risk analysis data (e.g., shipment ID, severity, action).
+        fsync (bool): Flush the entry to disk before returning (JSON Lines backend). Defaults to RISK_LOG_FSYNC.
+
+    Each call writes a single record, so the cost of a write does not grow with the size of the log
+    and concurrent sessions cannot lose each other's entries.
+    """
     # Add UTC timestamp to the entry
     entry["timestamp"] = datetime.utcnow().isoformat()
+    _backend.append(entry, fsync=fsync)
 
-    # Append the new entry to the log
-    log.append(entry)
 
-    # Write the updated log back to the file with proper formatting
-    with open(LOG_PATH, "w") as f:
-        json.dump(log, f, indent=2)
+def iter_risk_history():
+    """
+    Streams risk log entries one at a time, oldest first (archived segments, then the live log).
 
+    Yields:
+        dict: One risk log entry.
+    """
+    yield from _backend.iter_entries()
+
+
+@metrics.instrument("history.load_risk_history")
 def load_risk_history():
     """
-    Retrieves the risk log history from the risk_log.json file.
+    Retrieves the risk log history from the active backend.
 
     Returns:
-        list: A list of risk log entries. Returns an empty list if the file is missing or invalid.
+        list: A list of risk log entries. Returns an empty list if the log is missing or invalid.
 
-    The function attempts to read and parse the JSON log file, handling any errors gracefully
-    by returning an empty list and logging the error to the console.
+    Prefer iter_risk_history() or query_risk_history() for large logs; this helper materializes
+    every entry in memory.
     """
     try:
-        # Read and parse the risk log file
-        with open(LOG_PATH, "r") as f:
-            return json.load(f)
+        return list(iter_risk_history())
     except Exception as e:
         # Log error and return empty list to prevent crashes
         print(f"[ERROR loading history]: {e}")
-        return []
\ No newline at end of file
+        return []
+
+
+@metrics.instrument("history.query_risk_history")
+def query_risk_history(shipment_id=None, severity=None, action=None, route=None,
+                       since=None, until=None, limit=None, offset=0, newest_first=True):
+    """
+    Returns risk log entries matching the given filters.
+
+    Args:
+        shipment_id (str): Only entries for this shipment.
+        severity (str): Only entries with this severity ("Low", "Medium", "High").
+        action (str): Only entries with this action ("reroute", "expedite", "monitor").
+        route (str): Only entries for this route.
+        since (datetime | str): Inclusive lower bound on the UTC timestamp.
+        until (datetime | str): Exclusive upper bound on the UTC timestamp.
+        limit (int): Page size; None returns every match.
+        offset (int): Number of matches to skip (for pagination).
+        newest_first (bool): Order by most recent entry first.
+
+    Returns:
+        list: Matching entries.
+    """
+    filters = {"id": shipment_id, "severity": severity, "action": action, "route": route}
+    return _backend.query(filters, since=since, until=until, limit=limit, offset=offset, newest_first=newest_first)
+
+
+@metrics.instrument("history.count_risk_history")
+def count_risk_history(by="severity", shipment_id=None, severity=None, action=None, route=None,
+                       since=None, until=None):
+    """
+    Counts matching risk log entries grouped by one field.
+
+    Args:
+        by (str): Field to group by: "severity", "action", "id" or "route".
+        Other arguments filter entries as in query_risk_history().
+
+    Returns:
+        dict: Field value -> number of entries.
+    """
+    filters = {"id": shipment_id, "severity": severity, "action": action, "route": route}
+    return _backend.aggregate(by, filters, since=since, until=until)
@@ -0,0 +1,165 @@
+# utils/history_archive.py
+# Rotation targets for the JSON Lines risk log.
+# Rotated segments are compacted into columnar Parquet files (or gzipped JSON Lines when pyarrow
+# is not installed), read back in rotation order and pruned by a retention policy, so the live
+# log stays small no matter how long the app has been running.
+
+import gzip
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+_pyarrow = None
+
+
+def _load_pyarrow():
+    # pyarrow is optional and only needed when segments are compacted or read, so it is imported on
+    # first use rather than with the module. Returns (pa, pq), or (None, None) when not installed
+    global _pyarrow
+    if _pyarrow is None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            _pyarrow = (pa, pq)
+        except ImportError:  # Fall back to gzipped JSON Lines segments
+            _pyarrow = (None, None)
+    return _pyarrow
+
+# Segment files are named "<prefix>-<UTC rotation time>.<ext>" so they sort chronologically
+SEGMENT_TIME_FORMAT = "%Y%m%dT%H%M%S%f"
+
+# Columns stored next to the full JSON payload in Parquet segments
+ARCHIVE_COLUMNS = ("timestamp", "id", "route", "severity", "action")
+
+
+@dataclass
+class RotationPolicy:
+    """
+    When to rotate the live log and how long to keep archived segments.
+
+    Args:
+        max_bytes (int): Rotate once the live log reaches this size. 0 disables size rotation.
+        max_age_seconds (int): Rotate once the oldest live entry is this old. 0 disables time rotation.
+        retention_days (int): Delete archived segments rotated more than this many days ago. 0 keeps all.
+        max_segments (int): Keep at most this many archived segments. 0 keeps all.
+    """
+    max_bytes: int = 5 * 1024 * 1024
+    max_age_seconds: int = 24 * 3600
+    retention_days: int = 90
+    max_segments: int = 0
+
+
+class SegmentArchive:
+    """
+    Directory of compacted, read-only risk log segments.
+    """
+
+    def __init__(self, directory, prefix="risk_log"):
+        self.directory = directory
+        self.prefix = prefix
+
+    def _segment_time(self, name):
+        stem = name[len(self.prefix) + 1:].split(".", 1)[0]
+        try:
+            return datetime.strptime(stem, SEGMENT_TIME_FORMAT)
+        except ValueError:
+            return None
+
+    def segments(self):
+        """
+        Returns archived segment paths, oldest first.
+        """
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        names = [n for n in names
+                 if n.startswith(self.prefix + "-") and n.endswith((".parquet", ".jsonl.gz"))
+                 and self._segment_time(n) is not None]
+        return [os.path.join(self.directory, n) for n in sorted(names)]
+
+    def new_segment_path(self, extension):
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.utcnow().strftime(SEGMENT_TIME_FORMAT)
+        return os.path.join(self.directory, f"{self.prefix}-{stamp}.{extension}")
+
+    def compact(self, raw_path):
+        """
+        Compacts a rotated JSON Lines segment into the archive and removes the raw file.
+
+        Returns:
+            str: Path of the archived segment.
+        """
+        entries = []
+        with open(raw_path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+
+        pa, pq = _load_pyarrow()
+        if pq is not None:
+            target = self.new_segment_path("parquet")
+            columns = {name: [None if e.get(name) is None else str(e.get(name)) for e in entries]
+                       for name in ARCHIVE_COLUMNS}
+            columns["payload"] = [json.dumps(e) for e in entries]
+            table = pa.table({name: pa.array(values, type=pa.string()) for name, values in columns.items()})
+            tmp_path = target + ".tmp"
+            pq.write_table(table, tmp_path, compression="zstd")
+        else:
+            target = self.new_segment_path("jsonl.gz")
+            tmp_path = target + ".tmp"
+            with gzip.open(tmp_path, "wt") as f:
+                for entry in entries:
+                    f.write(json.dumps(entry) + "\n")
+
+        os.replace(tmp_path, target)
+        os.remove(raw_path)
+        return target
+
+    def iter_entries(self):
+        """
+        Streams archived entries, oldest segment first, one record batch at a time.
+        """
+        for path in self.segments():
+            if path.endswith(".parquet"):
+                pa, pq = _load_pyarrow()
+                if pq is None:
+                    raise RuntimeError(f"pyarrow is required to read archived segment {path}")
+                for batch in pq.ParquetFile(path).iter_batches(columns=["payload"]):
+                    for payload in batch.column(0).to_pylist():
+                        yield json.loads(payload)
+            else:
+                with gzip.open(path, "rt") as f:
+                    for line in f:
+                        if line.strip():
+                            yield json.loads(line)
+
+    def apply_retention(self, policy: RotationPolicy):
+        """
+        Deletes segments outside the retention window.
+
+        Returns:
+            list: Paths of the removed segments.
+        """
+        segments = self.segments()
+        doomed = []
+        if policy.retention_days:
+            cutoff = datetime.utcnow() - timedelta(days=policy.retention_days)
+            doomed += [p for p in segments if self._segment_time(os.path.basename(p)) < cutoff]
+        if policy.max_segments and len(segments) > policy.max_segments:
+            doomed += segments[:len(segments) - policy.max_segments]
+
+        removed = []
+        for path in dict.fromkeys(doomed):
+            try:
+                os.remove(path)
+                removed.append(path)
+            except FileNotFoundError:
+                pass
+        return removed
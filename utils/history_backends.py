@@ -0,0 +1,347 @@
+# utils/history_backends.py
+# Storage backends for the SupplyShield risk log.
+# Both backends expose the same small interface (append, iter_entries, query, aggregate) so
+# utils.history can switch between the JSON Lines file and an indexed SQLite database.
+
+import json
+import os
+import sqlite3
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+
+try:
+    import fcntl  # POSIX advisory file locks
+except ImportError:  # Windows: fall back to the in-process lock only
+    fcntl = None
+
+# Fields that can be filtered on or grouped by, mapped to their SQLite column
+QUERY_FIELDS = {"id": "shipment_id", "severity": "severity", "action": "action", "route": "route"}
+
+
+@contextmanager
+def _locked(f, lock):
+    """
+    Holds an exclusive lock on an open file so concurrent writers never interleave lines.
+    """
+    with lock:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield f
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _iso(value):
+    # Accept datetimes or ISO strings for time filters; ISO strings sort chronologically
+    if value is None:
+        return None
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+def _matches(entry, filters, since, until):
+    for field, wanted in filters.items():
+        if wanted is not None and entry.get(field) != wanted:
+            return False
+    timestamp = entry.get("timestamp", "")
+    if since is not None and timestamp < since:
+        return False
+    if until is not None and timestamp >= until:
+        return False
+    return True
+
+
+class JsonlBackend:
+    """
+    Append-only JSON Lines log with file locking, optional fsync and a one-time migration
+    from the legacy JSON array file. Queries are answered by streaming the file.
+
+    With an archive and rotation policy, the live file is rotated by size or age and compacted
+    into the archive; reads transparently union the archived segments and the live file.
+    """
+
+    def __init__(self, path, legacy_path=None, fsync=False, archive=None, policy=None):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.fsync = fsync
+        self.archive = archive
+        self.policy = policy
+        self._lock = threading.Lock()
+        self._oldest_live = None
+
+    @property
+    def migrated_marker(self):
+        # Written once the legacy log has been imported; rotation moves the live file away, so its
+        # presence alone cannot tell whether the migration already ran
+        return f"{self.path}.migrated"
+
+    def _mark_migrated(self):
+        with open(self.migrated_marker, "w") as f:
+            f.write(datetime.utcnow().isoformat() + "\n")
+
+    def migrate_legacy(self):
+        """
+        Converts the legacy JSON array log once. The legacy file is left in place; a marker file
+        next to the JSON Lines log records that the migration is done.
+
+        Returns:
+            int: Number of migrated entries (0 if there was nothing to migrate).
+        """
+        if (not self.legacy_path or os.path.exists(self.migrated_marker)
+                or not os.path.exists(self.legacy_path)):
+            return 0
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # Serialize migrations across processes and re-check once the lock is held
+        with open(f"{self.path}.lock", "a") as lock_file:
+            with _locked(lock_file, self._lock):
+                if os.path.exists(self.migrated_marker):
+                    return 0
+                # Logs written before the marker existed: a live file or archived segments mean
+                # the legacy entries were imported already
+                if os.path.exists(self.path) or (self.archive is not None and self.archive.segments()):
+                    self._mark_migrated()
+                    return 0
+
+                try:
+                    with open(self.legacy_path, "r") as f:
+                        entries = json.load(f)
+                except (OSError, json.JSONDecodeError):
+                    entries = []
+                if not isinstance(entries, list):
+                    entries = []
+
+                tmp_path = f"{self.path}.migrating"
+                with open(tmp_path, "w") as f:
+                    for entry in entries:
+                        f.write(json.dumps(entry) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+                self._mark_migrated()
+                return len(entries)
+
+    @contextmanager
+    def _open_live(self):
+        # Lock the current live file; if it was rotated away while we waited, reopen the new one
+        while True:
+            with open(self.path, "a+") as f:
+                with _locked(f, self._lock):
+                    try:
+                        current = os.stat(self.path).st_ino
+                    except FileNotFoundError:
+                        current = None
+                    if current == os.fstat(f.fileno()).st_ino:
+                        yield f
+                        return
+
+    def append(self, entry, fsync=None):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.migrate_legacy()
+        line = json.dumps(entry) + "\n"
+        do_fsync = self.fsync if fsync is None else fsync
+
+        with self._open_live() as f:
+            f.write(line)
+            f.flush()
+            if do_fsync:
+                os.fsync(f.fileno())
+            if self.policy is not None and self.policy.max_age_seconds:
+                self._oldest_live = self._first_timestamp(f) or entry.get("timestamp")
+            rotate = self._should_rotate(os.fstat(f.fileno()).st_size)
+
+        if rotate:
+            self.rotate()
+
+    @staticmethod
+    def _first_timestamp(f):
+        # Age-based rotation is measured from the oldest live entry. It is read on every append,
+        # under the file lock, because another process may have rotated the log since; the inode
+        # cannot tell, as a new live file often reuses the inode of the segment just compacted away
+        f.seek(0)
+        try:
+            return json.loads(f.readline()).get("timestamp")
+        except (json.JSONDecodeError, AttributeError):
+            return None
+
+    def _should_rotate(self, size):
+        policy = self.policy
+        if self.archive is None or policy is None:
+            return False
+        if policy.max_bytes and size >= policy.max_bytes:
+            return True
+        if policy.max_age_seconds and self._oldest_live:
+            try:
+                age = datetime.utcnow() - datetime.fromisoformat(self._oldest_live)
+            except ValueError:
+                return False
+            return age.total_seconds() >= policy.max_age_seconds
+        return False
+
+    def rotate(self):
+        """
+        Moves the live log into the archive, compacts it and applies the retention policy.
+
+        Returns:
+            str | None: Path of the new archived segment, or None if there was nothing to rotate.
+        """
+        if self.archive is None:
+            return None
+        raw_path = f"{self.path}.rotating.{os.getpid()}.{threading.get_ident()}"
+        with self._open_live() as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            # Writers that opened the old file re-check the inode after locking and reopen
+            os.replace(self.path, raw_path)
+            self._oldest_live = None
+
+        segment = self.archive.compact(raw_path)
+        if self.policy is not None:
+            self.archive.apply_retention(self.policy)
+        return segment
+
+    def iter_entries(self):
+        if self.archive is not None:
+            yield from self.archive.iter_entries()
+        yield from self._iter_live()
+
+    def _iter_live(self):
+        self.migrate_legacy()
+        try:
+            f = open(self.path, "r")
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A partially written trailing line from a crashed writer
+                    continue
+
+    def query(self, filters, since=None, until=None, limit=None, offset=0, newest_first=True):
+        since, until = _iso(since), _iso(until)
+        hits = (e for e in self.iter_entries() if _matches(e, filters, since, until))
+        end = None if limit is None else offset + limit
+        if not newest_first:
+            return list(islice(hits, offset, end))
+        # Only the newest offset + limit matches are ever held in memory
+        window = list(deque(hits, maxlen=end))
+        window.reverse()
+        return window[offset:end]
+
+    def aggregate(self, by, filters, since=None, until=None):
+        since, until = _iso(since), _iso(until)
+        counts = {}
+        for entry in self.iter_entries():
+            if _matches(entry, filters, since, until):
+                key = entry.get(by)
+                counts[key] = counts.get(key, 0) + 1
+        return counts
+
+
+class SqliteBackend:
+    """
+    SQLite risk log in WAL mode, indexed on shipment id, route, severity, action and timestamp.
+    The full entry is kept as a JSON payload next to the indexed columns.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        # Open lazily so selecting the backend never touches the disk
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS risk_log ("
+                " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " shipment_id TEXT,"
+                " route TEXT,"
+                " severity TEXT,"
+                " action TEXT,"
+                " timestamp TEXT,"
+                " payload TEXT NOT NULL)"
+            )
+            # Every filterable column gets an index, plus the timestamp for time windows
+            for column in (*QUERY_FIELDS.values(), "timestamp"):
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_risk_log_{column} ON risk_log ({column})")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _row(entry):
+        return (entry.get("id"), entry.get("route"), entry.get("severity"), entry.get("action"),
+                entry.get("timestamp"), json.dumps(entry))
+
+    def append(self, entry, fsync=None):
+        self.append_many([entry])
+
+    def append_many(self, entries):
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT INTO risk_log (shipment_id, route, severity, action, timestamp, payload)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (self._row(e) for e in entries),
+            )
+            conn.commit()
+
+    def iter_entries(self, page_size=1000):
+        # Keyset pagination keeps memory flat and never holds the lock while yielding
+        last_seq = 0
+        while True:
+            with self._lock:
+                rows = self._connect().execute(
+                    "SELECT seq, payload FROM risk_log WHERE seq > ? ORDER BY seq LIMIT ?",
+                    (last_seq, page_size),
+                ).fetchall()
+            if not rows:
+                return
+            for last_seq, payload in rows:
+                yield json.loads(payload)
+
+    @staticmethod
+    def _where(filters, since, until):
+        clauses, params = [], []
+        for field, wanted in filters.items():
+            if wanted is not None:
+                clauses.append(f"{QUERY_FIELDS[field]} = ?")
+                params.append(wanted)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(_iso(since))
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(_iso(until))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, filters, since=None, until=None, limit=None, offset=0, newest_first=True):
+        where, params = self._where(filters, since, until)
+        order = "DESC" if newest_first else "ASC"
+        sql = f"SELECT payload FROM risk_log{where} ORDER BY seq {order} LIMIT ? OFFSET ?"
+        params += [-1 if limit is None else limit, offset]
+        with self._lock:
+            rows = self._connect().execute(sql, params).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def aggregate(self, by, filters, since=None, until=None):
+        where, params = self._where(filters, since, until)
+        column = QUERY_FIELDS[by]
+        sql = f"SELECT {column}, COUNT(*) FROM risk_log{where} GROUP BY {column}"
+        with self._lock:
+            rows = self._connect().execute(sql, params).fetchall()
+        return dict(rows)
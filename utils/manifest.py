@@ -0,0 +1,238 @@
+# utils/manifest.py
+# Streaming shipment manifest reader.
+# Yields shipments one at a time from JSON arrays (parsed incrementally, never loaded whole),
+# JSON Lines and CSV files, validates each record against the shipment schema and groups them
+# into fixed-size chunks, so arbitrarily large manifests are processed in constant memory.
+
+import csv
+import json
+import os
+import re
+from itertools import islice
+
+# Bytes read per step when parsing a JSON array incrementally
+READ_CHUNK_SIZE = 1024 * 1024
+
+# Shipments per chunk handed to the analysis pipeline
+DEFAULT_CHUNK_SIZE = int(os.getenv("MANIFEST_CHUNK_SIZE", "500"))
+
+# Shipment schema: required and optional fields with their accepted types
+REQUIRED_FIELDS = {"id": str, "route": str}
+OPTIONAL_FIELDS = {"notes": str, "status": str, "location": dict}
+
+_decoder = json.JSONDecoder()
+
+# Characters that may follow a complete array element
+_DELIMITER = re.compile(r"[\s,\]]")
+
+
+class ManifestError(ValueError):
+    """
+    Raised for a malformed manifest or a shipment that fails validation.
+    `position` is the 1-based record number (or line number for JSON Lines/CSV).
+    """
+
+    def __init__(self, message, position=None):
+        self.position = position
+        super().__init__(f"Record {position}: {message}" if position is not None else message)
+
+
+def validate_shipment(ship, position=None) -> dict:
+    """
+    Checks a shipment record against the schema and normalizes it.
+
+    Args:
+        ship (dict): Raw shipment record.
+        position (int): Record position, used in error messages.
+
+    Returns:
+        dict: The shipment, with an integer "id" as a string, "notes" and "status" defaulted to ""
+            and "location" lat/lon as floats.
+
+    Raises:
+        ManifestError: If a required field is missing or a field has the wrong type.
+    """
+    if not isinstance(ship, dict):
+        raise ManifestError(f"expected an object, got {type(ship).__name__}", position)
+    # Numeric ids (common in exported JSON manifests) are accepted as their string form
+    if isinstance(ship.get("id"), int) and not isinstance(ship["id"], bool):
+        ship["id"] = str(ship["id"])
+    for field, kind in REQUIRED_FIELDS.items():
+        if not isinstance(ship.get(field), kind) or not ship[field].strip():
+            raise ManifestError(f"missing or invalid '{field}'", position)
+    for field, kind in OPTIONAL_FIELDS.items():
+        if ship.get(field) is not None and not isinstance(ship[field], kind):
+            raise ManifestError(f"'{field}' must be a {kind.__name__}", position)
+
+    ship.setdefault("notes", "")
+    ship.setdefault("status", "")
+    if ship["notes"] is None:
+        ship["notes"] = ""
+    if ship["status"] is None:
+        ship["status"] = ""
+
+    location = ship.get("location")
+    if location:
+        try:
+            ship["location"] = {**location, "lat": float(location["lat"]), "lon": float(location["lon"])}
+        except (KeyError, TypeError, ValueError):
+            raise ManifestError("'location' needs numeric 'lat' and 'lon'", position) from None
+    return ship
+
+
+def iter_json_array(f, read_size=READ_CHUNK_SIZE):
+    """
+    Incrementally parses a JSON array from a text file, yielding one element at a time.
+    Only the element being decoded (plus one read chunk) is held in memory.
+    """
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buf, pos, eof
+        data = f.read(read_size)
+        if not data:
+            eof = True
+        buf = buf[pos:] + data
+        pos = 0
+
+    def skip_ws():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos].isspace():
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            fill()
+
+    fill()
+    skip_ws()
+    if pos >= len(buf) or buf[pos] != "[":
+        raise ManifestError("JSON manifest must be an array of shipments")
+    pos += 1
+
+    expect_value = True
+    first = True
+    while True:
+        skip_ws()
+        if pos >= len(buf):
+            raise ManifestError("unexpected end of file inside the shipment array")
+        if buf[pos] == "]" and (first or not expect_value):
+            pos += 1
+            skip_ws()
+            if pos < len(buf):
+                raise ManifestError(f"unexpected content after the shipment array at offset {pos}")
+            return
+        if not expect_value:
+            if buf[pos] != ",":
+                raise ManifestError(f"expected ',' or ']' at offset {pos}")
+            pos += 1
+            expect_value = True
+            continue
+
+        # Decode the next element, reading more input until it is complete
+        while True:
+            try:
+                value, end = _decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError as e:
+                if eof:
+                    raise ManifestError(f"invalid JSON: {e.msg}") from None
+                fill()
+                continue
+            # An element is only complete once a delimiter follows it: a number split across reads
+            # ("2." + "5", "1e" + "3") decodes short, so read more until one is in the buffer
+            if _DELIMITER.search(buf, end) is None and not eof:
+                fill()
+                continue
+            if end < len(buf) and not _DELIMITER.match(buf, end):
+                raise ManifestError(f"expected ',' or ']' at offset {end}")
+            break
+        pos = end
+        yield value
+        expect_value = False
+        first = False
+
+
+def _iter_jsonl(f):
+    for line_no, line in enumerate(f, 1):
+        if line.strip():
+            try:
+                yield line_no, json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ManifestError(f"invalid JSON: {e.msg}", line_no) from None
+
+
+def _iter_csv(f):
+    # Header is line 1; "lat"/"lon" columns are folded into a "location" dict
+    for line_no, row in enumerate(csv.DictReader(f), 2):
+        lat, lon = row.pop("lat", None), row.pop("lon", None)
+        if lat not in (None, "") and lon not in (None, ""):
+            row["location"] = {"lat": lat, "lon": lon}
+        yield line_no, row
+
+
+def manifest_format(path) -> str:
+    """
+    Guesses the manifest format from the file extension: "json", "jsonl" or "csv".
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if ext == ".csv":
+        return "csv"
+    return "json"
+
+
+def iter_manifest(path, fmt=None, validate=True, on_invalid=None):
+    """
+    Streams shipments from a manifest file.
+
+    Args:
+        path (str): Manifest path (.json array, .jsonl/.ndjson or .csv).
+        fmt (str): Force a format instead of guessing from the extension.
+        validate (bool): Validate and normalize each shipment.
+        on_invalid (callable): Called with the ManifestError of each invalid shipment, which is
+            then skipped. When None, the first invalid shipment raises.
+
+    Yields:
+        dict: One shipment at a time.
+    """
+    fmt = fmt or manifest_format(path)
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if fmt == "jsonl":
+            records = _iter_jsonl(f)
+        elif fmt == "csv":
+            records = _iter_csv(f)
+        else:
+            records = enumerate(iter_json_array(f), 1)
+
+        for position, ship in records:
+            if validate:
+                try:
+                    ship = validate_shipment(ship, position)
+                except ManifestError as e:
+                    if on_invalid is None:
+                        raise
+                    on_invalid(e)
+                    continue
+            yield ship
+
+
+def iter_chunks(items, size=DEFAULT_CHUNK_SIZE):
+    """
+    Groups an iterable into lists of at most `size` items.
+    """
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, max(1, size)))
+        if not chunk:
+            return
+        yield chunk
+
+
+def load_manifest(path, fmt=None, validate=True) -> list:
+    """
+    Reads a whole manifest into a list (for small files such as the bundled samples).
+    """
+    return list(iter_manifest(path, fmt=fmt, validate=validate))
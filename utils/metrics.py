@@ -0,0 +1,237 @@
+# utils/metrics.py
+# Lightweight hot-path instrumentation.
+# Every instrumented operation (Claude calls, weather, news, Slack, risk log I/O, pipeline stages,
+# page rendering) records its wall time, outcome, cache hit and token usage under a dotted name.
+# Records feed a rolling in-memory window per name (count, errors, hit rate, p50/p95 latency,
+# tokens, cost) and, when METRICS_TRACE_PATH is set, are appended to a JSON Lines trace file.
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+# Number of recent latencies kept per name for percentiles
+METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", "1024"))
+
+# JSON Lines trace of every record ("" disables the trace)
+TRACE_PATH = os.getenv("METRICS_TRACE_PATH", "")
+
+# Set METRICS_DISABLED=1 to turn recording into a no-op
+METRICS_DISABLED = os.getenv("METRICS_DISABLED", "").lower() in ("1", "true", "yes")
+
+# Upper bounds (milliseconds) of the latency histogram buckets; the last bucket is open-ended
+HISTOGRAM_BUCKETS_MS = (1, 5, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class StageMetrics:
+    """
+    Counters and a rolling latency window for one instrumented name.
+    """
+
+    def __init__(self, window=METRICS_WINDOW):
+        self.calls = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cost_usd = 0.0
+        self.total_seconds = 0.0
+        self.latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, ok=True, cache_hit=False, input_tokens=0, output_tokens=0, cost_usd=0.0):
+        with self._lock:
+            self.calls += 1
+            self.total_seconds += seconds
+            self.latencies.append(seconds)
+            self.errors += not ok
+            self.cache_hits += bool(cache_hit)
+            self.input_tokens += input_tokens or 0
+            self.output_tokens += output_tokens or 0
+            self.cost_usd += cost_usd or 0.0
+
+    def histogram(self, buckets=HISTOGRAM_BUCKETS_MS) -> dict:
+        """
+        Counts of the windowed latencies per bucket, keyed "<=N ms" (plus ">N ms" for the rest).
+        """
+        with self._lock:
+            latencies = [s * 1000 for s in self.latencies]
+        counts = {f"<={bound} ms": 0 for bound in buckets}
+        counts[f">{buckets[-1]} ms"] = 0
+        for ms in latencies:
+            for bound in buckets:
+                if ms <= bound:
+                    counts[f"<={bound} ms"] += 1
+                    break
+            else:
+                counts[f">{buckets[-1]} ms"] += 1
+        return counts
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            ordered = sorted(self.latencies)
+            calls = self.calls
+            snapshot = {
+                "calls": calls,
+                "errors": self.errors,
+                "cache_hits": self.cache_hits,
+                "hit_rate": self.cache_hits / calls if calls else 0.0,
+                "total_s": round(self.total_seconds, 4),
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens,
+                "cost_usd": round(self.cost_usd, 6),
+            }
+
+        def pct(q):
+            return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2) if ordered else None
+
+        snapshot["p50_ms"] = pct(0.5)
+        snapshot["p95_ms"] = pct(0.95)
+        snapshot["max_ms"] = round(ordered[-1] * 1000, 2) if ordered else None
+        return snapshot
+
+
+class Span:
+    """
+    Outcome of one timed operation; the code being timed fills in what it learns.
+    """
+
+    def __init__(self):
+        self.ok = True
+        self.cache_hit = False
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cost_usd = 0.0
+        self.attrs = {}
+
+
+class MetricsRegistry:
+    """
+    Named StageMetrics plus an optional JSON Lines trace.
+
+    Args:
+        window (int): Latencies kept per name for percentiles.
+        trace_path (str): JSON Lines trace file; empty to disable.
+    """
+
+    def __init__(self, window=METRICS_WINDOW, trace_path=TRACE_PATH):
+        self.window = window
+        self.enabled = not METRICS_DISABLED
+        self._stages = {}
+        self._lock = threading.Lock()
+        self._trace_path = None
+        self._trace = None
+        self._trace_lock = threading.Lock()
+        self.set_trace_path(trace_path)
+
+    def set_trace_path(self, path):
+        """
+        Starts (or with an empty path stops) writing the JSON Lines trace.
+        """
+        with self._trace_lock:
+            if self._trace is not None:
+                self._trace.close()
+                self._trace = None
+            self._trace_path = path or None
+
+    def _stage(self, name) -> StageMetrics:
+        with self._lock:
+            if name not in self._stages:
+                self._stages[name] = StageMetrics(self.window)
+            return self._stages[name]
+
+    def record(self, name, seconds, ok=True, cache_hit=False, input_tokens=0, output_tokens=0, cost_usd=0.0,
+               **attrs):
+        """
+        Records one completed operation.
+
+        Args:
+            name (str): Dotted operation name, e.g. "llm.call_claude" or "pipeline.narrate".
+            seconds (float): Wall time.
+            ok (bool): False when the operation failed.
+            cache_hit (bool): True when the result came from a cache.
+            input_tokens (int), output_tokens (int): LLM token usage.
+            cost_usd (float): Estimated cost of the operation.
+            **attrs: Extra fields written to the trace only.
+        """
+        if not self.enabled:
+            return
+        self._stage(name).observe(seconds, ok, cache_hit, input_tokens, output_tokens, cost_usd)
+        if self._trace_path:
+            record = {"ts": round(time.time(), 6), "name": name, "ms": round(seconds * 1000, 3), "ok": ok}
+            if cache_hit:
+                record["cache_hit"] = True
+            if input_tokens or output_tokens:
+                record.update(input_tokens=input_tokens, output_tokens=output_tokens, cost_usd=cost_usd)
+            record.update(attrs)
+            line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+            with self._trace_lock:
+                if self._trace is None and self._trace_path:
+                    directory = os.path.dirname(self._trace_path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    self._trace = open(self._trace_path, "a", encoding="utf-8", buffering=1)
+                if self._trace is not None:
+                    self._trace.write(line)
+
+    @contextmanager
+    def timer(self, name, **attrs):
+        """
+        Times the enclosed block and records it under `name`. Yields a Span the block can update
+        (ok, cache_hit, tokens, attrs); an exception marks the span failed and is re-raised.
+        """
+        span = Span()
+        span.attrs.update(attrs)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException:
+            span.ok = False
+            raise
+        finally:
+            self.record(name, time.perf_counter() - start, ok=span.ok, cache_hit=span.cache_hit,
+                        input_tokens=span.input_tokens, output_tokens=span.output_tokens,
+                        cost_usd=span.cost_usd, **span.attrs)
+
+    def instrument(self, name):
+        """
+        Decorator recording every call of a function under `name`.
+        """
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self, prefix="") -> dict:
+        """
+        Returns name -> metrics (calls, errors, cache hits, p50/p95/max latency, tokens, cost),
+        optionally limited to names starting with `prefix`.
+        """
+        with self._lock:
+            stages = dict(self._stages)
+        return {name: stage.snapshot() for name, stage in sorted(stages.items()) if name.startswith(prefix)}
+
+    def histogram(self, name) -> dict:
+        """
+        Latency histogram of one name (empty when nothing was recorded).
+        """
+        with self._lock:
+            stage = self._stages.get(name)
+        return stage.histogram() if stage else {}
+
+    def reset(self):
+        """
+        Forgets every recorded metric (the trace file is left as is).
+        """
+        with self._lock:
+            self._stages.clear()
+
+
+# Process-wide registry shared by every instrumented module
+metrics = MetricsRegistry()
@@ -1,34 +1,184 @@
-import requests
+import hashlib
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from urllib.parse import quote_plus  # ✅ for safe URL encoding
-import streamlit as st
+from utils import transport
+from utils.ttl_cache import TTLCache
+from utils.metrics import metrics
+from utils.config import resolve_secret
 # load_dotenv()
 
-GNEWS_API_KEY = st.secrets["GNEWS_API_KEY"]
+# Overrides the GNEWS_API_KEY secret when set; otherwise it is resolved on first use
+GNEWS_API_KEY = None
+
+# GNews search endpoint (overridable, e.g. to point at a local stub)
+GNEWS_API_URL = os.getenv("GNEWS_API_URL", "https://gnews.io/api/v4/search")
+
+# Cache of successful GNews responses (including empty ones) keyed on the normalized query
+NEWS_CACHE_TTL = int(os.getenv("NEWS_CACHE_TTL", "1800"))
+NEWS_CACHE_SIZE = int(os.getenv("NEWS_CACHE_SIZE", "512"))
+news_cache = TTLCache(maxsize=NEWS_CACHE_SIZE, ttl=NEWS_CACHE_TTL)
+
+# Queries without any news are cached for a shorter time, so new articles show up sooner
+NEWS_EMPTY_TTL = int(os.getenv("NEWS_EMPTY_TTL", "300"))
+
+# Concurrent GNews requests in fetch_news_many (kept low to stay friendly with the quota)
+NEWS_MAX_WORKERS = int(os.getenv("NEWS_MAX_WORKERS", "4"))
+
+# Separators between places in a route or query ("Shanghai → LA", "Karachi - Lahore", ...)
+_TERM_SPLIT = re.compile(r"\s*(?:→|->|=>|/|,|;|\|| - | to )\s*", re.IGNORECASE)
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonical form of a query: lowercase, punctuation-free, whitespace collapsed, place terms sorted.
+    "Shanghai → LA" and "la -> shanghai" normalize to the same key.
+    """
+    return " ".join(sorted(set(query_terms(query))))
+
+
+def query_terms(query: str) -> list:
+    """
+    Splits a route or query into normalized place terms, in order and without duplicates.
+    """
+    terms = []
+    for part in _TERM_SPLIT.split(query or ""):
+        term = " ".join(re.sub(r"[^\w\s]", " ", part.lower()).split())
+        if term and term not in terms:
+            terms.append(term)
+    return terms
+
+
+def article_key(article: dict) -> str:
+    """
+    Hash used to deduplicate articles: the URL when present, otherwise the normalized title.
+    """
+    url = (article.get("url") or "").strip().lower()
+    basis = url if url and url != "#" else " ".join((article.get("title") or "").lower().split())
+    return hashlib.sha1(basis.encode("utf-8")).hexdigest()
+
+
+def _dedupe(articles):
+    seen = set()
+    unique = []
+    for article in articles:
+        key = article_key(article)
+        if key not in seen:
+            seen.add(key)
+            unique.append(article)
+    return unique
+
+
+def _round_robin(lists):
+    # Yields rounds of items, one from each list in turn, skipping exhausted lists
+    longest = max((len(items) for items in lists), default=0)
+    for i in range(longest):
+        yield [items[i] for items in lists if i < len(items)]
+
 
 def fetch_news(query: str, max_articles=3):
-    try:
-        if not GNEWS_API_KEY:
-            return [{"title": "Missing GNEWS API key", "url": "#"}]
+    with metrics.timer("news.fetch_news") as span:
+        try:
+            api_key = resolve_secret(GNEWS_API_KEY, "GNEWS_API_KEY")
+            if not api_key:
+                span.ok = False
+                return [{"title": "Missing GNEWS API key", "url": "#"}]
 
-        clean_query = quote_plus(query.strip())
-        full_query = f"{clean_query}+port+shipping+delay+strike"
+            # Identical (normalized) queries within the TTL are served from the cache
+            normalized = normalize_query(query) or query.strip().lower()
+            cache_key = (normalized, max_articles)
+            cached = news_cache.get(cache_key)
+            if cached is not None:
+                span.cache_hit = True
+                return list(cached)
 
-        url = (
-            f"https://gnews.io/api/v4/search?"
-            f"q={full_query}&lang=en&country=us&max={max_articles}&token={GNEWS_API_KEY}"
-        )
+            clean_query = quote_plus(normalized)
+            full_query = f"{clean_query}+port+shipping+delay+strike"
 
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
+            url = (
+                f"{GNEWS_API_URL}?"
+                f"q={full_query}&lang=en&country=us&max={max_articles}&token={api_key}"
+            )
+
+            response = transport.get(url)
+            response.raise_for_status()
+            data = response.json()
+
+            articles = data.get("articles", [])
+            if not articles:
+                placeholder = [{"title": "No relevant news found.", "url": "#"}]
+                news_cache.set(cache_key, placeholder, ttl=NEWS_EMPTY_TTL)
+                return list(placeholder)
+
+            results = _dedupe({"title": article["title"], "url": article["url"]} for article in articles)
+            news_cache.set(cache_key, results)
+            return list(results)
+
+        except Exception as e:
+            span.ok = False
+            return [{"title": f"News API error: {str(e)}", "url": "#"}]
+
+
+def fetch_news_many(queries, max_articles=3, dedupe_across=True):
+    """
+    Fetches news for many queries (e.g. one route per shipment) with as few API calls as possible.
+
+    Args:
+        queries (iterable): Route or free-text queries.
+        max_articles (int): Maximum articles returned per query.
+        dedupe_across (bool): Do not repeat an article already returned for an earlier query. A query
+            whose articles were all shown earlier still keeps its own top article.
+
+    Returns:
+        dict: query -> list of {"title", "url"} articles.
+
+    Every query is split into place terms, and each distinct term across all queries is fetched
+    once (through the cache), so routes sharing a port or city share the same API call. When
+    splitting would not save calls, each distinct normalized query is fetched once instead.
+    """
+    queries = list(dict.fromkeys(queries))
+    terms_by_query = {q: query_terms(q) for q in queries}
+    distinct_terms = list(dict.fromkeys(t for terms in terms_by_query.values() for t in terms))
+
+    # Splitting into terms only pays off when places are shared; otherwise fetch each whole query once
+    if len(distinct_terms) >= len({normalize_query(q) for q in queries}):
+        terms_by_query = {q: [normalize_query(q) or q] for q in queries}
+        distinct_terms = list(dict.fromkeys(t for terms in terms_by_query.values() for t in terms))
+
+    with ThreadPoolExecutor(max_workers=max(1, min(NEWS_MAX_WORKERS, len(distinct_terms) or 1))) as pool:
+        by_term = dict(zip(distinct_terms, pool.map(lambda t: fetch_news(t, max_articles), distinct_terms)))
+
+    shown = set()
+    results = {}
+    by_key = {}
+    for query, terms in terms_by_query.items():
+        # Queries that normalize identically get the same articles
+        key = normalize_query(query)
+        if key in by_key:
+            results[query] = list(by_key[key])
+            continue
+
+        # Interleave the terms' articles so each place is represented, skipping placeholders
+        pools = [[a for a in by_term[t] if a.get("url") not in (None, "#")] for t in terms]
+        merged = [a for group in _round_robin(pools) for a in group]
+
+        unique = _dedupe(merged)
+        articles = [a for a in unique if not (dedupe_across and article_key(a) in shown)][:max_articles]
+        if not articles:
+            # Everything was already shown for an earlier query; repeat the top article rather
+            # than report that there is no news
+            articles = unique[:1]
+        shown.update(article_key(a) for a in articles)
 
-        articles = data.get("articles", [])
         if not articles:
-            return [{"title": "No relevant news found.", "url": "#"}]
+            # Surface the first term's placeholder or error message, as fetch_news would
+            fallback = by_term[terms[0]] if terms else fetch_news(query, max_articles)
+            articles = [a for a in fallback if a.get("url") in (None, "#")][:1] or [
+                {"title": "No relevant news found.", "url": "#"}
+            ]
+        results[query] = by_key[key] = articles
 
-        return [{"title": article["title"], "url": article["url"]} for article in articles]
+    return results
 
-    except Exception as e:
-        return [{"title": f"News API error: {str(e)}", "url": "#"}]
@@ -0,0 +1,67 @@
+# utils/reports.py
+# CSV and PDF export of a shipment analysis (the Reports & Input download buttons).
+# pandas and reportlab are imported on first export, not when the module is loaded.
+
+from io import BytesIO
+
+
+def build_csv_report(result: dict) -> bytes:
+    """
+    One-row CSV report of an analysis result (see logic.pipeline.ShipmentAnalysis.to_dict).
+    """
+    import pandas as pd
+
+    costs = result.get("costs") or {}
+    df_report = pd.DataFrame([{
+        "Shipment": result.get("id"),
+        "Route": result.get("route"),
+        "Severity": result.get("severity"),
+        "Action": result.get("action"),
+        "Summary": result.get("summary"),
+        "Penalty Cost": costs.get("penalty"),
+        "Expedite Cost": costs.get("expedite"),
+        "Reroute Cost": costs.get("reroute"),
+        "Recommended": result.get("recommended"),
+        "Claude Message": result.get("message")
+    }])
+    return df_report.to_csv(index=False).encode("utf-8")
+
+
+def build_pdf_report(result: dict) -> BytesIO:
+    """
+    A4 PDF report of an analysis result, returned as a buffer positioned at the start.
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    pdf_buffer = BytesIO()
+    c = canvas.Canvas(pdf_buffer, pagesize=A4)
+    width, height = A4
+
+    c.setFont("Helvetica-Bold", 14)
+    c.drawCentredString(width / 2, height - 50, f"Shipment Risk Report – {result.get('id')}")
+
+    c.setFont("Helvetica", 11)
+    y = height - 100
+    lines = [
+        f"Shipment: {result.get('id')}",
+        f"Route: {result.get('route')}",
+        f"Severity: {result.get('severity')}",
+        f"Summary: {result.get('summary')}",
+        f"Action: {result.get('action')}",
+        f"Reason: {result.get('reason')}",
+        f"Cost Decision: {result.get('cost_reason')}",
+        "",
+        "Claude Message:",
+        result.get("message") or ""
+    ]
+    for line in lines:
+        for wrapped_line in line.split("\n"):
+            c.drawString(40, y, wrapped_line[:120])
+            y -= 18
+            if y < 50:
+                c.showPage()
+                y = height - 50
+    c.save()
+    pdf_buffer.seek(0)
+    return pdf_buffer
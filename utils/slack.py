@@ -1,24 +1,56 @@
 import os
-import requests
+import threading
 from dotenv import load_dotenv
-import streamlit as st 
+from utils import transport
+from utils.metrics import metrics
+from utils.config import resolve_secret
+from utils.slack_queue import SlackDeliveryQueue, DeliveryTicket
 # load_dotenv()
 
 # SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL")
 
-# for deploy on the stramlit
-SLACK_WEBHOOK_URL = st.secrets["SLACK_WEBHOOK_URL"]
+# Overrides the SLACK_WEBHOOK_URL secret when set; otherwise it is resolved on first use
+# (st.secrets when deployed on Streamlit, environment variables otherwise)
+SLACK_WEBHOOK_URL = None
 
+
+def webhook_url():
+    return resolve_secret(SLACK_WEBHOOK_URL, "SLACK_WEBHOOK_URL")
+
+@metrics.instrument("slack.send_slack_message")
 def send_slack_message(message: str):
-    if not SLACK_WEBHOOK_URL:
+    url = webhook_url()
+    if not url:
         return False, "Webhook not configured"
 
     payload = {"text": message}
     try:
-        response = requests.post(SLACK_WEBHOOK_URL, json=payload)
+        response = transport.post(url, json=payload)
         if response.status_code == 200:
             return True, "✅ Message sent to Slack!"
         else:
             return False, f"❌ Slack error {response.status_code}: {response.text}"
     except Exception as e:
         return False, f"❌ Exception: {e}"
+
+# Shared background queue: alerts are rate limited and coalesced into digest messages.
+# Created on first use, once the webhook URL can be resolved.
+slack_queue = None
+_queue_lock = threading.Lock()
+
+def get_slack_queue() -> SlackDeliveryQueue:
+    """
+    Returns the shared delivery queue, creating it on first use.
+    """
+    global slack_queue
+    with _queue_lock:
+        if slack_queue is None:
+            slack_queue = SlackDeliveryQueue(webhook_url())
+        return slack_queue
+
+def queue_slack_message(message: str) -> DeliveryTicket:
+    """
+    Queues a message for background delivery and returns its ticket without blocking.
+    Use ticket.status / ticket.wait() to follow the delivery.
+    """
+    return get_slack_queue().enqueue(message)
@@ -0,0 +1,259 @@
+# utils/slack_queue.py
+# Background Slack delivery queue.
+# Messages are collected for a short window and coalesced into one digest post, sends are paced
+# by a token bucket (Slack allows about one message per second per webhook), 429 responses are
+# retried after their Retry-After delay, and every message gets a ticket reporting its status.
+
+import itertools
+import threading
+import time
+
+import requests
+
+from utils import transport
+from utils.metrics import metrics
+
+# Defaults for the shared queue
+SLACK_RATE_PER_SEC = 1.0
+SLACK_DIGEST_WINDOW = 2.0
+SLACK_MAX_BATCH = 20
+SLACK_MAX_RETRIES = 5
+SLACK_MAX_BACKOFF = 30.0  # Seconds; the wait after failed attempt n is min(2 ** n, this)
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter: `rate` tokens per second, holding at most `capacity` tokens.
+    """
+
+    def __init__(self, rate=SLACK_RATE_PER_SEC, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until a token is available, then takes it.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def penalize(self, seconds):
+        """
+        Empties the bucket for `seconds` (used when Slack answers 429 with Retry-After).
+        """
+        with self._lock:
+            self.tokens = -seconds * self.rate
+            self.updated = time.monotonic()
+
+
+class DeliveryTicket:
+    """
+    Delivery status of one queued message: "queued", "retrying", "sent" or "failed".
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, message):
+        self.id = next(self._ids)
+        self.message = message
+        self.status = "queued"
+        self.detail = ""
+        self.attempts = 0
+        self._done = threading.Event()
+
+    def _finish(self, status, detail):
+        self.status = status
+        self.detail = detail
+        self._done.set()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout=None) -> bool:
+        """
+        Waits for a final status. Returns True if the message was sent.
+        """
+        self._done.wait(timeout)
+        return self.status == "sent"
+
+
+def build_digest(messages) -> str:
+    """
+    Joins several alerts into one Slack message; a single alert is sent unchanged.
+    """
+    if len(messages) == 1:
+        return messages[0]
+    parts = [f"*🚨 {len(messages)} shipment alerts*"]
+    for i, message in enumerate(messages, 1):
+        parts.append(f"*{i}.* {message}")
+    return "\n\n———\n\n".join(parts)
+
+
+class SlackDeliveryQueue:
+    """
+    Background, rate-limited, coalescing delivery queue for one Slack webhook.
+
+    Args:
+        webhook_url (str): Incoming webhook URL.
+        rate (float): Maximum posts per second.
+        digest_window (float): Seconds to wait after the first queued alert for more to coalesce.
+        max_batch (int): Maximum alerts per digest message.
+        max_retries (int): Attempts per digest before its tickets are marked failed.
+        max_backoff (float): Longest wait between attempts after an exception or 5xx.
+    """
+
+    def __init__(self, webhook_url, rate=SLACK_RATE_PER_SEC, digest_window=SLACK_DIGEST_WINDOW,
+                 max_batch=SLACK_MAX_BATCH, max_retries=SLACK_MAX_RETRIES, max_backoff=SLACK_MAX_BACKOFF):
+        self.webhook_url = webhook_url
+        self.bucket = TokenBucket(rate=rate)
+        self.digest_window = digest_window
+        self.max_batch = max_batch
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self.sent = 0
+        self.failed = 0
+        self.posts = 0
+        self.rate_limited = 0
+        self._pending = []
+        self._cond = threading.Condition()
+        self._worker = None
+        self._closed = False
+
+    def enqueue(self, message: str) -> DeliveryTicket:
+        """
+        Queues a message for delivery and returns immediately with its ticket.
+        """
+        ticket = DeliveryTicket(message)
+        if not self.webhook_url:
+            ticket._finish("failed", "Webhook not configured")
+            return ticket
+        with self._cond:
+            if self._closed:
+                ticket._finish("failed", "Queue closed")
+                return ticket
+            self._pending.append((time.monotonic(), ticket))
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="slack-delivery", daemon=True)
+                self._worker.start()
+            self._cond.notify()
+        return ticket
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending:
+                return None
+            # Give other alerts the digest window to join, unless the batch is already full
+            deadline = self._pending[0][0] + self.digest_window
+            while len(self._pending) < self.max_batch and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = [ticket for _, ticket in self._pending[:self.max_batch]]
+            del self._pending[:self.max_batch]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._deliver(batch)
+
+    def _deliver(self, batch):
+        with metrics.timer("slack.deliver", messages=len(batch)) as span:
+            self._deliver_batch(batch)
+            span.ok = batch[0].status == "sent"
+            span.attrs["attempts"] = batch[0].attempts
+
+    def _deliver_batch(self, batch):
+        text = build_digest([t.message for t in batch])
+        detail = ""
+        for attempt in range(1, self.max_retries + 1):
+            for ticket in batch:
+                ticket.attempts = attempt
+            self.bucket.acquire()
+            self.posts += 1
+            try:
+                response = transport.post(self.webhook_url, json={"text": text}, retries=0)
+            except requests.RequestException as e:
+                detail = f"❌ Exception: {e}"
+                self._mark(batch, "retrying", detail)
+                self._backoff(attempt)
+                continue
+
+            if response.status_code == 200:
+                self._finish(batch, "sent", "✅ Message sent to Slack!")
+                return
+            detail = f"❌ Slack error {response.status_code}: {response.text}"
+            if response.status_code == 429:
+                self.rate_limited += 1
+                try:
+                    retry_after = float(response.headers.get("Retry-After", "1"))
+                except ValueError:
+                    retry_after = 1.0
+                self.bucket.penalize(retry_after)
+                self._mark(batch, "retrying", detail)
+                continue
+            if response.status_code >= 500:
+                self._mark(batch, "retrying", detail)
+                self._backoff(attempt)
+                continue
+            break  # 4xx other than 429 will not succeed on retry
+
+        self._finish(batch, "failed", detail)
+
+    def _backoff(self, attempt):
+        # No wait after the last attempt: the batch is marked failed and the worker moves on
+        if attempt < self.max_retries:
+            time.sleep(min(2 ** attempt, self.max_backoff))
+
+    @staticmethod
+    def _mark(batch, status, detail):
+        for ticket in batch:
+            ticket.status = status
+            ticket.detail = detail
+
+    def _finish(self, batch, status, detail):
+        for ticket in batch:
+            ticket._finish(status, detail)
+        if status == "sent":
+            self.sent += len(batch)
+        else:
+            self.failed += len(batch)
+
+    def close(self, timeout=None):
+        """
+        Stops accepting messages, flushes what is queued and waits for the worker to finish.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
+
+    def stats(self) -> dict:
+        with self._cond:
+            queued = len(self._pending)
+        return {
+            "queued": queued,
+            "sent": self.sent,
+            "failed": self.failed,
+            "posts": self.posts,
+            "rate_limited": self.rate_limited,
+        }
@@ -0,0 +1,82 @@
+# utils/slack_stub.py
+# In-process stand-in for a Slack incoming webhook, for tests and offline runs.
+# It records every posted payload and can be told to answer with 429 (plus Retry-After) or errors.
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubSlackWebhook:
+    """
+    Local HTTP server imitating a Slack webhook.
+
+    Usage:
+        with StubSlackWebhook() as stub:
+            queue = SlackDeliveryQueue(stub.url)
+            stub.fail_next(429, retry_after=1)
+
+    Attributes:
+        received (list): Payloads (decoded JSON) of every accepted post, in order.
+        requests (int): Number of posts received, including rejected ones.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.received = []
+        self.requests = 0
+        self._failures = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                status, retry_after = stub._next_response()
+                if status == 200:
+                    with stub._lock:
+                        stub.received.append(json.loads(body or b"{}"))
+                self.send_response(status)
+                if retry_after is not None:
+                    self.send_header("Retry-After", str(retry_after))
+                self.end_headers()
+                self.wfile.write(b"ok" if status == 200 else b"rate_limited" if status == 429 else b"error")
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/services/stub"
+
+    def fail_next(self, status=429, times=1, retry_after=None):
+        """
+        Makes the next `times` posts answer with `status` (and an optional Retry-After header).
+        """
+        with self._lock:
+            self._failures.extend([(status, retry_after)] * times)
+
+    def _next_response(self):
+        with self._lock:
+            self.requests += 1
+            if self._failures:
+                return self._failures.pop(0)
+        return 200, None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,260 @@
+# utils/transport.py
+# Shared HTTP transport for every outbound integration (weather, news, Slack).
+# Provides pooled keep-alive sessions per host, connect/read timeouts, retries with jittered
+# exponential backoff on 429/5xx, a per-host circuit breaker and per-host latency/error metrics.
+
+import os
+import random
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+# Default (connect, read) timeouts in seconds
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+
+# Retry policy
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "8"))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Methods that are safe to repeat after the server may already have acted on the request. Others
+# (e.g. a Slack POST) are only retried when the request cannot have been processed: failures
+# while connecting and 429.
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+# Circuit breaker: open after this many consecutive failures, probe again after the cool-down
+BREAKER_THRESHOLD = int(os.getenv("HTTP_BREAKER_THRESHOLD", "5"))
+BREAKER_COOLDOWN = float(os.getenv("HTTP_BREAKER_COOLDOWN", "30"))
+
+# Connections kept alive per host
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "32"))
+
+# Number of recent latencies kept per host for percentiles
+LATENCY_WINDOW = 512
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """
+    Raised without touching the network while a host's circuit breaker is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker: closed -> open (fail fast) -> half-open (one probe) -> closed.
+    """
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+class HostMetrics:
+    """
+    Request counters and a rolling latency window for one host.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.short_circuited = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, ok):
+        with self._lock:
+            self.requests += 1
+            self.latencies.append(seconds)
+            if not ok:
+                self.errors += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            ordered = sorted(self.latencies)
+            requests_made = self.requests
+
+        def pct(q):
+            return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else None
+
+        return {
+            "requests": requests_made,
+            "errors": self.errors,
+            "error_rate": self.errors / requests_made if requests_made else 0.0,
+            "retries": self.retries,
+            "short_circuited": self.short_circuited,
+            "p50_ms": None if pct(0.5) is None else round(pct(0.5) * 1000, 1),
+            "p95_ms": None if pct(0.95) is None else round(pct(0.95) * 1000, 1),
+        }
+
+
+class _Host:
+    def __init__(self):
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.breaker = CircuitBreaker()
+        self.metrics = HostMetrics()
+
+
+_hosts = {}
+_hosts_lock = threading.Lock()
+
+
+def _host(url) -> _Host:
+    host = urlsplit(url).netloc
+    with _hosts_lock:
+        if host not in _hosts:
+            _hosts[host] = _Host()
+        return _hosts[host]
+
+
+def get_session(url) -> requests.Session:
+    """
+    Returns the pooled keep-alive session for the host of `url`.
+    """
+    return _host(url).session
+
+
+def _backoff_delay(attempt, response=None):
+    # Honour Retry-After on 429/503, otherwise full-jitter exponential backoff
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(float(retry_after), BACKOFF_MAX)
+            except ValueError:
+                pass
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def _failed_to_connect(error) -> bool:
+    # True when the request failed before the connection was established, so nothing was sent.
+    # requests also raises ConnectionError for a connection dropped after the body went out
+    # ("Connection aborted", RemoteDisconnected), which must not be treated the same way.
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = error.args[0] if error.args else None
+    return isinstance(getattr(reason, "reason", reason), NewConnectionError)
+
+
+def request(method, url, timeout=None, retries=None, retry_statuses=RETRY_STATUSES, **kwargs):
+    """
+    Sends an HTTP request through the shared transport.
+
+    Args:
+        method (str): HTTP method.
+        url (str): Target URL.
+        timeout (tuple | float): (connect, read) timeout. Defaults to (CONNECT_TIMEOUT, READ_TIMEOUT).
+        retries (int): Retries on connection errors and retryable statuses. Defaults to MAX_RETRIES.
+            Non-idempotent methods are retried only when connecting failed and on 429, never on
+            read timeouts, dropped connections or 5xx, so a POST the server may have received is
+            not sent twice.
+        retry_statuses (tuple): Statuses that trigger a retry.
+        **kwargs: Passed to requests.Session.request (params, json, data, headers, ...).
+
+    Returns:
+        requests.Response: The final response (possibly a non-2xx status after retries are exhausted).
+
+    Raises:
+        CircuitOpenError: If the host's circuit breaker is open.
+        requests.RequestException: If the last attempt failed at the connection level.
+    """
+    host = _host(url)
+    timeout = timeout or (CONNECT_TIMEOUT, READ_TIMEOUT)
+    retries = MAX_RETRIES if retries is None else retries
+    idempotent = method.upper() in IDEMPOTENT_METHODS
+
+    attempt = 0
+    while True:
+        if not host.breaker.allow():
+            host.metrics.short_circuited += 1
+            raise CircuitOpenError(f"Circuit open for {urlsplit(url).netloc}")
+
+        start = time.perf_counter()
+        try:
+            response = host.session.request(method, url, timeout=timeout, **kwargs)
+        except requests.RequestException as e:
+            host.metrics.observe(time.perf_counter() - start, ok=False)
+            host.breaker.record_failure()
+            if attempt >= retries or not (idempotent or _failed_to_connect(e)):
+                raise
+            response = None
+        else:
+            failed = response.status_code >= 500
+            host.metrics.observe(time.perf_counter() - start, ok=not failed and response.status_code != 429)
+            if failed:
+                host.breaker.record_failure()
+            else:
+                host.breaker.record_success()
+            retryable = response.status_code in retry_statuses and (idempotent or response.status_code == 429)
+            if not retryable or attempt >= retries:
+                return response
+
+        host.metrics.retries += 1
+        time.sleep(_backoff_delay(attempt, response))
+        attempt += 1
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def transport_stats() -> dict:
+    """
+    Returns per-host metrics and circuit breaker state.
+    """
+    with _hosts_lock:
+        hosts = dict(_hosts)
+    stats = {}
+    for name, host in hosts.items():
+        stats[name] = host.metrics.snapshot()
+        stats[name]["circuit"] = host.breaker.state
+    return stats
@@ -0,0 +1,83 @@
+# utils/ttl_cache.py
+# Small thread-safe in-memory cache with a time-to-live and LRU size bound.
+# Module-level instances live for the whole process, so every Streamlit session shares them.
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    LRU cache whose entries expire after `ttl` seconds.
+
+    Args:
+        maxsize (int): Maximum number of entries; the least recently used entry is evicted first.
+        ttl (float): Seconds an entry stays fresh.
+
+    Statistics: `hits` (fresh entry served), `misses` (no entry), `stale` (entry found but expired).
+    """
+
+    def __init__(self, maxsize=1024, ttl=600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, key):
+        """
+        Returns (value, fresh). An expired entry is returned with fresh=False (counted as stale),
+        which lets callers fall back to old data when the upstream is failing.
+        """
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None, False
+            value, stored_at, ttl = item
+            if now - stored_at > (self.ttl if ttl is None else ttl):
+                self.stale += 1
+                return value, False
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value, True
+
+    def get(self, key):
+        """
+        Returns the cached value, or None if missing or expired.
+        """
+        value, fresh = self.lookup(key)
+        return value if fresh else None
+
+    def set(self, key, value, ttl=None):
+        """
+        Stores a value; `ttl` overrides the cache's time-to-live for this entry.
+        """
+        with self._lock:
+            # Entries without their own ttl follow the cache's, even if it is changed later
+            self._data[key] = (value, time.monotonic(), ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.stale = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.stale
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
@@ -1,25 +1,79 @@
-import requests
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from functools import lru_cache
-import streamlit as st
+from utils import transport
+from utils.ttl_cache import TTLCache
+from utils.metrics import metrics
+from utils.config import resolve_secret
 
 # load_dotenv()
 # API_KEY = os.getenv("WEATHER_API_KEY")
 
-# for deploy on the streamlit 
+# Overrides the WEATHER_API_KEY secret when set; otherwise it is resolved on first use
+# (st.secrets when deployed on Streamlit, environment variables otherwise)
+API_KEY = None
 
-API_KEY = st.secrets["WEATHER_API_KEY"]
+# OpenWeatherMap current weather endpoint (overridable, e.g. to point at a local stub)
+WEATHER_API_URL = os.getenv("WEATHER_API_URL", "https://api.openweathermap.org/data/2.5/weather")
 
+# Coordinates are snapped to a grid of this many degrees (0.1° ≈ 11 km) so nearby ships share an entry
+WEATHER_GRID_DEG = float(os.getenv("WEATHER_GRID_DEG", "0.1"))
+WEATHER_CACHE_TTL = int(os.getenv("WEATHER_CACHE_TTL", "600"))
+WEATHER_CACHE_SIZE = int(os.getenv("WEATHER_CACHE_SIZE", "2048"))
 
-@lru_cache(maxsize=32)
-def get_weather(lat, lon):
+# Process-wide cache, shared by every Streamlit session
+weather_cache = TTLCache(maxsize=WEATHER_CACHE_SIZE, ttl=WEATHER_CACHE_TTL)
+
+# Bulk fetch concurrency; timeouts, retries and pooling come from utils.transport
+WEATHER_MAX_WORKERS = int(os.getenv("WEATHER_MAX_WORKERS", "16"))
+
+
+def configure_weather_cache(grid_deg=None, ttl=None, maxsize=None):
+    """
+    Adjusts the grid size, TTL or capacity of the shared weather cache.
+    """
+    global WEATHER_GRID_DEG
+    if grid_deg is not None:
+        WEATHER_GRID_DEG = float(grid_deg)
+        weather_cache.clear()
+    if ttl is not None:
+        weather_cache.ttl = ttl
+    if maxsize is not None:
+        weather_cache.maxsize = maxsize
+
+
+def snap_to_grid(lat, lon, grid_deg=None):
+    """
+    Returns the center of the grid cell containing (lat, lon).
+    """
+    grid = grid_deg or WEATHER_GRID_DEG
+    return (
+        round((float(lat) // grid) * grid + grid / 2, 6),
+        round((float(lon) // grid) * grid + grid / 2, 6),
+    )
+
+
+def weather_cache_stats() -> dict:
+    stats = weather_cache.stats()
+    stats["grid_deg"] = WEATHER_GRID_DEG
+    return stats
+
+
+def _fetch_weather(lat, lon):
+    with metrics.timer("weather.fetch") as span:
+        weather = _request_weather(lat, lon)
+        span.ok = "error" not in weather
+        return weather
+
+
+def _request_weather(lat, lon):
     try:
+        api_key = resolve_secret(API_KEY, "WEATHER_API_KEY")
         url = (
-            f"https://api.openweathermap.org/data/2.5/weather?"
-            f"lat={lat}&lon={lon}&units=metric&appid={API_KEY}"
+            f"{WEATHER_API_URL}?"
+            f"lat={lat}&lon={lon}&units=metric&appid={api_key}"
         )
-        response = requests.get(url)
+        response = transport.get(url)
         data = response.json()
 
         if response.status_code != 200:
@@ -36,3 +90,61 @@ def get_weather(lat, lon):
         }
     except Exception as e:
         return {"error": str(e)}
+
+
+def get_weather(lat, lon):
+    # Look up the grid cell; errors are never cached, and stale data is served if the refresh fails
+    with metrics.timer("weather.get_weather") as span:
+        cell = snap_to_grid(lat, lon)
+        cached, fresh = weather_cache.lookup(cell)
+        if fresh:
+            span.cache_hit = True
+            return cached
+
+        weather = _fetch_weather(*cell)
+        if "error" in weather:
+            span.ok = cached is not None
+            return cached if cached is not None else weather
+
+        weather_cache.set(cell, weather)
+        return weather
+
+
+def get_weather_bulk(coords, max_workers=None):
+    """
+    Fetches weather for many coordinates at once.
+
+    Args:
+        coords (iterable): (lat, lon) pairs; duplicates and points in the same grid cell are fetched once.
+        max_workers (int): Maximum concurrent requests. Defaults to WEATHER_MAX_WORKERS.
+
+    Returns:
+        dict: (lat, lon) as given -> weather dict (same shape as get_weather, including "error").
+    """
+    with metrics.timer("weather.get_weather_bulk") as span:
+        coords = [(lat, lon) for lat, lon in coords]
+        cells = {coord: snap_to_grid(*coord) for coord in coords}
+
+        # Serve fresh cells from the cache and fetch every remaining cell exactly once
+        by_cell = {}
+        missing = []
+        for cell in dict.fromkeys(cells.values()):
+            by_cell[cell], fresh = weather_cache.lookup(cell)
+            if not fresh:
+                missing.append(cell)
+        span.cache_hit = not missing
+        span.attrs.update(points=len(coords), cells=len(by_cell), fetched=len(missing))
+
+        if missing:
+            workers = max(1, min(max_workers or WEATHER_MAX_WORKERS, len(missing)))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for cell, weather in zip(missing, pool.map(lambda c: _fetch_weather(*c), missing)):
+                    if "error" in weather:
+                        # Keep the stale value if there is one, as get_weather does
+                        if by_cell[cell] is None:
+                            by_cell[cell] = weather
+                    else:
+                        weather_cache.set(cell, weather)
+                        by_cell[cell] = weather
+
+        return {coord: by_cell[cell] for coord, cell in cells.items()}